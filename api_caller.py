@@ -1,4 +1,280 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+from custom_exceptions import NotFoundError
+from metrics import MetricsRegistry
+from rate_limiter import TokenBucket
+from response_cache import DEFAULT_MAX_ENTRIES, ResponseCache, normalize_url
+
+# Timeouts in seconds for establishing a connection and waiting for a response
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+# Number of hosts to keep a pool for, and number of connections kept per host
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+USER_AGENT = "AireLogicCLI/1.0 ( https://github.com/ElyDoodson/AireLogicCLI )"
+MUSICBRAINZ_API_URL = "https://musicbrainz.org/ws/2"
+LYRICS_API_URL = "https://api.lyrics.ovh/v1"
+# Requests per second allowed by each rate limited host
+# MusicBrainz answers 503 to clients going over 1 request per second
+RATE_LIMITS = {"musicbrainz.org": 1.0}
+# Status codes meaning the host wants us to slow down
+THROTTLED_STATUS_CODES = (429, 503)
+# Status code meaning the api has nothing at the url, these are cached separately
+NOT_FOUND_STATUS_CODE = 404
+MAX_RETRIES = 3
+# Seconds to back off after the first throttled response without Retry-After,
+# doubled for every retry after that
+RETRY_BACKOFF = 1.0
+# Maximum number of works MusicBrainz returns per page
+WORKS_PAGE_LIMIT = 100
+RECORDINGS_PAGE_LIMIT = 100
+# Releases come with their whole track lists, so fewer are asked for per page
+RELEASES_PAGE_LIMIT = 25
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".airelogic_cli", "responses.sqlite3"
+)
+
+_session = None
+_timeout = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+_session_lock = threading.Lock()
+_rate_limiters = {host: TokenBucket(rate) for host, rate in RATE_LIMITS.items()}
+_cache = None
+# Future of every request being sent, by normalized url, so identical
+# requests made at the same time wait on the first instead of being sent again
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+# Latency, status code and size of every request, by endpoint
+metrics = MetricsRegistry()
+
+
+def _create_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    """Creates a session with keep-alive connection pools mounted for http(s)
+
+    :int pool_connections: Number of per-host connection pools to keep
+    :int pool_maxsize: Maximum number of connections kept in each pool
+    :requests.Session returns: New session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def configure_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+) -> requests.Session:
+    """Creates the session shared by every api call, replacing any existing one.
+        Connections are kept alive and pooled per host so repeated calls
+        to the same api skip the TCP and TLS handshakes
+
+    :int pool_connections: Number of per-host connection pools to keep
+    :int pool_maxsize: Maximum number of connections kept in each pool
+    :float connect_timeout: Seconds to wait for a connection to be established
+    :float read_timeout: Seconds to wait for the server to send a response
+    :requests.Session returns: The new shared session
+    """
+    global _session, _timeout
+
+    session = _create_session(pool_connections, pool_maxsize)
+    with _session_lock:
+        old_session = _session
+        _session = session
+        _timeout = (connect_timeout, read_timeout)
+    if old_session is not None:
+        old_session.close()
+    return session
+
+
+def get_session() -> requests.Session:
+    """Gets the shared session, creating it with the default settings if needed
+
+    :requests.Session returns: The shared session
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = _create_session(DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE)
+        return _session
+
+
+def get_timeout() -> tuple:
+    """Gets the timeouts requests are sent with
+
+    :tuple returns: seconds to wait for a connection and for a response
+    """
+    return _timeout
+
+
+def close_session() -> None:
+    """Closes the shared session and its pooled connections
+
+    :None returns:
+    """
+    global _session
+
+    with _session_lock:
+        old_session = _session
+        _session = None
+    if old_session is not None:
+        old_session.close()
+
+
+def configure_api_urls(musicbrainz_url: str = None, lyrics_url: str = None) -> None:
+    """Points the api calls at different servers e.g. a local stub for benchmarks
+
+    :str musicbrainz_url: base url of the MusicBrainz api, ending in /ws/2
+    :str lyrics_url: base url of the lyrics api, ending in /v1
+    :None returns:
+    """
+    global MUSICBRAINZ_API_URL, LYRICS_API_URL
+
+    if musicbrainz_url != None:
+        MUSICBRAINZ_API_URL = musicbrainz_url.rstrip("/")
+    if lyrics_url != None:
+        LYRICS_API_URL = lyrics_url.rstrip("/")
+
+
+def configure_rate_limit(host: str, rate: float, capacity: float = 1) -> None:
+    """Sets the request rate allowed to a host, replacing any existing limit
+
+    :str host: hostname to limit e.g. "musicbrainz.org"
+    :float rate: requests per second, or None to remove the limit
+    :float capacity: number of requests that may be sent in a burst
+    :None returns:
+    """
+    if rate == None:
+        _rate_limiters.pop(host, None)
+    else:
+        _rate_limiters[host] = TokenBucket(rate, capacity)
+
+
+def get_rate_limiter(url: str) -> TokenBucket:
+    """Gets the rate limiter of the host a url is on
+
+    :str url: url to request
+    :TokenBucket returns: The host's rate limiter, or None if it isn't limited
+    """
+    return _rate_limiters.get(urlsplit(url).hostname)
+
+
+def configure_cache(
+    path: str = DEFAULT_CACHE_PATH,
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    ttls: dict = None,
+    not_found_ttls: dict = None,
+) -> ResponseCache:
+    """Turns on the on-disk response cache, replacing any existing one
+
+    :str path: path of the SQLite database file
+    :int max_entries: number of responses kept before the least recently used are evicted
+    :dict ttls: seconds a response stays fresh for, keyed by endpoint name
+    :dict not_found_ttls: seconds a 404 is remembered for, keyed by endpoint name
+    :ResponseCache returns: The new cache
+    """
+    global _cache
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    disable_cache()
+    _cache = ResponseCache(path, max_entries, ttls, not_found_ttls=not_found_ttls)
+    return _cache
+
+
+def get_cache() -> ResponseCache:
+    """Gets the response cache
+
+    :ResponseCache returns: The response cache, or None if caching is off
+    """
+    return _cache
+
+
+def disable_cache() -> None:
+    """Turns off the response cache and closes its database
+
+    :None returns:
+    """
+    global _cache
+
+    old_cache = _cache
+    _cache = None
+    if old_cache != None:
+        old_cache.close()
+
+
+def get_retry_delay(response: requests.Response, attempt: int) -> float:
+    """Gets how long to wait before retrying a throttled request
+
+    :requests.Response response: throttled response, or an aiohttp one
+    :int attempt: number of retries already made
+    :float returns: seconds to wait, from Retry-After if the server sent one
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(retry_after).timestamp()
+            return max(0.0, retry_at - time.time())
+        except (TypeError, ValueError):
+            pass
+    return RETRY_BACKOFF * 2 ** attempt
+
+
+def get_response(url: str, endpoint: str = "other") -> requests.Response:
+    """Sends a GET request through the shared session. Requests to rate limited
+        hosts are paced and throttled requests are retried up to MAX_RETRIES times.
+        Every attempt is recorded in the metrics of the endpoint
+
+    :str url: url to request
+    :str endpoint: name of the endpoint the metrics are recorded under
+    :requests.Response returns: response object from the api call
+    :raises LookupError: if the request could not be completed (e.g. timeout)
+    """
+    rate_limiter = get_rate_limiter(url)
+
+    for attempt in range(MAX_RETRIES + 1):
+        if rate_limiter != None:
+            rate_limiter.acquire()
+        started_at = time.perf_counter()
+        try:
+            response = get_session().get(url, timeout=_timeout)
+        except requests.RequestException as err:
+            metrics.record(endpoint, "error", 0, time.perf_counter() - started_at)
+            raise LookupError("Request failed: {}".format(err))
+        metrics.record(
+            endpoint,
+            str(response.status_code),
+            len(response.content),
+            time.perf_counter() - started_at,
+        )
+
+        if response.status_code not in THROTTLED_STATUS_CODES:
+            if rate_limiter != None:
+                rate_limiter.on_success()
+            return response
+        if attempt == MAX_RETRIES:
+            return response
+
+        delay = get_retry_delay(response, attempt)
+        if rate_limiter != None:
+            rate_limiter.penalize(delay)
+        else:
+            time.sleep(delay)
 
 
 def _check_response(response: requests.Response) -> dict:
@@ -17,6 +293,190 @@ def _check_response(response: requests.Response) -> dict:
         )
 
 
+def _fetch_json(url: str, endpoint: str, coalesce: bool = True) -> dict:
+    """Gets the response body of a url, from the cache if it has been stored.
+        If the same url is already being requested by another thread this
+        waits for that response rather than sending the request again
+
+    :str url: url to request
+    :str endpoint: name of the endpoint, used by the cache for its ttl
+    :bool coalesce: If False the request is sent even if the same url is
+                    already being requested, e.g. to hedge a slow request
+    :dict returns: response from api as dictionary
+    :raises NotFoundError: if the api has nothing at the url, including cached 404s
+    :raises LookupError: if api status_code >= 400
+    """
+    cached_body = get_cached_body(url, endpoint)
+    if cached_body != None:
+        return cached_body
+
+    if not coalesce:
+        return _fetch_uncached_json(url, endpoint)
+
+    key = normalize_url(url)
+    with _in_flight_lock:
+        in_flight_request = _in_flight.get(key)
+        if in_flight_request == None:
+            _in_flight[key] = Future()
+    if in_flight_request != None:
+        metrics.record_coalesced(endpoint)
+        # Raises the same LookupError as the request being waited on
+        return in_flight_request.result()
+
+    try:
+        response_dict = _fetch_uncached_json(url, endpoint)
+    except BaseException as err:
+        _finish_in_flight_request(key).set_exception(err)
+        raise
+    _finish_in_flight_request(key).set_result(response_dict)
+    return response_dict
+
+
+def _fetch_uncached_json(url: str, endpoint: str) -> dict:
+    """Requests a url and stores the response body in the cache"""
+    cache = _cache
+    response = get_response(url, endpoint)
+    response_dict = (
+        _check_response(response)
+        if response.status_code != NOT_FOUND_STATUS_CODE
+        else None
+    )
+    check_not_found(url, endpoint, response.status_code, response_dict)
+    if cache != None:
+        cache.set(url, endpoint, response_dict)
+    return response_dict
+
+
+def get_cached_body(url: str, endpoint: str) -> dict:
+    """Gets the cached response body of a url, recording a cache hit if found
+
+    :str url: url of the request
+    :str endpoint: name of the endpoint the cache hit is recorded under
+    :dict returns: response body, or None if the url isn't cached
+    :raises NotFoundError: if the api had nothing at the url when last requested
+    """
+    cache = _cache
+    if cache == None:
+        return None
+    entry = cache.get_entry(url)
+    if entry == None:
+        return None
+
+    metrics.record_cache_hit(endpoint)
+    status_code, body = entry
+    if status_code == NOT_FOUND_STATUS_CODE:
+        raise NotFoundError(
+            "Server error with status code {} (cached)".format(status_code)
+        )
+    return body
+
+
+def check_not_found(
+    url: str, endpoint: str, status_code: int, response_dict: dict
+) -> None:
+    """Checks whether the api had nothing at a url. If so it is remembered in
+        the cache, so it isn't requested again until the not found ttl of the
+        endpoint runs out
+
+    :str url: url of the request
+    :str endpoint: name of the endpoint, used by the cache for its ttl
+    :int status_code: status code of the response
+    :dict response_dict: response body, None if the request failed
+    :None returns:
+    :raises NotFoundError: if the status code is 404 or there are no lyrics in the body
+    """
+    if status_code == NOT_FOUND_STATUS_CODE:
+        message = "Server error with status code {}".format(status_code)
+    elif (
+        response_dict != None
+        and endpoint == "lyrics"
+        and not (response_dict.get("lyrics") or "").strip()
+    ):
+        # lyrics.ovh sometimes answers 200 with empty lyrics, a miss just like a 404
+        message = "No lyrics found"
+    else:
+        return
+
+    cache = _cache
+    if cache != None:
+        cache.set(url, endpoint, None, NOT_FOUND_STATUS_CODE)
+    raise NotFoundError(message)
+
+
+def _finish_in_flight_request(key: str) -> Future:
+    with _in_flight_lock:
+        return _in_flight.pop(key)
+
+
+def build_artist_list_url(name: str) -> str:
+    """Builds the url searching MusicBrainz for artists by name
+
+    :str name: name of artist
+    :str returns: url of the request
+    """
+    return '{}/artist/?query="{}"&fmt=json'.format(MUSICBRAINZ_API_URL, name)
+
+
+def build_artist_url(artist_mbid: str) -> str:
+    """Builds the url looking up a single MusicBrainz artist
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :str returns: url of the request
+    """
+    return "{}/artist/{}?fmt=json".format(MUSICBRAINZ_API_URL, artist_mbid)
+
+
+def build_songs_url(artist_mbid: str, api_song_offset: int) -> str:
+    """Builds the url of a page of an artist's MusicBrainz 'works'
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: number of works to skip
+    :str returns: url of the request
+    """
+    return "{}/work?artist={}&limit={}&fmt=json&offset={}".format(
+        MUSICBRAINZ_API_URL, artist_mbid, WORKS_PAGE_LIMIT, api_song_offset
+    )
+
+
+def build_recordings_url(artist_mbid: str, api_song_offset: int) -> str:
+    """Builds the url of a page of an artist's MusicBrainz recordings,
+        with the works each is a performance of
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: number of recordings to skip
+    :str returns: url of the request
+    """
+    return "{}/recording?artist={}&inc=work-rels&limit={}&fmt=json&offset={}".format(
+        MUSICBRAINZ_API_URL, artist_mbid, RECORDINGS_PAGE_LIMIT, api_song_offset
+    )
+
+
+def build_releases_url(artist_mbid: str, api_song_offset: int) -> str:
+    """Builds the url of a page of an artist's official MusicBrainz releases,
+        with their track lists
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: number of releases to skip
+    :str returns: url of the request
+    """
+    return (
+        "{}/release?artist={}&inc=recordings&status=official&limit={}"
+        "&fmt=json&offset={}"
+    ).format(MUSICBRAINZ_API_URL, artist_mbid, RELEASES_PAGE_LIMIT, api_song_offset)
+
+
+def build_lyrics_url(artist_name: str, song_title: str) -> str:
+    """Builds the url of a song's lyrics on lyricsovh
+
+    :str artist_name: Name of artist
+    :str song_title: Name of song
+    :str returns: url of the request
+    """
+    return "{}/{}/{}".format(
+        LYRICS_API_URL, artist_name, song_title.replace(" ", "%20")
+    )
+
+
 def get_artist_list_from_name(name: str) -> dict:
     """Queries MusicBrainz.org api using a given name to get a list of artists
 
@@ -24,9 +484,17 @@ def get_artist_list_from_name(name: str) -> dict:
     :dict returns: response from api as dictionary
     :raises LookupError: if api status_code >= 400
     """
-    url = 'https://musicbrainz.org/ws/2/artist/?query="{}"&fmt=json'.format(name)
-    response = requests.get(url)
-    return _check_response(response)
+    return _fetch_json(build_artist_list_url(name), "artist")
+
+
+def get_artist_from_mbid(artist_mbid: str) -> dict:
+    """Queries MusicBrainz.org api for a single artist using their mbid
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return _fetch_json(build_artist_url(artist_mbid), "artist")
 
 
 def get_songs_from_artist_mbid(artist_mbid: str, api_song_offset: int) -> dict:
@@ -37,24 +505,45 @@ def get_songs_from_artist_mbid(artist_mbid: str, api_song_offset: int) -> dict:
     :dict returns: response from api as dictionary
     :raises LookupError: if api status_code >= 400
     """
-    url = "https://musicbrainz.org/ws/2/work?artist={}&limit=100&fmt=json&offset={}".format(
-        artist_mbid, api_song_offset
-    )
-    response = requests.get(url)
-    return _check_response(response)
+    return _fetch_json(build_songs_url(artist_mbid, api_song_offset), "works")
+
+
+def get_recordings_from_artist_mbid(artist_mbid: str, api_song_offset: int) -> dict:
+    """Queries MusicBrainz.org api using a given artist mbid to get a page of
+        their recordings and the works they perform
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: Offset used to access more api results
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return _fetch_json(build_recordings_url(artist_mbid, api_song_offset), "recordings")
+
 
+def get_releases_from_artist_mbid(artist_mbid: str, api_song_offset: int) -> dict:
+    """Queries MusicBrainz.org api using a given artist mbid to get a page of
+        their official releases and track lists
 
-def get_lyrics_from_artist_name_and_title(artist_name: str, song_title: str) -> dict:
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: Offset used to access more api results
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return _fetch_json(build_releases_url(artist_mbid, api_song_offset), "releases")
+
+
+def get_lyrics_from_artist_name_and_title(
+    artist_name: str, song_title: str, coalesce: bool = True
+) -> dict:
     """Queries lyricsovh api using a given artist name and song title
         to get a lysics of chosen song
 
     :str artist_name: Name of artist
     :str song_title: Name of song
+    :bool coalesce: If False the request is sent even if the same song is
+                    already being requested
     :dict returns: dictionary containing lyrics of requested song
+    :raises NotFoundError: if lyrics.ovh has no lyrics for the song
     :raises LookupError: if api status_code >= 400
     """
-    url = "https://api.lyrics.ovh/v1/{}/{}".format(
-        artist_name, song_title.replace(" ", "%20")
-    )
-    response = requests.get(url)
-    return _check_response(response)
+    return _fetch_json(build_lyrics_url(artist_name, song_title), "lyrics", coalesce)
@@ -1,4 +1,7 @@
+from array import array
+import statistics_engine
 from custom_exceptions import BreakLoopError
+from wordcount_accumulator import WordcountAccumulator
 
 
 class Artist:
@@ -6,6 +9,14 @@ class Artist:
         self.name = name
         self.song_list = []
         self.statistics = None
+        # Updated by the artist's songs as their lyrics are assigned
+        self.wordcount_accumulator = WordcountAccumulator()
+        # Lyric requests of the last load that lyrics.ovh had no lyrics for,
+        # and those that failed for any other reason
+        self.missing_lyrics = 0
+        self.lyric_errors = 0
+        # Unix time the song list was fetched, set when stored in a ResultsStore
+        self.fetched_at = None
 
     def has_statistics(self) -> bool:
         """Does the artist already have a not None statistics field?
@@ -94,28 +105,49 @@ class Artist:
         self.wordcount_standard_deviation = standard_deviation
         return standard_deviation
 
-    def get_artist_statistics(self) -> dict:
+    def get_wordcounts(self) -> array:
+        """Gets the wordcounts of the songs in the artist's song list that have one
+
+        :array returns: array("I") of wordcounts
+        """
+        return array(
+            "I", (song.wordcount for song in self.song_list if song.has_wordcount)
+        )
+
+    def add_songs(self, songs) -> None:
+        """Adds songs to the song list, giving the wordcount accumulator to any
+        created without it and adding the wordcounts they already have
+
+        :iterable songs: songs to add
+        :None returns:
+        """
+        for song in songs:
+            if song.accumulator != self.wordcount_accumulator:
+                song.accumulator = self.wordcount_accumulator
+                if song.has_wordcount:
+                    self.wordcount_accumulator.add(song.wordcount)
+            self.song_list.append(song)
+
+    def get_artist_statistics(self, detailed: bool = False) -> dict:
         """Returns a dictionary of the mean, max, min, variance,
-        and standard deviation on the number of words in the artist's song list
+        and standard deviation on the number of words in the artist's song list.
+        These are read from the wordcount accumulator the songs update
 
+        :bool detailed: If True the median, percentiles, IQR and a histogram are
+                        added, calculated by statistics_engine from every wordcount
         :dict returns: Dictionary of statistics
         """
         if self.song_list == []:
             raise BreakLoopError(
                 "Artist has no songs in song list. Unable to calculate statistics"
             )
-        wordcount_mean = self.calculate_mean_wordcount()
-        wordcount_max = self.calculate_max_wordcount()
-        wordcount_min = self.calculate_min_wordcount()
-        wordcount_variance = self.calculate_variance_wordcount()
-        wordcount_standard_deviation = self.calculate_standard_deviation_wordcount()
-
-        statistics_dict = {
-            "Mean": wordcount_mean,
-            "Max": wordcount_max,
-            "Min": wordcount_min,
-            "Variance": wordcount_variance,
-            "Std_dev": wordcount_standard_deviation,
-        }
+        if detailed:
+            statistics_dict = statistics_engine.get_statistics(self.get_wordcounts())
+        else:
+            statistics_dict = self.wordcount_accumulator.get_statistics()
+        self.wordcount_mean = statistics_dict["Mean"]
+        self.wordcount_variance = statistics_dict["Variance"]
+        self.wordcount_standard_deviation = statistics_dict["Std_dev"]
+
         self.statistics = statistics_dict
         return statistics_dict
@@ -0,0 +1,280 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), ".airelogic_cli", "artists.sqlite3"
+)
+# Fraction of trigrams a name must share with the query to be a search result
+DEFAULT_MIN_SIMILARITY = 0.3
+# Artists sharing the most trigrams with a query that are scored in python
+_MAX_CANDIDATES = 200
+# Fields of a MusicBrainz artist record that are kept in the index
+_RECORD_FIELDS = (
+    "id",
+    "name",
+    "sort-name",
+    "type",
+    "area",
+    "aliases",
+    "disambiguation",
+)
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+
+def normalise_name(name: str) -> str:
+    """Normalises an artist name for matching. Accents, punctuation, case and
+        extra spaces are removed so "Beyoncé" matches "beyonce"
+
+    :str name: Name of the artist
+    :str returns: Normalised name
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(
+        character for character in decomposed if not unicodedata.combining(character)
+    )
+    return " ".join(_PUNCTUATION_PATTERN.sub("", without_accents).casefold().split())
+
+
+def get_trigrams(normalised_name: str) -> set:
+    """Gets the trigrams of a normalised name, padded so the start of each word
+        counts more than its middle (the same as postgres' pg_trgm)
+
+    :str normalised_name: Name normalised with normalise_name
+    :set returns: Set of three character strings
+    """
+    trigrams = set()
+    for word in normalised_name.split():
+        padded_word = f"  {word} "
+        trigrams.update(
+            padded_word[index : index + 3] for index in range(len(padded_word) - 2)
+        )
+    return trigrams
+
+
+def get_similarity(query_trigrams: set, name_trigrams: set) -> float:
+    """Gets the share of trigrams two names have in common
+
+    :set query_trigrams: Trigrams of the query
+    :set name_trigrams: Trigrams of the name
+    :float returns: Number between 0 and 1, 1 if the trigrams are the same
+    """
+    if not query_trigrams or not name_trigrams:
+        return 0.0
+    return len(query_trigrams & name_trigrams) / len(query_trigrams | name_trigrams)
+
+
+def get_record_names(record: dict) -> list:
+    """Gets every name an artist can be searched by: its name, sort name and aliases
+
+    :dict record: MusicBrainz artist record
+    :list returns: List of names, the artist's name first
+    """
+    names = [record.get("name"), record.get("sort-name")]
+    names.extend(alias.get("name") for alias in record.get("aliases") or [])
+    unique_names = []
+    for name in names:
+        if name and name not in unique_names:
+            unique_names.append(name)
+    return unique_names
+
+
+class ArtistIndex:
+    """SQLite backed index of the MusicBrainz artist records seen so far.
+
+    Artists are found by the trigrams of their names and aliases, so searches
+    tolerate typos, and names can be completed from a prefix.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS artists (
+                mbid TEXT PRIMARY KEY,
+                record TEXT NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS names (
+                normalised_name TEXT NOT NULL,
+                mbid TEXT NOT NULL,
+                name TEXT NOT NULL,
+                PRIMARY KEY (normalised_name, mbid)
+            ) WITHOUT ROWID"""
+        )
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS trigrams (
+                trigram TEXT NOT NULL,
+                mbid TEXT NOT NULL,
+                PRIMARY KEY (trigram, mbid)
+            ) WITHOUT ROWID"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS names_mbid ON names (mbid)"
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM artists"
+            ).fetchone()
+        return count
+
+    def add_artists(self, records: list) -> None:
+        """Adds artist records to the index, replacing any with the same mbid
+
+        :list records: MusicBrainz artist records, as in an artist search response
+        :None returns:
+        """
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                for record in records:
+                    if record.get("id") and record.get("name"):
+                        self._add_artist(record)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+    ) -> list:
+        """Finds the artists whose name or an alias is most like the query.
+            Names starting with the query rank above those that only look alike
+
+        :str query: Name searched for
+        :int limit: Maximum number of artists returned
+        :float min_similarity: Artists less similar than this are left out
+        :list returns: List of MusicBrainz artist records, best match first
+        """
+        normalised_query = normalise_name(query)
+        query_trigrams = get_trigrams(normalised_query)
+        if not query_trigrams:
+            return []
+
+        placeholders = ", ".join("?" * len(query_trigrams))
+        with self._lock:
+            candidate_mbids = [
+                mbid
+                for (mbid,) in self._connection.execute(
+                    f"SELECT mbid FROM trigrams WHERE trigram IN ({placeholders}) "
+                    "GROUP BY mbid ORDER BY COUNT(*) DESC LIMIT ?",
+                    (*query_trigrams, _MAX_CANDIDATES),
+                )
+            ]
+            candidate_names = self._get_names(candidate_mbids)
+
+        scores = {}
+        for normalised_name, mbid in candidate_names:
+            score = get_similarity(query_trigrams, get_trigrams(normalised_name))
+            if normalised_name.startswith(normalised_query):
+                score += 1
+            scores[mbid] = max(scores.get(mbid, 0), score)
+
+        best_mbids = sorted(
+            (mbid for mbid, score in scores.items() if score >= min_similarity),
+            key=lambda mbid: -scores[mbid],
+        )[:limit]
+        return self._get_records(best_mbids)
+
+    def find_exact(self, query: str) -> list:
+        """Finds the artists with a name or alias equal to the query once normalised
+
+        :str query: Name searched for
+        :list returns: List of MusicBrainz artist records
+        """
+        with self._lock:
+            mbids = [
+                mbid
+                for (mbid,) in self._connection.execute(
+                    "SELECT DISTINCT mbid FROM names WHERE normalised_name = ?",
+                    (normalise_name(query),),
+                )
+            ]
+        return self._get_records(mbids)
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        """Completes the start of a name to the names of indexed artists
+
+        :str prefix: Start of a name
+        :int limit: Maximum number of names returned
+        :list returns: List of names in alphabetical order
+        """
+        normalised_prefix = normalise_name(prefix)
+        if prefix.endswith(" ") and normalised_prefix:
+            normalised_prefix += " "
+        with self._lock:
+            return [
+                name
+                for (name,) in self._connection.execute(
+                    "SELECT DISTINCT name FROM names "
+                    "WHERE normalised_name >= ? AND normalised_name < ? "
+                    "ORDER BY normalised_name LIMIT ?",
+                    (normalised_prefix, normalised_prefix + "\U0010ffff", limit),
+                )
+            ]
+
+    def close(self) -> None:
+        """Closes the database connection
+
+        :None returns:
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _add_artist(self, record: dict) -> None:
+        mbid = record["id"]
+        self._connection.execute("DELETE FROM names WHERE mbid = ?", (mbid,))
+        self._connection.execute("DELETE FROM trigrams WHERE mbid = ?", (mbid,))
+        kept_record = {key: record[key] for key in _RECORD_FIELDS if key in record}
+        self._connection.execute(
+            "INSERT OR REPLACE INTO artists VALUES (?, ?)",
+            (mbid, json.dumps(kept_record)),
+        )
+        trigrams = set()
+        for name in get_record_names(record):
+            normalised_name = normalise_name(name)
+            if not normalised_name:
+                continue
+            self._connection.execute(
+                "INSERT OR IGNORE INTO names VALUES (?, ?, ?)",
+                (normalised_name, mbid, name),
+            )
+            trigrams |= get_trigrams(normalised_name)
+        self._connection.executemany(
+            "INSERT INTO trigrams VALUES (?, ?)",
+            ((trigram, mbid) for trigram in trigrams),
+        )
+
+    def _get_names(self, mbids: list) -> list:
+        if not mbids:
+            return []
+        placeholders = ", ".join("?" * len(mbids))
+        return self._connection.execute(
+            f"SELECT normalised_name, mbid FROM names WHERE mbid IN ({placeholders})",
+            mbids,
+        ).fetchall()
+
+    def _get_records(self, mbids: list) -> list:
+        if not mbids:
+            return []
+        placeholders = ", ".join("?" * len(mbids))
+        with self._lock:
+            records = dict(
+                self._connection.execute(
+                    f"SELECT mbid, record FROM artists WHERE mbid IN ({placeholders})",
+                    mbids,
+                )
+            )
+        return [json.loads(records[mbid]) for mbid in mbids if mbid in records]
@@ -0,0 +1,182 @@
+import threading
+from concurrent.futures import Executor, Future, TimeoutError
+import artist
+import artist_logic as al
+from progress_display import ProgressDisplay, STDOUT, resolve_stream
+from results_store import ArtistCheckpoint, ResultsStore
+
+# Number of artists whose songs and lyrics are fetched at once in the background
+DEFAULT_BACKGROUND_JOBS = 2
+
+QUEUED = "Queued"
+FETCHING_SONGS = "Fetching songs"
+FETCHING_LYRICS = "Fetching lyrics"
+DONE = "Done"
+FAILED = "Failed"
+STOPPED = "Stopped"
+
+
+class ArtistJob:
+    """Fetches the songs and lyrics of an artist and calculates their statistics
+    on an executor, so the menu can be used while it runs.
+
+    The progress of the lyric requests is kept in a silent ProgressDisplay that
+    can be read from the menu's thread. With a results store the song list and
+    each wordcount are checkpointed to it as they arrive, and an artist loaded
+    from a checkpoint only has its remaining lyrics requested. A stopped job
+    sends no more lyric requests, so it ends once those in flight finish.
+    """
+
+    def __init__(
+        self,
+        artist_: artist.Artist,
+        on_finished=None,
+        results_store: ResultsStore = None,
+    ):
+        self.artist = artist_
+        self.stage = QUEUED
+        self.progress = ProgressDisplay(stream=None)
+        self.future = None
+        self.results_store = results_store
+        self._on_finished = on_finished
+        self._stop_event = threading.Event()
+        self._delete_results = False
+
+    def start(self, executor: Executor) -> Future:
+        """Submits the job to an executor
+
+        :Executor executor: executor the job runs on
+        :Future returns: Future of the artist's statistics
+        """
+        self.future = executor.submit(self.run)
+        return self.future
+
+    def run(self) -> dict:
+        """Fetches the songs and lyrics of the artist and calculates its statistics.
+            The song list is only fetched if the artist hasn't got one, and only
+            songs without a wordcount have their lyrics requested, so running a
+            failed job again carries on from where it stopped
+
+        :dict returns: Dictionary of statistics, or None if the job was stopped
+        """
+        try:
+            return self._run()
+        finally:
+            if self._delete_results and self.results_store != None:
+                self.results_store.delete(self.artist.mbid)
+
+    def _run(self) -> dict:
+        try:
+            if self.artist.song_list == []:
+                self.stage = FETCHING_SONGS
+                al.assign_artist_song_list(self.artist)
+                # An artist without songs fails below, there is nothing to carry on
+                if (
+                    self.results_store != None
+                    and self.artist.song_list != []
+                    and not self.is_stopped()
+                ):
+                    self.results_store.save(self.artist)
+            if self.is_stopped():
+                self.stage = STOPPED
+                return None
+
+            self.stage = FETCHING_LYRICS
+            checkpoint = (
+                ArtistCheckpoint(self.results_store, self.artist)
+                if self.results_store != None
+                else None
+            )
+            try:
+                al.assign_lyrics_to_songs(
+                    self.artist,
+                    retain_lyrics=False,
+                    progress=self.progress,
+                    on_song_group_done=(
+                        checkpoint.song_group_done if checkpoint != None else None
+                    ),
+                    stop_event=self._stop_event,
+                )
+            finally:
+                if checkpoint != None:
+                    checkpoint.flush()
+            if self.is_stopped():
+                self.stage = STOPPED
+                return None
+
+            statistics = self.artist.get_artist_statistics()
+            if self._on_finished != None:
+                self._on_finished(self.artist)
+        except BaseException:
+            self.stage = FAILED
+            raise
+        self.stage = DONE
+        return statistics
+
+    def done(self) -> bool:
+        """Has the job finished, failed or been cancelled?
+
+        :bool returns: True if the job isn't queued or running
+        """
+        return self.future != None and self.future.done()
+
+    def cancel(self) -> bool:
+        """Cancels the job if it hasn't started yet, a running job is left to finish
+
+        :bool returns: True if the job was cancelled
+        """
+        return self.future != None and self.future.cancel()
+
+    def stop(self, delete_results: bool = False) -> None:
+        """Stops the job, a running job ends once its lyric requests in flight
+            finish and what it fetched is kept in the results store
+
+        :bool delete_results: If True the artist is removed from the results
+                              store once the job has ended instead
+        :None returns:
+        """
+        self._delete_results = delete_results
+        self._stop_event.set()
+        self.cancel()
+
+    def is_stopped(self) -> bool:
+        """Has the job been asked to stop?
+
+        :bool returns: True if stop was called
+        """
+        return self._stop_event.is_set()
+
+    def get_status_line(self) -> str:
+        """Builds a line describing how far the job has got
+
+        :str returns: status line
+        """
+        if self.stage == FETCHING_LYRICS:
+            return f"{self.stage} {self.progress.get_status_line()}"
+        return self.stage
+
+    def wait(self, stream=STDOUT, refresh_interval: float = 0.2) -> dict:
+        """Waits for the job to finish, showing its progress on a refreshing line
+
+        :stream: stream the progress is printed to, or None to print nothing.
+                 Defaults to sys.stdout as it is when called
+        :float refresh_interval: seconds between refreshes of the line
+        :dict returns: Dictionary of statistics
+        :raises Exception: whatever exception the job failed with
+        """
+        stream = resolve_stream(stream)
+        line_length = 0
+        try:
+            while True:
+                try:
+                    return self.future.result(timeout=refresh_interval)
+                except TimeoutError:
+                    if stream == None:
+                        continue
+                    line = self.get_status_line()
+                    padding = " " * max(0, line_length - len(line))
+                    line_length = len(line)
+                    print("\r" + line + padding, end="", file=stream, flush=True)
+        finally:
+            if stream != None and line_length > 0:
+                print(file=stream, flush=True)
@@ -1,7 +1,144 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import api_caller
 import artist
 import song
-from custom_exceptions import BreakLoopError
+import song_sources
+from artist_index import (
+    DEFAULT_INDEX_PATH,
+    ArtistIndex,
+    get_record_names,
+    normalise_name,
+)
+from custom_exceptions import BreakLoopError, NotFoundError
+from lyrics_providers import get_lyrics_provider
+from progress_display import ProgressDisplay
+from song_sources import SongSource, get_song_source
+from wordcount_accumulator import WordcountAccumulator
+
+# Number of lyric requests allowed in flight at once
+DEFAULT_LYRIC_WORKERS = 8
+# Number of works pages requested at once, these are still
+# paced by the MusicBrainz rate limit in api_caller
+DEFAULT_PAGE_WORKERS = 4
+
+# Bracketed or dashed suffixes marking another version of the same song
+# e.g. "Song (Live)", "Song [2011 Remaster]" or "Song - Demo"
+_VERSION_WORD = (
+    r"(?:live|remix|mix|demo|version|edit|acoustic|remaster(?:ed)?|mono|stereo|"
+    r"sessions?|take)"
+)
+_VERSION_QUALIFIER = (
+    r"(?:\d+|radio|single|album|extended|original|alternate|alternative|club|dub|"
+    r"early|digital(?:ly)?|bbc)"
+)
+_VERSION_MARKER = (
+    # Only version words and qualifiers, e.g. "Live", "2011 Remaster" or "Take 2",
+    # optionally followed by where it was recorded as in "Live at Wembley".
+    # "Take Me Home" or "Live Forever" are part of the title so aren't markers
+    rf"(?:(?=(?:{_VERSION_QUALIFIER}[\s/&,]+)*{_VERSION_WORD}\b)"
+    rf"(?:(?:{_VERSION_WORD}|{_VERSION_QUALIFIER})\b[\s/&,]*)+"
+    r"(?:(?:at|in|from)\s[^)\]]*)?"
+    # Or named after who made it, e.g. "Mark Ronson Remix" or "Peel Session"
+    r"|(?:[\w'.&]+\s+)+(?:remix|mix|version|edit|sessions?))"
+)
+_VERSION_SUFFIX_PATTERN = re.compile(
+    rf"\s*(?:[(\[]\s*{_VERSION_MARKER}\s*[)\]]|\s-\s*{_VERSION_MARKER})\s*$",
+    re.IGNORECASE,
+)
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+_MBID_PATTERN = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE
+)
+
+# Every artist record returned by the api is added to this, when configured
+_artist_index = None
+
+
+def configure_artist_index(path: str = DEFAULT_INDEX_PATH) -> ArtistIndex:
+    """Turns on the local index of artists, replacing any existing one
+
+    :str path: path of the SQLite database file
+    :ArtistIndex returns: The new index
+    """
+    global _artist_index
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    disable_artist_index()
+    _artist_index = ArtistIndex(path)
+    return _artist_index
+
+
+def get_artist_index() -> ArtistIndex:
+    """Gets the local index of artists
+
+    :ArtistIndex returns: The index, or None if it is off
+    """
+    return _artist_index
+
+
+def disable_artist_index() -> None:
+    """Turns off the local index of artists and closes its database
+
+    :None returns:
+    """
+    global _artist_index
+
+    old_index = _artist_index
+    _artist_index = None
+    if old_index != None:
+        old_index.close()
+
+
+def index_artist_records(records: list) -> None:
+    """Adds artist records from an api response to the local index, if it is on
+
+    :list records: MusicBrainz artist records
+    :None returns:
+    """
+    artist_index = _artist_index
+    if artist_index != None and records:
+        artist_index.add_artists(records)
+
+
+def get_only_indexed_artist(artist_name: str) -> dict:
+    """Gets the indexed artist with the given name, if it is the only one.
+        Searching the api is then unnecessary as it would pick the same artist
+
+    :str artist_name: Name of the artist
+    :dict returns: MusicBrainz artist record, or None
+    """
+    artist_index = _artist_index
+    if artist_index == None:
+        return None
+    records = artist_index.find_exact(artist_name)
+    return records[0] if len(records) == 1 else None
+
+
+def search_artist_index(artist_name: str, number_of_results: int = 10) -> dict:
+    """Searches the local index of artists, without any api request
+
+    :str artist_name: Name of artist searched for
+    :int number_of_results: Maximum number of artists returned
+    :dict returns: Dict shaped like an api search response, or None if no indexed
+                   artist has a name starting with artist_name
+    """
+    artist_index = _artist_index
+    if artist_index == None:
+        return None
+    records = artist_index.search(artist_name, number_of_results)
+    normalised_name = normalise_name(artist_name)
+    # Names that only look alike might be typos, so the api is asked instead
+    if records == [] or not any(
+        normalise_name(name).startswith(normalised_name)
+        for name in get_record_names(records[0])
+    ):
+        return None
+    return {"artists": records}
 
 
 def get_artist_response(artist_name: str) -> dict:
@@ -13,6 +150,7 @@ def get_artist_response(artist_name: str) -> dict:
     try:
         response_dict = api_caller.get_artist_list_from_name(artist_name)
         if response_dict["artists"] != []:
+            index_artist_records(response_dict["artists"])
             return response_dict
         else:
             raise BreakLoopError("No artists found...")
@@ -65,76 +203,562 @@ def get_artist_display_name_by_index(response_dict: dict, index_of_artist: int)
         raise BreakLoopError("Chosen index not in range of artists available")
 
 
-def assign_artist_song_list(artist_: artist.Artist) -> None:
-    """Assigns a list of song names to artist using Artist MBID
+def is_mbid(value: str) -> bool:
+    """Checks whether a string is formatted like a MusicBrainz ID
+
+    :str value: string to check
+    :bool returns: True if value is an mbid
+    """
+    return _MBID_PATTERN.match(value.strip()) != None
+
+
+def resolve_artist(artist_name_or_mbid: str, use_index: bool = False) -> artist.Artist:
+    """Creates an artist from a name or mbid without asking the user to choose.
+        Names are resolved to the first (highest scoring) search result
+
+    :str artist_name_or_mbid: Name or mbid of the artist
+    :bool use_index: If True a name that only one indexed artist has is resolved
+                     to that artist without searching. The index depends on what
+                     was searched before, so the same name may then resolve to
+                     a different artist than the search would
+    :artist.Artist returns: Artist with name and mbid assigned
+    :raises BreakLoopError: if no artist could be found
+    """
+    artist_ = get_indexed_artist(artist_name_or_mbid, use_index)
+    if artist_ != None:
+        return artist_
+
+    try:
+        if is_mbid(artist_name_or_mbid):
+            response_dict = api_caller.get_artist_from_mbid(
+                artist_name_or_mbid.strip().lower()
+            )
+        else:
+            response_dict = api_caller.get_artist_list_from_name(artist_name_or_mbid)
+    except LookupError:
+        raise BreakLoopError("Api GET request failed...")
+    return create_resolved_artist(artist_name_or_mbid, response_dict)
+
+
+def get_indexed_artist(
+    artist_name_or_mbid: str, use_index: bool = False
+) -> artist.Artist:
+    """Creates the artist resolve_artist resolves a name to from the artist
+        index alone, when only one indexed artist has that name
+
+    :str artist_name_or_mbid: Name or mbid of the artist
+    :bool use_index: If False the index isn't used and None is returned
+    :artist.Artist returns: Artist with name and mbid assigned, or None
+    """
+    if not use_index or is_mbid(artist_name_or_mbid):
+        return None
+    indexed_record = get_only_indexed_artist(artist_name_or_mbid)
+    if indexed_record == None:
+        return None
+    artist_ = artist.Artist(indexed_record["name"])
+    artist_.mbid = indexed_record["id"]
+    return artist_
+
+
+def create_resolved_artist(
+    artist_name_or_mbid: str, response_dict: dict
+) -> artist.Artist:
+    """Creates the artist resolve_artist resolves a name or mbid to from the
+        api's response, and indexes the artists in it
+
+    :str artist_name_or_mbid: Name or mbid of the artist
+    :dict response_dict: the artist if given an mbid, otherwise the search results
+    :artist.Artist returns: Artist with name and mbid assigned
+    :raises BreakLoopError: if the response has no artist
+    """
+    if is_mbid(artist_name_or_mbid):
+        artist_mbid = artist_name_or_mbid.strip().lower()
+        try:
+            artist_display_name = response_dict["name"]
+        except KeyError:
+            raise BreakLoopError("Name of artist not found")
+        index_artist_records([dict(response_dict, id=artist_mbid)])
+    else:
+        if response_dict.get("artists") == []:
+            raise BreakLoopError("No artists found...")
+        index_artist_records(response_dict.get("artists"))
+        artist_mbid = get_artist_mbid_by_index(response_dict, 0)
+        artist_display_name = get_artist_display_name_by_index(response_dict, 0)
+
+    artist_ = artist.Artist(artist_display_name)
+    artist_.mbid = artist_mbid
+    return artist_
+
+
+def assign_artist_song_list(
+    artist_: artist.Artist,
+    max_workers: int = DEFAULT_PAGE_WORKERS,
+    song_source: SongSource = None,
+) -> None:
+    """Assigns a list of song names to artist using Artist MBID.
+        The first page gives the total count (e.g. "work-count") so the offsets
+        of the remaining pages are known up front and fetched concurrently,
+        unless the song source's pages can hold fewer than page_limit items.
+        If a page comes back short the pages after it are walked one at a time
+        from the items actually returned, so none are skipped
 
-    :str artist_mbid: The MBID of artist
+    :artist.Artist artist_: Artist object to assign the song list to
+    :int max_workers: Maximum number of concurrent page requests
+    :SongSource song_source: where the songs are listed, defaults to the
+                             one configured in song_sources
     :None returns:
     """
-    partial_song_list = None
-    offset = 0
-    while partial_song_list != []:
-        partial_song_list = get_partial_artist_song_list(artist_, offset)
-        artist_.song_list.extend(partial_song_list)
-        offset = len(artist_.song_list)
+    song_source = song_source if song_source != None else get_song_source()
+    # Songs are only added once every page has arrived, so a failed page
+    # doesn't leave a partial song list that a retry would add to again
+    first_response = song_source.get_page(artist_.mbid, 0)
+    song_list = song_source.get_songs(first_response, artist_.wordcount_accumulator)
 
+    item_count = song_source.get_count(first_response)
+    if item_count == None or not song_source.full_pages:
+        # Without a count, or when pages can come back short, the offsets can't
+        # be planned so we keep asking from the items each page returned
+        number_of_items = song_source.get_number_of_items(first_response)
+        if number_of_items > 0:
+            song_list.extend(
+                get_song_list_from_offset(
+                    artist_, number_of_items, song_source, item_count
+                )
+            )
+        artist_.add_songs(song_source.deduplicate(song_list))
+        return
+
+    offsets = range(0, item_count, song_source.page_limit)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # map returns the pages in offset order whatever order they finish in
+        responses = [first_response] + list(
+            executor.map(
+                lambda offset: song_source.get_page(artist_.mbid, offset),
+                offsets[1:],
+            )
+        )
+    for offset, response in zip(offsets, responses):
+        if offset > 0:
+            song_list.extend(
+                song_source.get_songs(response, artist_.wordcount_accumulator)
+            )
+        number_of_items = song_source.get_number_of_items(response)
+        if number_of_items < song_source.page_limit:
+            if offset + number_of_items < item_count:
+                # The offsets planned after a short page would skip items
+                song_list.extend(
+                    get_song_list_from_offset(
+                        artist_, offset + number_of_items, song_source, item_count
+                    )
+                )
+            break
+    artist_.add_songs(song_source.deduplicate(song_list))
 
-def get_partial_artist_song_list(artist_: artist.Artist, offset: int) -> list:
+
+def get_song_list_from_offset(
+    artist_: artist.Artist,
+    offset: int,
+    song_source: SongSource = None,
+    item_count: int = None,
+) -> list:
+    """Gets the artist's songs from offset a page at a time, each page starting
+        after the items the one before returned, until a page comes back empty
+        or item_count items have been listed
+
+    :artist.Artist artist_: Artist object
+    :int offset: number of items to skip
+    :SongSource song_source: where the songs are listed, defaults to the
+                             one configured in song_sources
+    :int item_count: total number of items the artist has, or None if unknown
+    :list returns: List of songs
+    """
+    song_source = song_source if song_source != None else get_song_source()
+    song_list = []
+    while item_count == None or offset < item_count:
+        response = song_source.get_page(artist_.mbid, offset)
+        number_of_items = song_source.get_number_of_items(response)
+        if number_of_items == 0:
+            break
+        song_list.extend(song_source.get_songs(response, artist_.wordcount_accumulator))
+        offset += number_of_items
+    return song_list
+
+
+def get_partial_artist_song_list(
+    artist_: artist.Artist, offset: int, song_source: SongSource = None
+) -> list:
     """Gets the partial list of artist songs (api returns a maximum of 100)
         so offset must by incremented to access all artists songs
 
     :artist.Artist artist_: Artist object
     :int offset: number of songs to offset the api call by
+    :SongSource song_source: where the songs are listed, defaults to the
+                             one configured in song_sources
     :list returns: List of songs
     :raises BreakLoopError: if response has no "works" attribute
     """
-    response = api_caller.get_songs_from_artist_mbid(artist_.mbid, offset)
+    song_source = song_source if song_source != None else get_song_source()
+    response = song_source.get_page(artist_.mbid, offset)
+    return song_source.get_songs(response, artist_.wordcount_accumulator)
+
 
+def get_song_list_from_works_response(
+    response: dict, accumulator: WordcountAccumulator = None
+) -> list:
+    """Gets the list of songs from a page of MusicBrainz works
+
+    :dict response: response from the works api as dictionary
+    :WordcountAccumulator accumulator: accumulator the songs add their wordcount to
+    :list returns: List of songs
+    :raises BreakLoopError: if response has no "works" attribute
+    """
+    return song_sources.SONG_SOURCES["works"].get_songs(response, accumulator)
+
+
+def normalise_title(title: str) -> str:
+    """Normalises a song title so versions of the same song compare equal.
+        Version suffixes, punctuation, case and extra spaces are removed
+
+    :str title: Title of the song
+    :str returns: Normalised title
+    """
+    original_title = title
+    previous_title = None
+    while previous_title != title:
+        previous_title = title
+        title = _VERSION_SUFFIX_PATTERN.sub("", title)
+
+    normalised_title = " ".join(_PUNCTUATION_PATTERN.sub("", title).lower().split())
+    # A title that is nothing but a version marker, e.g. "(Live)", is kept whole
+    # so it doesn't share the empty title with every other such song
+    return (
+        normalised_title
+        if normalised_title
+        else " ".join(original_title.lower().split())
+    )
+
+
+def group_songs_by_title(song_list: list) -> dict:
+    """Groups songs by their normalised title, keeping the order of first appearance
+
+    :list song_list: List of songs
+    :dict returns: Dictionary of normalised title to list of songs with that title
+    """
+    title_groups = {}
+    for song_ in song_list:
+        title_groups.setdefault(normalise_title(song_.title), []).append(song_)
+    return title_groups
+
+
+def assign_lyrics_to_song(
+    artist_name: str, song_: song.Song, retain_lyrics: bool = True
+) -> bool:
+    """Requests the lyrics of a single song and assigns them to it
+
+    :str artist_name: Name of the artist used to query the lyrics api
+    :song.Song song_: Song to assign the lyrics to
+    :bool retain_lyrics: If False only the wordcount is kept on the song
+    :bool returns: True if the song now has a wordcount
+    :raises NotFoundError: if the lyrics provider has no lyrics for the song
+    """
     try:
-        if response["works"] != []:
-            song_list_from_works = [
-                song.Song(work["title"]) for work in response["works"]
-            ]
-            return song_list_from_works
-        else:
-            return []
-    except KeyError:
-        raise BreakLoopError("Response has no works attribute")
+        response = get_lyrics_provider().get_lyrics(artist_name, song_.title)
+    except NotFoundError:
+        raise
+    except LookupError:
+        return False
+
+    song_.assign_lyrics(response["lyrics"], retain_lyrics)
+    return song_.has_wordcount
+
+
+def get_representative_song(song_group: list) -> song.Song:
+    """Gets the song whose title is used to request the lyrics of a group,
+        the shortest title is the one least likely to carry a version suffix
+
+    :list song_group: Songs sharing a normalised title
+    :song.Song returns: Representative song of the group
+    """
+    return min(song_group, key=lambda song_: len(song_.title))
+
 
+def assign_lyrics_to_song_group(
+    artist_name: str, song_group: list, retain_lyrics: bool = True
+) -> bool:
+    """Requests the lyrics of a group of versions of the same song once and
+        assigns them to every song in the group
+
+    :str artist_name: Name of the artist used to query the lyrics api
+    :list song_group: Songs sharing a normalised title
+    :bool retain_lyrics: If False only the wordcount is kept on the songs
+    :bool returns: True if the songs now have a wordcount
+    :raises NotFoundError: if the lyrics provider has no lyrics for the songs
+    """
+    representative_song = get_representative_song(song_group)
+    if not assign_lyrics_to_song(artist_name, representative_song, retain_lyrics):
+        return False
+
+    share_lyrics_with_song_group(representative_song, song_group, retain_lyrics)
+    return True
+
+
+def share_lyrics_with_song_group(
+    representative_song: song.Song, song_group: list, retain_lyrics: bool = True
+) -> None:
+    """Copies the lyrics and wordcount of the representative song to the rest of its group
+
+    :song.Song representative_song: Song the lyrics were requested for
+    :list song_group: Songs sharing a normalised title
+    :bool retain_lyrics: If False only the wordcount is kept on the songs
+    :None returns:
+    """
+    for song_ in song_group:
+        if song_ is not representative_song:
+            if retain_lyrics:
+                song_.lyrics = representative_song.lyrics
+            song_.assign_wordcount(representative_song.wordcount)
 
-def assign_lyrics_to_songs(artist_: artist.Artist) -> None:
+
+def get_title_groups(artist_: artist.Artist, count_titles_once: bool = False) -> dict:
+    """Groups the songs of an artist that share a lyric request
+
+    :artist.Artist artist_: Artist whose songs are grouped
+    :bool count_titles_once: If True only one version of each title is kept
+                             in artist_.song_list, so it counts once in the statistics
+    :dict returns: Dictionary of normalised title to list of songs
+    """
+    title_groups = group_songs_by_title(artist_.song_list)
+    if count_titles_once:
+        title_groups = {
+            title: [get_representative_song(song_group)]
+            for title, song_group in title_groups.items()
+        }
+        artist_.song_list = [song_group[0] for song_group in title_groups.values()]
+    return title_groups
+
+
+def get_pending_title_groups(title_groups: dict, retain_lyrics: bool = True) -> dict:
+    """Leaves out the groups of songs that already have a wordcount. Songs
+        without one in such a group are given the wordcount of another version
+
+    :dict title_groups: Dictionary of normalised title to list of songs
+    :bool retain_lyrics: If False only the wordcount is shared
+    :dict returns: Dictionary of the groups whose lyrics still need requesting
+    """
+    pending_title_groups = {}
+    for title, song_group in title_groups.items():
+        counted_song = next(
+            (song_ for song_ in song_group if song_.has_wordcount), None
+        )
+        if counted_song == None:
+            pending_title_groups[title] = song_group
+        elif not all(song_.has_wordcount for song_ in song_group):
+            share_lyrics_with_song_group(counted_song, song_group, retain_lyrics)
+    return pending_title_groups
+
+
+def assign_lyrics_to_songs(
+    artist_: artist.Artist,
+    max_workers: int = DEFAULT_LYRIC_WORKERS,
+    count_titles_once: bool = False,
+    retain_lyrics: bool = True,
+    progress: ProgressDisplay = None,
+    on_song_group_done=None,
+    stop_event: threading.Event = None,
+) -> int:
     """ "Assigns Lyrics to each song in artist_.song_list
 
+    Songs are grouped by normalised title first so only one lyric request is
+    sent per distinct song. Requests are sent from a pool of max_workers
+    threads, so at most max_workers lyric requests are in flight at any one time.
+    Failed requests are counted in artist_.missing_lyrics if lyrics.ovh has no
+    lyrics for the song, otherwise in artist_.lyric_errors.
+    Songs that already have a wordcount, e.g. from an interrupted run, aren't
+    requested again.
+
     :artist.Artist artist_: Artist object to assigns lyrics to songs
-    :None returns:
+    :int max_workers: Maximum number of concurrent lyric requests
+    :bool count_titles_once: If True only one version of each title is kept
+                             in artist_.song_list, so it counts once in the statistics
+    :bool retain_lyrics: If False the lyrics are dropped once they are counted,
+                         only the wordcounts are needed for the statistics
+    :ProgressDisplay progress: Display updated as requests complete,
+                               defaults to one printing to stdout
+    :function on_song_group_done: called with each list of songs given a
+                                  wordcount, as soon as it has one
+    :threading.Event stop_event: once set no more lyric requests are sent,
+                                 those already sent are left to finish
+    :int returns: Number of failed lyric requests
     """
+    title_groups = get_pending_title_groups(
+        get_title_groups(artist_, count_titles_once), retain_lyrics
+    )
+    return assign_lyrics_to_title_groups(
+        artist_,
+        title_groups,
+        max_workers,
+        retain_lyrics,
+        progress,
+        on_song_group_done,
+        stop_event,
+    )
+
+
+def assign_lyrics_to_title_groups(
+    artist_: artist.Artist,
+    title_groups: dict,
+    max_workers: int = DEFAULT_LYRIC_WORKERS,
+    retain_lyrics: bool = True,
+    progress: ProgressDisplay = None,
+    on_song_group_done=None,
+    stop_event: threading.Event = None,
+) -> int:
+    """Requests the lyrics of each group of songs, see assign_lyrics_to_songs
 
-    number_of_failed_requests = 0
-    total_number_of_songs = len(artist_.song_list)
-    max_number_of_loading_sections = 10
-    loading_sections = total_number_of_songs // max_number_of_loading_sections
+    :artist.Artist artist_: Artist the songs belong to
+    :dict title_groups: Dictionary of normalised title to list of songs
+    :int max_workers: Maximum number of concurrent lyric requests
+    :bool retain_lyrics: If False only the wordcounts are kept on the songs
+    :ProgressDisplay progress: Display updated as requests complete,
+                               defaults to one printing to stdout
+    :function on_song_group_done: called with each list of songs given a
+                                  wordcount, as soon as it has one
+    :threading.Event stop_event: once set no more lyric requests are sent,
+                                 those already sent are left to finish
+    :int returns: Number of failed lyric requests
+    """
+    artist_.missing_lyrics = 0
+    artist_.lyric_errors = 0
+    progress = progress if progress != None else ProgressDisplay()
 
     # I dont like having print functions in here, however I thought
     # it a good idea to have a visual representation of progress for the user
-    # max_number_of_loading_sections #'s will always be printed
-    print("Loading Lyrics data...")
-    print("[", end="")
-    for index, song in enumerate(artist_.song_list):
-        # Prints every max_number_of_loading_sections songs
-        if loading_sections != 0 and index % loading_sections == 0:
-            print("#", end="")
+    if progress.stream != None:
+        print("Loading Lyrics data...", file=progress.stream)
+    progress.start(len(title_groups), artist_.wordcount_accumulator)
+    # This could run async_artist_logic in an event loop of its own, pool threads
+    # have no running loop. Each call would then start a loop and an aiohttp
+    # session, losing its connections when it ends, and the session is shared
+    # by one loop at a time so concurrent batch jobs would keep replacing it.
+    # The threads reuse api_caller's pooled requests session instead
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(
+                assign_lyrics_to_song_group, artist_.name, song_group, retain_lyrics
+            ): song_group
+            for song_group in title_groups.values()
+        }
+        # Progress is counted in completed requests rather than list position
+        # as the songs no longer finish in the order they were submitted
+        for future in as_completed(futures):
+            succeeded = count_lyric_request(artist_, future.result)
+            progress.update(succeeded)
+            if succeeded and on_song_group_done != None:
+                on_song_group_done(futures[future])
+            if stop_event != None and stop_event.is_set():
+                # Only the requests that haven't started can be called off
+                for future in futures:
+                    future.cancel()
+                break
 
-        try:
-            response = api_caller.get_lyrics_from_artist_name_and_title(
-                artist_.name, song.title
-            )
-        except LookupError:
-            number_of_failed_requests += 1
+    progress.finish()
+    return artist_.missing_lyrics + artist_.lyric_errors
+
+
+def count_lyric_request(artist_: artist.Artist, get_result) -> bool:
+    """Counts a finished lyric request in the missing lyrics or errors of the artist
+
+    :artist.Artist artist_: Artist the lyrics were requested for
+    :function get_result: returns whether the request succeeded, raising
+                          NotFoundError if there were no lyrics
+    :bool returns: True if the request succeeded
+    """
+    try:
+        succeeded = get_result()
+    except NotFoundError:
+        artist_.missing_lyrics += 1
+        return False
+    artist_.lyric_errors += 0 if succeeded else 1
+    return succeeded
+
+
+def sync_artist_song_list(artist_: artist.Artist) -> list:
+    """Fetches the works of an artist again and updates artist_.song_list in place.
+        Songs whose work id and title are unchanged keep their wordcount, removed
+        works have their wordcount taken out of the artist's accumulator
+
+    :artist.Artist artist_: Artist with an mbid and a previously fetched song list
+    :list returns: List of the songs that are new or whose title changed,
+                   these have no wordcount yet
+    """
+    current_artist = artist.Artist(artist_.name)
+    current_artist.mbid = artist_.mbid
+    assign_artist_song_list(current_artist)
+
+    stored_songs = {
+        song_.work_id: song_ for song_ in artist_.song_list if song_.work_id != None
+    }
+    removed_songs = [song_ for song_ in artist_.song_list if song_.work_id == None]
+    song_list = []
+    changed_songs = []
+    for current_song in current_artist.song_list:
+        stored_song = stored_songs.pop(current_song.work_id, None)
+        if stored_song != None and stored_song.title == current_song.title:
+            song_list.append(stored_song)
             continue
+        if stored_song != None:
+            removed_songs.append(stored_song)
+        current_song.accumulator = artist_.wordcount_accumulator
+        song_list.append(current_song)
+        changed_songs.append(current_song)
+    removed_songs.extend(stored_songs.values())
+
+    accumulator = artist_.wordcount_accumulator
+    extremes_removed = False
+    for song_ in removed_songs:
+        if song_.has_wordcount:
+            accumulator.remove(song_.wordcount)
+            extremes_removed |= song_.wordcount in (
+                accumulator.minimum,
+                accumulator.maximum,
+            )
+    artist_.song_list = song_list
+    if extremes_removed:
+        accumulator.recalculate_extremes(artist_.get_wordcounts())
+    return changed_songs
+
 
-        song.assign_lyrics(response["lyrics"])
-        number_of_failed_requests += 0 if song.has_wordcount else 1
-    if loading_sections == 0:
-        print("#" * max_number_of_loading_sections, end="")
-    print("] = Completed")
-    return number_of_failed_requests
+def refresh_artist(
+    artist_: artist.Artist,
+    max_workers: int = DEFAULT_LYRIC_WORKERS,
+    retain_lyrics: bool = True,
+    progress: ProgressDisplay = None,
+) -> int:
+    """Brings a previously processed artist up to date. Lyrics are only requested
+        for new or changed works, and not even for those when another version of
+        the song already has a wordcount
+
+    :artist.Artist artist_: Artist with an mbid and a previously fetched song list
+    :int max_workers: Maximum number of concurrent lyric requests
+    :bool retain_lyrics: If False only the wordcounts are kept on the songs
+    :ProgressDisplay progress: Display updated as requests complete,
+                               defaults to one printing to stdout
+    :int returns: Number of failed lyric requests
+    """
+    changed_songs = sync_artist_song_list(artist_)
+    changed_song_ids = set(map(id, changed_songs))
+    counted_songs = {}
+    for song_ in artist_.song_list:
+        if song_.has_wordcount and id(song_) not in changed_song_ids:
+            counted_songs.setdefault(normalise_title(song_.title), song_)
+
+    title_groups = {}
+    for title, song_group in group_songs_by_title(changed_songs).items():
+        counted_song = counted_songs.get(title)
+        if counted_song != None:
+            share_lyrics_with_song_group(counted_song, song_group, retain_lyrics)
+        else:
+            title_groups[title] = song_group
+    return assign_lyrics_to_title_groups(
+        artist_, title_groups, max_workers, retain_lyrics, progress
+    )
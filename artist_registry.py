@@ -0,0 +1,177 @@
+import threading
+from array import array
+from collections import OrderedDict
+import artist
+import statistics_engine
+
+# Artists kept whole, with their song lists, before the least recently used
+# are compacted into an ArtistSummary
+DEFAULT_MAX_FULL_ARTISTS = 8
+
+
+class ArtistSummary:
+    """What is left of an artist once it is compacted: its statistics and the
+    array of its wordcounts, a few bytes a song rather than a Song object each.
+    """
+
+    __slots__ = (
+        "name",
+        "mbid",
+        "statistics",
+        "wordcounts",
+        "fetched_at",
+        "missing_lyrics",
+        "lyric_errors",
+    )
+
+    def __init__(self, artist_: artist.Artist):
+        self.name = artist_.name
+        self.mbid = artist_.mbid
+        self.statistics = artist_.statistics
+        self.wordcounts = artist_.get_wordcounts()
+        self.fetched_at = artist_.fetched_at
+        self.missing_lyrics = artist_.missing_lyrics
+        self.lyric_errors = artist_.lyric_errors
+
+    def has_statistics(self) -> bool:
+        """Does the artist have statistics? Only artists with them are compacted
+
+        :bool returns: True if summary.statistics != None
+        """
+        return self.statistics != None
+
+    def get_wordcounts(self) -> array:
+        """Gets the wordcounts of the artist's songs that have one
+
+        :array returns: array("I") of wordcounts
+        """
+        return self.wordcounts
+
+    def get_artist_statistics(self, detailed: bool = False) -> dict:
+        """Same as Artist.get_artist_statistics, from the kept wordcounts
+
+        :bool detailed: If True the median, percentiles, IQR and a histogram are added
+        :dict returns: Dictionary of statistics
+        """
+        if detailed:
+            self.statistics = statistics_engine.get_statistics(self.wordcounts)
+        return self.statistics
+
+
+class ArtistRegistry:
+    """Artists of a session keyed by mbid, in the order they were added.
+
+    Only the max_full_artists most recently used artists keep their song
+    lists, the rest are compacted into an ArtistSummary so a session can hold
+    thousands of artists. Artists are handed back from background jobs on
+    their threads, so every change is made under a lock.
+    """
+
+    def __init__(self, max_full_artists: int = DEFAULT_MAX_FULL_ARTISTS):
+        self.max_full_artists = max_full_artists
+        self._artists = {}
+        # mbids of the whole artists, least recently used first
+        self._full_mbids = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._artists)
+
+    def __contains__(self, mbid: str) -> bool:
+        return mbid in self._artists
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._artists.values()))
+
+    def add(self, artist_: artist.Artist) -> bool:
+        """Adds an artist unless one with the same mbid is already registered
+
+        :artist.Artist artist_: Artist with an mbid
+        :bool returns: True if the artist was added
+        """
+        with self._lock:
+            if artist_.mbid in self._artists:
+                return False
+            self._artists[artist_.mbid] = artist_
+            self._use(artist_)
+            return True
+
+    def replace(self, artist_: artist.Artist) -> None:
+        """Registers an artist in place of the one with the same mbid,
+            e.g. after expanding a summary back into a whole artist
+
+        :artist.Artist artist_: Artist with an mbid
+        :None returns:
+        """
+        with self._lock:
+            self._artists[artist_.mbid] = artist_
+            self._use(artist_)
+
+    def get(self, mbid: str):
+        """Gets an artist by mbid, marking it as recently used
+
+        :str mbid: mbid of the artist
+        :returns: The Artist or ArtistSummary, or None if it isn't registered
+        """
+        with self._lock:
+            entry = self._artists.get(mbid)
+            if entry != None:
+                self._use(entry)
+            return entry
+
+    def get_by_position(self, position: int):
+        """Gets an artist by its position in the order artists were added
+
+        :int position: 0 based position
+        :returns: The Artist or ArtistSummary
+        :raises IndexError: if there is no artist at that position
+        """
+        return self.get(list(self._artists)[position])
+
+    def remove(self, mbid: str):
+        """Removes an artist
+
+        :str mbid: mbid of the artist
+        :returns: The removed Artist or ArtistSummary, or None if it wasn't registered
+        """
+        with self._lock:
+            self._full_mbids.pop(mbid, None)
+            return self._artists.pop(mbid, None)
+
+    def compact(self, mbid: str) -> bool:
+        """Replaces a whole artist with its summary, if it has statistics
+
+        :str mbid: mbid of the artist
+        :bool returns: True if the artist was compacted
+        """
+        with self._lock:
+            entry = self._artists.get(mbid)
+            if not isinstance(entry, artist.Artist) or not entry.has_statistics():
+                return False
+            self._artists[mbid] = ArtistSummary(entry)
+            self._full_mbids.pop(mbid, None)
+            return True
+
+    def compact_excess(self, kept_mbid: str = None) -> None:
+        """Compacts the least recently used whole artists with statistics until
+            only max_full_artists are whole, e.g. once an artist kept whole
+            while it was fetched has its statistics
+
+        :str kept_mbid: mbid of an artist that is never compacted
+        :None returns:
+        """
+        with self._lock:
+            # Artists still being fetched have no statistics yet and are kept whole
+            for mbid in list(self._full_mbids):
+                if len(self._full_mbids) <= self.max_full_artists:
+                    break
+                if mbid != kept_mbid:
+                    self.compact(mbid)
+
+    def _use(self, entry) -> None:
+        if not isinstance(entry, artist.Artist):
+            return
+        self._full_mbids[entry.mbid] = None
+        self._full_mbids.move_to_end(entry.mbid)
+        self.compact_excess(entry.mbid)
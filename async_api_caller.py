@@ -0,0 +1,259 @@
+import asyncio
+import json
+import time
+import api_caller
+from response_cache import normalize_url
+
+try:
+    import aiohttp
+except ImportError:
+    # Without aiohttp each request runs the blocking api_caller in a thread,
+    # it still works but doesn't get the extra concurrency
+    aiohttp = None
+
+# Maximum number of open connections across every host
+DEFAULT_CONNECTION_LIMIT = 100
+
+_session = None
+_session_loop = None
+_connection_limit = DEFAULT_CONNECTION_LIMIT
+# Task of every request being sent and the number of callers waiting on it,
+# by normalized url, see api_caller._fetch_json
+_in_flight = {}
+
+
+def configure_session(connection_limit: int = DEFAULT_CONNECTION_LIMIT) -> None:
+    """Sets the connection limit of the session shared by the async api calls.
+        The session is created on first use in each event loop, timeouts are
+        shared with api_caller.configure_session
+
+    :int connection_limit: Maximum number of open connections across every host
+    :None returns:
+    """
+    global _connection_limit
+
+    _connection_limit = connection_limit
+
+
+async def get_session():
+    """Gets the aiohttp session of the running event loop, creating it if needed
+
+    :aiohttp.ClientSession returns: The shared session
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session == None or _session.closed or _session_loop is not loop:
+        connect_timeout, read_timeout = api_caller.get_timeout()
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=_connection_limit),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=connect_timeout, sock_read=read_timeout
+            ),
+            headers={"User-Agent": api_caller.USER_AGENT},
+        )
+        _session_loop = loop
+    return _session
+
+
+async def close_session() -> None:
+    """Closes the session of the running event loop and its connections
+
+    :None returns:
+    """
+    global _session
+
+    if _session != None and _session_loop is asyncio.get_running_loop():
+        await _session.close()
+    _session = None
+
+
+async def _get(url: str, endpoint: str = "other") -> tuple:
+    """Sends a GET request without blocking the event loop. Rate limits, retries
+        and metrics are shared with the blocking api_caller
+
+    :str url: url to request
+    :str endpoint: name of the endpoint the metrics are recorded under
+    :tuple returns: status code and body of the response
+    :raises LookupError: if the request could not be completed (e.g. timeout)
+    """
+    if aiohttp == None:
+        response = await asyncio.to_thread(api_caller.get_response, url, endpoint)
+        return response.status_code, response.content
+
+    rate_limiter = api_caller.get_rate_limiter(url)
+    session = await get_session()
+
+    for attempt in range(api_caller.MAX_RETRIES + 1):
+        if rate_limiter != None:
+            await asyncio.sleep(rate_limiter.reserve())
+        started_at = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            api_caller.metrics.record(
+                endpoint, "error", 0, time.perf_counter() - started_at
+            )
+            raise LookupError("Request failed: {}".format(err))
+        api_caller.metrics.record(
+            endpoint, str(response.status), len(body), time.perf_counter() - started_at
+        )
+
+        if response.status not in api_caller.THROTTLED_STATUS_CODES:
+            if rate_limiter != None:
+                rate_limiter.on_success()
+            return response.status, body
+        if attempt == api_caller.MAX_RETRIES:
+            return response.status, body
+
+        delay = api_caller.get_retry_delay(response, attempt)
+        if rate_limiter != None:
+            rate_limiter.penalize(delay)
+        else:
+            await asyncio.sleep(delay)
+
+
+async def _fetch_json(url: str, endpoint: str, coalesce: bool = True) -> dict:
+    """Gets the response body of a url, from the response cache if it has been stored.
+        If the same url is already being requested in this event loop this
+        waits for that response rather than sending the request again
+
+    :str url: url to request
+    :str endpoint: name of the endpoint, used by the cache for its ttl
+    :bool coalesce: If False the request is sent even if the same url is
+                    already being requested, e.g. to hedge a slow request
+    :dict returns: response from api as dictionary
+    :raises NotFoundError: if the api has nothing at the url, including cached 404s
+    :raises LookupError: if api status_code >= 400
+    """
+    cached_body = api_caller.get_cached_body(url, endpoint)
+    if cached_body != None:
+        return cached_body
+
+    if not coalesce:
+        return await _fetch_uncached_json(url, endpoint)
+
+    key = normalize_url(url)
+    in_flight_request = _in_flight.get(key)
+    if in_flight_request != None and (
+        in_flight_request[0].get_loop() is asyncio.get_running_loop()
+    ):
+        api_caller.metrics.record_coalesced(endpoint)
+    else:
+        request = asyncio.ensure_future(_fetch_uncached_json(url, endpoint))
+        in_flight_request = [request, 0]
+        _in_flight[key] = in_flight_request
+        request.add_done_callback(
+            lambda _: _finish_in_flight_request(key, in_flight_request)
+        )
+    return await _wait_for_request(in_flight_request)
+
+
+async def _wait_for_request(in_flight_request: list) -> dict:
+    request = in_flight_request[0]
+    in_flight_request[1] += 1
+    try:
+        # Shielded so one caller being cancelled doesn't cancel the others waiting
+        return await asyncio.shield(request)
+    finally:
+        in_flight_request[1] -= 1
+        if in_flight_request[1] == 0 and not request.done():
+            request.cancel()
+
+
+def _finish_in_flight_request(key: str, in_flight_request: list) -> None:
+    if _in_flight.get(key) is in_flight_request:
+        del _in_flight[key]
+
+
+async def _fetch_uncached_json(url: str, endpoint: str) -> dict:
+    cache = api_caller.get_cache()
+    status_code, body = await _get(url, endpoint)
+    if status_code >= 400:
+        api_caller.check_not_found(url, endpoint, status_code, None)
+        raise LookupError("Server error with status code {}".format(status_code))
+    response_dict = json.loads(body)
+    api_caller.check_not_found(url, endpoint, status_code, response_dict)
+    if cache != None:
+        cache.set(url, endpoint, response_dict)
+    return response_dict
+
+
+async def get_artist_list_from_name(name: str) -> dict:
+    """Async version of api_caller.get_artist_list_from_name
+
+    :str name: name of artist
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return await _fetch_json(api_caller.build_artist_list_url(name), "artist")
+
+
+async def get_artist_from_mbid(artist_mbid: str) -> dict:
+    """Async version of api_caller.get_artist_from_mbid
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return await _fetch_json(api_caller.build_artist_url(artist_mbid), "artist")
+
+
+async def get_songs_from_artist_mbid(artist_mbid: str, api_song_offset: int) -> dict:
+    """Async version of api_caller.get_songs_from_artist_mbid
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: 100 maximum results returnable. Offset used to access more api results.
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return await _fetch_json(
+        api_caller.build_songs_url(artist_mbid, api_song_offset), "works"
+    )
+
+
+async def get_recordings_from_artist_mbid(
+    artist_mbid: str, api_song_offset: int
+) -> dict:
+    """Async version of api_caller.get_recordings_from_artist_mbid
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: Offset used to access more api results
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return await _fetch_json(
+        api_caller.build_recordings_url(artist_mbid, api_song_offset), "recordings"
+    )
+
+
+async def get_releases_from_artist_mbid(artist_mbid: str, api_song_offset: int) -> dict:
+    """Async version of api_caller.get_releases_from_artist_mbid
+
+    :str artist_mbid: mbid (uniqiue MusicBrainz ID) of artist
+    :int api_song_offset: Offset used to access more api results
+    :dict returns: response from api as dictionary
+    :raises LookupError: if api status_code >= 400
+    """
+    return await _fetch_json(
+        api_caller.build_releases_url(artist_mbid, api_song_offset), "releases"
+    )
+
+
+async def get_lyrics_from_artist_name_and_title(
+    artist_name: str, song_title: str, coalesce: bool = True
+) -> dict:
+    """Async version of api_caller.get_lyrics_from_artist_name_and_title
+
+    :str artist_name: Name of artist
+    :str song_title: Name of song
+    :bool coalesce: If False the request is sent even if the same song is
+                    already being requested
+    :dict returns: dictionary containing lyrics of requested song
+    :raises NotFoundError: if lyrics.ovh has no lyrics for the song
+    :raises LookupError: if api status_code >= 400
+    """
+    return await _fetch_json(
+        api_caller.build_lyrics_url(artist_name, song_title), "lyrics", coalesce
+    )
@@ -0,0 +1,252 @@
+import asyncio
+import artist
+import artist_logic as al
+import async_api_caller
+import song
+from custom_exceptions import BreakLoopError, NotFoundError
+from lyrics_providers import get_lyrics_provider
+from progress_display import ProgressDisplay
+from song_sources import SongSource, get_song_source
+
+# A coroutine waiting on a response costs far less than a thread,
+# so many more lyric requests can be in flight at once
+DEFAULT_LYRIC_CONCURRENCY = 64
+
+
+async def resolve_artist(
+    artist_name_or_mbid: str, use_index: bool = False
+) -> artist.Artist:
+    """Async version of artist_logic.resolve_artist
+
+    :str artist_name_or_mbid: Name or mbid of the artist
+    :bool use_index: If True a name that only one indexed artist has is resolved
+                     to that artist without searching
+    :artist.Artist returns: Artist with name and mbid assigned
+    :raises BreakLoopError: if no artist could be found
+    """
+    artist_ = al.get_indexed_artist(artist_name_or_mbid, use_index)
+    if artist_ != None:
+        return artist_
+
+    try:
+        if al.is_mbid(artist_name_or_mbid):
+            response_dict = await async_api_caller.get_artist_from_mbid(
+                artist_name_or_mbid.strip().lower()
+            )
+        else:
+            response_dict = await async_api_caller.get_artist_list_from_name(
+                artist_name_or_mbid
+            )
+    except LookupError:
+        raise BreakLoopError("Api GET request failed...")
+    return al.create_resolved_artist(artist_name_or_mbid, response_dict)
+
+
+async def assign_artist_song_list(
+    artist_: artist.Artist, song_source: SongSource = None
+) -> None:
+    """Async version of artist_logic.assign_artist_song_list, the remaining
+        pages are all requested at once after the first. If a page comes back
+        short the pages after it are walked one at a time instead
+
+    :artist.Artist artist_: Artist object to assign the song list to
+    :SongSource song_source: where the songs are listed, defaults to the
+                             one configured in song_sources
+    :None returns:
+    """
+    song_source = song_source if song_source != None else get_song_source()
+    first_response = await song_source.get_page_async(artist_.mbid, 0)
+    song_list = song_source.get_songs(first_response, artist_.wordcount_accumulator)
+
+    item_count = song_source.get_count(first_response)
+    if item_count == None or not song_source.full_pages:
+        # Without a count, or when pages can come back short, the offsets can't
+        # be planned so we keep asking from the items each page returned
+        number_of_items = song_source.get_number_of_items(first_response)
+        if number_of_items > 0:
+            song_list.extend(
+                await get_song_list_from_offset(
+                    artist_, number_of_items, song_source, item_count
+                )
+            )
+        artist_.add_songs(song_source.deduplicate(song_list))
+        return
+
+    offsets = range(0, item_count, song_source.page_limit)
+    # gather returns the pages in offset order whatever order they finish in
+    responses = [first_response] + list(
+        await asyncio.gather(
+            *(
+                song_source.get_page_async(artist_.mbid, offset)
+                for offset in offsets[1:]
+            )
+        )
+    )
+    for offset, response in zip(offsets, responses):
+        if offset > 0:
+            song_list.extend(
+                song_source.get_songs(response, artist_.wordcount_accumulator)
+            )
+        number_of_items = song_source.get_number_of_items(response)
+        if number_of_items < song_source.page_limit:
+            if offset + number_of_items < item_count:
+                # The offsets planned after a short page would skip items
+                song_list.extend(
+                    await get_song_list_from_offset(
+                        artist_, offset + number_of_items, song_source, item_count
+                    )
+                )
+            break
+    artist_.add_songs(song_source.deduplicate(song_list))
+
+
+async def get_song_list_from_offset(
+    artist_: artist.Artist,
+    offset: int,
+    song_source: SongSource = None,
+    item_count: int = None,
+) -> list:
+    """Async version of artist_logic.get_song_list_from_offset
+
+    :artist.Artist artist_: Artist object
+    :int offset: number of items to skip
+    :SongSource song_source: where the songs are listed, defaults to the
+                             one configured in song_sources
+    :int item_count: total number of items the artist has, or None if unknown
+    :list returns: List of songs
+    """
+    song_source = song_source if song_source != None else get_song_source()
+    song_list = []
+    while item_count == None or offset < item_count:
+        response = await song_source.get_page_async(artist_.mbid, offset)
+        number_of_items = song_source.get_number_of_items(response)
+        if number_of_items == 0:
+            break
+        song_list.extend(song_source.get_songs(response, artist_.wordcount_accumulator))
+        offset += number_of_items
+    return song_list
+
+
+async def get_partial_artist_song_list(
+    artist_: artist.Artist, offset: int, song_source: SongSource = None
+) -> list:
+    """Async version of artist_logic.get_partial_artist_song_list
+
+    :artist.Artist artist_: Artist object
+    :int offset: number of songs to offset the api call by
+    :SongSource song_source: where the songs are listed, defaults to the
+                             one configured in song_sources
+    :list returns: List of songs
+    :raises BreakLoopError: if response has no "works" attribute
+    """
+    song_source = song_source if song_source != None else get_song_source()
+    response = await song_source.get_page_async(artist_.mbid, offset)
+    return song_source.get_songs(response, artist_.wordcount_accumulator)
+
+
+async def assign_lyrics_to_song(
+    artist_name: str, song_: song.Song, retain_lyrics: bool = True
+) -> bool:
+    """Async version of artist_logic.assign_lyrics_to_song
+
+    :str artist_name: Name of the artist used to query the lyrics api
+    :song.Song song_: Song to assign the lyrics to
+    :bool retain_lyrics: If False only the wordcount is kept on the song
+    :bool returns: True if the song now has a wordcount
+    :raises NotFoundError: if the lyrics provider has no lyrics for the song
+    """
+    try:
+        response = await get_lyrics_provider().get_lyrics_async(
+            artist_name, song_.title
+        )
+    except NotFoundError:
+        raise
+    except LookupError:
+        return False
+
+    song_.assign_lyrics(response["lyrics"], retain_lyrics)
+    return song_.has_wordcount
+
+
+async def assign_lyrics_to_song_group(
+    artist_name: str, song_group: list, retain_lyrics: bool = True
+) -> bool:
+    """Async version of artist_logic.assign_lyrics_to_song_group
+
+    :str artist_name: Name of the artist used to query the lyrics api
+    :list song_group: Songs sharing a normalised title
+    :bool retain_lyrics: If False only the wordcount is kept on the songs
+    :bool returns: True if the songs now have a wordcount
+    :raises NotFoundError: if the lyrics provider has no lyrics for the songs
+    """
+    representative_song = al.get_representative_song(song_group)
+    if not await assign_lyrics_to_song(artist_name, representative_song, retain_lyrics):
+        return False
+
+    al.share_lyrics_with_song_group(representative_song, song_group, retain_lyrics)
+    return True
+
+
+async def assign_lyrics_to_songs(
+    artist_: artist.Artist,
+    max_concurrency: int = DEFAULT_LYRIC_CONCURRENCY,
+    count_titles_once: bool = False,
+    retain_lyrics: bool = True,
+    progress: ProgressDisplay = None,
+    on_song_group_done=None,
+) -> int:
+    """Async version of artist_logic.assign_lyrics_to_songs. At most
+        max_concurrency lyric requests are in flight at any one time, cancelling
+        this coroutine cancels every request still waiting or in flight
+
+    :artist.Artist artist_: Artist object to assigns lyrics to songs
+    :int max_concurrency: Maximum number of concurrent lyric requests
+    :bool count_titles_once: If True only one version of each title is kept
+                             in artist_.song_list, so it counts once in the statistics
+    :bool retain_lyrics: If False the lyrics are dropped once they are counted,
+                         only the wordcounts are needed for the statistics
+    :ProgressDisplay progress: Display updated as requests complete,
+                               defaults to one printing to stdout
+    :function on_song_group_done: called with each list of songs given a
+                                  wordcount, as soon as it has one
+    :int returns: Number of failed lyric requests
+    """
+    title_groups = al.get_pending_title_groups(
+        al.get_title_groups(artist_, count_titles_once), retain_lyrics
+    )
+    artist_.missing_lyrics = 0
+    artist_.lyric_errors = 0
+    progress = progress if progress != None else ProgressDisplay()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def assign_lyrics_when_free(song_group: list) -> bool:
+        async with semaphore:
+            return await assign_lyrics_to_song_group(
+                artist_.name, song_group, retain_lyrics
+            )
+
+    if progress.stream != None:
+        print("Loading Lyrics data...", file=progress.stream)
+    progress.start(len(title_groups), artist_.wordcount_accumulator)
+    tasks = {
+        asyncio.ensure_future(assign_lyrics_when_free(song_group)): song_group
+        for song_group in title_groups.values()
+    }
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                succeeded = al.count_lyric_request(artist_, task.result)
+                progress.update(succeeded)
+                if succeeded and on_song_group_done != None:
+                    on_song_group_done(tasks[task])
+    finally:
+        # Only does anything if we were cancelled or a request raised
+        for task in tasks:
+            task.cancel()
+
+    progress.finish()
+    return artist_.missing_lyrics + artist_.lyric_errors
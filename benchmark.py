@@ -0,0 +1,519 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+import api_caller
+import artist
+import artist_logic as al
+import async_api_caller
+import async_artist_logic as aal
+import lyrics_providers
+import main
+import song_sources
+from progress_display import ProgressDisplay
+from stub_server import STUB_ARTIST_MBID, STUB_ARTIST_NAME
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is left out of the results there
+    resource = None
+
+DEFAULT_RESULTS_PATH = "benchmark_results.jsonl"
+STUB_SERVER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "stub_server.py"
+)
+
+
+class StubServerProcess:
+    """Runs stub_server.py in a child process so serving requests doesn't
+    slow down the code being benchmarked
+    """
+
+    def __init__(self, stub_arguments: list):
+        self.stub_arguments = stub_arguments
+        self.url = None
+        self._process = None
+
+    def __enter__(self) -> "StubServerProcess":
+        self._process = subprocess.Popen(
+            [sys.executable, STUB_SERVER_PATH, *self.stub_arguments],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.url = self._process.stdout.readline().strip()
+        if not self.url:
+            self._process.kill()
+            raise RuntimeError("Stub server failed to start")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._process.terminate()
+        self._process.wait()
+
+    @property
+    def total_requests(self) -> int:
+        # Read straight from the stub so it isn't counted or cached by api_caller
+        with urllib.request.urlopen(self.url + "/_stats") as response:
+            request_counts = json.loads(response.read())
+        return sum(count for kind, count in request_counts.items() if kind != "errors")
+
+
+def get_version_label() -> str:
+    """Gets the short git hash of the code being benchmarked
+
+    :str returns: git hash, with "-dirty" if there are uncommitted changes
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        is_dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if is_dirty else "")
+
+
+def create_stub_artist() -> artist.Artist:
+    """Creates the artist served by the stub server
+
+    :artist.Artist returns: Artist with name and mbid assigned
+    """
+    artist_ = artist.Artist(STUB_ARTIST_NAME)
+    artist_.mbid = STUB_ARTIST_MBID
+    return artist_
+
+
+def get_peak_rss() -> int:
+    """Gets the highest resident set size of this process so far
+
+    :int returns: peak RSS in bytes, or None where it can't be measured
+    """
+    if resource == None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def measure(stub, function, *args, **kwargs) -> dict:
+    """Runs a function, measuring its wall time, requests and memory.
+        Peak_traced_bytes is only measured while tracemalloc is tracing
+
+    :StubServerProcess stub: server the function sends its requests to
+    :function function: function to run
+    :dict returns: Dictionary of measurements
+    """
+    requests_before = stub.total_requests
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    started_at = time.perf_counter()
+    function(*args, **kwargs)
+    wall_time = time.perf_counter() - started_at
+    peak_traced = (
+        tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    )
+    number_of_requests = stub.total_requests - requests_before
+
+    return {
+        "Wall_time": round(wall_time, 4),
+        "Requests": number_of_requests,
+        "Requests_per_second": round(number_of_requests / wall_time, 2),
+        "Peak_rss_bytes": get_peak_rss(),
+        "Peak_traced_bytes": peak_traced,
+    }
+
+
+def run_end_to_end(artist_: artist.Artist) -> dict:
+    """Runs the same steps as "Display Artist Statistics" in the CLI,
+    hiding what it prints
+
+    :artist.Artist artist_: Artist to get the statistics of
+    :dict returns: Dictionary of statistics
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return main.Main().get_artist_statistics_dict(artist_)
+
+
+async def run_async_lyrics(artist_: artist.Artist, max_concurrency: int) -> int:
+    """Assigns lyrics to the songs of an artist with the async api,
+    closing its session before the event loop ends
+
+    :artist.Artist artist_: Artist with its song list assigned
+    :int max_concurrency: number of concurrent lyric requests
+    :int returns: Number of failed lyric requests
+    """
+    try:
+        return await aal.assign_lyrics_to_songs(
+            artist_,
+            max_concurrency=max_concurrency,
+            retain_lyrics=False,
+            progress=ProgressDisplay(stream=None),
+        )
+    finally:
+        await async_api_caller.close_session()
+
+
+def run_benchmarks(
+    stub: StubServerProcess,
+    lyric_workers: int = al.DEFAULT_LYRIC_WORKERS,
+    page_workers: int = al.DEFAULT_PAGE_WORKERS,
+    with_cache: bool = False,
+    async_concurrency: int = aal.DEFAULT_LYRIC_CONCURRENCY,
+) -> dict:
+    """Runs each stage of the pipeline against the stub server
+
+    :StubServerProcess stub: running stub server
+    :int lyric_workers: number of concurrent lyric requests
+    :int page_workers: number of concurrent works page requests
+    :int async_concurrency: number of concurrent lyric requests of the async api
+    :bool with_cache: if True also runs end to end with a cold then warm cache
+    :dict returns: Dictionary of measurements by stage
+    """
+    results = {}
+    artist_ = create_stub_artist()
+    results["Song_list"] = measure(
+        stub, al.assign_artist_song_list, artist_, max_workers=page_workers
+    )
+    results["Lyrics"] = measure(
+        stub,
+        al.assign_lyrics_to_songs,
+        artist_,
+        max_workers=lyric_workers,
+        retain_lyrics=False,
+        progress=ProgressDisplay(stream=None),
+    )
+    async_artist = create_stub_artist()
+    al.assign_artist_song_list(async_artist, max_workers=page_workers)
+    results["Async_lyrics"] = measure(
+        stub, asyncio.run, run_async_lyrics(async_artist, async_concurrency)
+    )
+    results["End_to_end"] = measure(stub, run_end_to_end, create_stub_artist())
+
+    if with_cache:
+        with tempfile.TemporaryDirectory() as directory:
+            api_caller.configure_cache(os.path.join(directory, "responses.sqlite3"))
+            try:
+                results["Cold_cache"] = measure(
+                    stub, run_end_to_end, create_stub_artist()
+                )
+                results["Warm_cache"] = measure(
+                    stub, run_end_to_end, create_stub_artist()
+                )
+            finally:
+                api_caller.disable_cache()
+    return results
+
+
+def compare_song_sources(
+    artist_mbid: str,
+    song_source_names: list = None,
+    page_workers: int = al.DEFAULT_PAGE_WORKERS,
+) -> dict:
+    """Lists the songs of an artist from each song source, counting the
+        requests each sends and the share of every distinct title it finds
+
+    :str artist_mbid: mbid of the artist, the stub's or a real one
+    :list song_source_names: names of the song sources, defaults to all of them
+    :int page_workers: number of concurrent page requests
+    :dict returns: Dictionary of measurements by song source
+    """
+    if song_source_names == None:
+        song_source_names = list(song_sources.SONG_SOURCES)
+
+    results = {}
+    titles_by_source = {}
+    for name in song_source_names:
+        song_source = song_sources.SONG_SOURCES[name]
+        artist_ = artist.Artist(name)
+        artist_.mbid = artist_mbid
+        requests_before = _get_endpoint_requests(song_source.endpoint)
+        started_at = time.perf_counter()
+        al.assign_artist_song_list(artist_, page_workers, song_source)
+        wall_time = time.perf_counter() - started_at
+
+        titles_by_source[name] = {
+            al.normalise_title(song_.title) for song_ in artist_.song_list
+        }
+        results[name] = {
+            "Wall_time": round(wall_time, 4),
+            "Requests": _get_endpoint_requests(song_source.endpoint) - requests_before,
+            "Songs": len(artist_.song_list),
+            "Titles": len(titles_by_source[name]),
+            "With_work_type": sum(
+                1 for song_ in artist_.song_list if song_.work_type != None
+            ),
+        }
+
+    all_titles = set().union(*titles_by_source.values())
+    for name, titles in titles_by_source.items():
+        results[name]["Coverage"] = (
+            round(len(titles) / len(all_titles), 4) if all_titles else None
+        )
+    return results
+
+
+def _get_endpoint_requests(endpoint: str) -> int:
+    return api_caller.metrics.get_summary().get(endpoint, {}).get("Requests", 0)
+
+
+def display_song_sources(results: dict) -> None:
+    """Prints a table comparing the song sources, cheapest first
+
+    :dict results: Dictionary of measurements by song source
+    :None returns:
+    """
+    print(
+        "{:<12} | {:>8} | {:>9} | {:>6} | {:>6} | {:>9} | {}".format(
+            "Song source",
+            "Requests",
+            "Time (s)",
+            "Songs",
+            "Titles",
+            "Work type",
+            "Coverage",
+        )
+    )
+    for name, measurements in sorted(
+        results.items(), key=lambda item: item[1]["Requests"]
+    ):
+        coverage = measurements["Coverage"]
+        print(
+            "{:<12} | {:>8} | {:>9.3f} | {:>6} | {:>6} | {:>9} | {}".format(
+                name,
+                measurements["Requests"],
+                measurements["Wall_time"],
+                measurements["Songs"],
+                measurements["Titles"],
+                measurements["With_work_type"],
+                f"{coverage:.1%}" if coverage != None else "N/A",
+            )
+        )
+
+
+def load_previous_result(results_path: str, parameters: dict) -> dict:
+    """Finds the latest saved result run with the same parameters
+
+    :str results_path: path of the results file
+    :dict parameters: parameters of the current run
+    :dict returns: saved result, or None if there isn't one
+    """
+    if not os.path.exists(results_path):
+        return None
+    previous_result = None
+    with open(results_path, encoding="utf-8") as file:
+        for line in file:
+            result = json.loads(line)
+            if result.get("Parameters") == parameters:
+                previous_result = result
+    return previous_result
+
+
+def display_results(results: dict, previous_result: dict = None) -> None:
+    """Prints a table of the results, compared with a previous run if given
+
+    :dict results: Dictionary of measurements by stage
+    :dict previous_result: saved result of a previous run
+    :None returns:
+    """
+    previous_results = previous_result["Results"] if previous_result else {}
+    print(
+        "{:<12} | {:>9} | {:>8} | {:>9} | {:>10} | {:>12} | {}".format(
+            "Stage",
+            "Time (s)",
+            "Requests",
+            "Req/s",
+            "RSS (KiB)",
+            "Traced (KiB)",
+            "Change",
+        )
+    )
+    for stage, measurements in results.items():
+        change = "N/A"
+        if stage in previous_results:
+            previous_time = previous_results[stage]["Wall_time"]
+            change = "{:+.1%} vs {}".format(
+                measurements["Wall_time"] / previous_time - 1,
+                previous_result["Version"],
+            )
+        print(
+            "{:<12} | {:>9.3f} | {:>8} | {:>9.1f} | {:>10} | {:>12} | {}".format(
+                stage,
+                measurements["Wall_time"],
+                measurements["Requests"],
+                measurements["Requests_per_second"],
+                _format_kibibytes(measurements["Peak_rss_bytes"]),
+                _format_kibibytes(measurements["Peak_traced_bytes"]),
+                change,
+            )
+        )
+
+
+def _format_kibibytes(number_of_bytes: int) -> str:
+    return f"{number_of_bytes / 1024:.0f}" if number_of_bytes != None else "N/A"
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+    """Parses the command line arguments
+
+    :list arguments: command line arguments, defaults to sys.argv
+    :argparse.Namespace returns: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the CLI pipeline against a local stub of "
+        "MusicBrainz and lyrics.ovh"
+    )
+    parser.add_argument("--catalog-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--lyric-miss-rate", type=float, default=0.1)
+    parser.add_argument(
+        "--slow-rate",
+        type=float,
+        default=0.0,
+        help="share of stub responses slowed down by --slow-latency",
+    )
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="seconds")
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=None,
+        help="send a lyric request again if it is slower than this percentile",
+    )
+    parser.add_argument("--lyric-workers", type=int, default=al.DEFAULT_LYRIC_WORKERS)
+    parser.add_argument("--page-workers", type=int, default=al.DEFAULT_PAGE_WORKERS)
+    parser.add_argument(
+        "--async-concurrency", type=int, default=aal.DEFAULT_LYRIC_CONCURRENCY
+    )
+    parser.add_argument(
+        "--musicbrainz-rate",
+        type=float,
+        default=None,
+        help="rate limit the stub MusicBrainz api like the real one (requests/s)",
+    )
+    parser.add_argument(
+        "--with-cache",
+        action="store_true",
+        help="also run end to end with a cold then warm response cache",
+    )
+    parser.add_argument(
+        "--compare-song-sources",
+        action="store_true",
+        help="also list the songs from every song source and compare their "
+        "requests and coverage",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="measure the peak python allocations of each stage, this slows it down",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    return parser.parse_args(arguments)
+
+
+def run_and_save(arguments: argparse.Namespace) -> dict:
+    """Runs the benchmarks and saves the results
+
+    :argparse.Namespace arguments: parsed command line arguments
+    :dict returns: saved result
+    """
+    parameters = {
+        "Catalog_size": arguments.catalog_size,
+        "Latency": arguments.latency,
+        "Jitter": arguments.jitter,
+        "Error_rate": arguments.error_rate,
+        "Lyric_miss_rate": arguments.lyric_miss_rate,
+        "Slow_rate": arguments.slow_rate,
+        "Slow_latency": arguments.slow_latency,
+        "Hedge_percentile": arguments.hedge_percentile,
+        "Lyric_workers": arguments.lyric_workers,
+        "Page_workers": arguments.page_workers,
+        "Async_concurrency": arguments.async_concurrency,
+        "Musicbrainz_rate": arguments.musicbrainz_rate,
+        "Trace_memory": arguments.trace_memory,
+        "Seed": arguments.seed,
+    }
+    stub_arguments = [
+        f"--catalog-size={arguments.catalog_size}",
+        f"--latency={arguments.latency}",
+        f"--jitter={arguments.jitter}",
+        f"--error-rate={arguments.error_rate}",
+        f"--lyric-miss-rate={arguments.lyric_miss_rate}",
+        f"--slow-rate={arguments.slow_rate}",
+        f"--slow-latency={arguments.slow_latency}",
+        f"--seed={arguments.seed}",
+    ]
+    with StubServerProcess(stub_arguments) as stub:
+        # The two apis get different host names so they have separate rate limits
+        port = stub.url.rsplit(":", 1)[-1]
+        api_caller.configure_api_urls(
+            musicbrainz_url=f"http://127.0.0.1:{port}/ws/2",
+            lyrics_url=f"http://localhost:{port}/v1",
+        )
+        api_caller.configure_rate_limit("127.0.0.1", arguments.musicbrainz_rate)
+        api_caller.configure_session(
+            pool_maxsize=max(arguments.lyric_workers, arguments.page_workers)
+        )
+        lyrics_providers.configure_lyrics_provider(
+            lyrics_providers.create_lyrics_provider(
+                hedge_percentile=arguments.hedge_percentile
+            )
+        )
+        if arguments.trace_memory:
+            tracemalloc.start()
+        try:
+            results = run_benchmarks(
+                stub,
+                arguments.lyric_workers,
+                arguments.page_workers,
+                arguments.with_cache,
+                arguments.async_concurrency,
+            )
+            if arguments.compare_song_sources:
+                song_source_results = compare_song_sources(
+                    STUB_ARTIST_MBID, page_workers=arguments.page_workers
+                )
+        finally:
+            tracemalloc.stop()
+            api_caller.close_session()
+
+    result = {
+        "Version": get_version_label(),
+        "Timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "Parameters": parameters,
+        "Results": results,
+        "Metrics": api_caller.metrics.get_summary(),
+    }
+    display_results(results, load_previous_result(arguments.output, parameters))
+    # The p99 of "lyrics" is the time per song, or of "hedged" when hedging
+    print()
+    api_caller.metrics.display()
+    if arguments.compare_song_sources:
+        result["Song_sources"] = song_source_results
+        print()
+        display_song_sources(song_source_results)
+    with open(arguments.output, "a", encoding="utf-8") as file:
+        file.write(json.dumps(result) + "\n")
+    return result
+
+
+if __name__ == "__main__":
+    run_and_save(parse_arguments())
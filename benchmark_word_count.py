@@ -0,0 +1,151 @@
+import argparse
+import random
+import time
+import tracemalloc
+import word_counter
+
+VOCABULARY = (
+    "love baby yeah don't heart night oh you me tonight la i'm gonna "
+    "rock'n'roll dance feel - away home never stop"
+).split()
+SECTION_MARKERS = ("[Verse 1]", "[Chorus]", "[Bridge]", "(x2)")
+
+
+def generate_lyrics(number_of_words: int, rng: random.Random) -> str:
+    """Generates lyrics shaped like lyrics.ovh's: lines of a few words,
+        section markers and sometimes the "Paroles de la chanson" header
+
+    :int number_of_words: number of words sung in the lyrics
+    :random.Random rng: random number generator to draw the words from
+    :str returns: the lyrics
+    """
+    lines = []
+    if rng.random() < 0.3:
+        lines.append("Paroles de la chanson Song par Artist\r")
+    while number_of_words > 0:
+        if rng.random() < 0.1:
+            lines.append(rng.choice(SECTION_MARKERS))
+        line_length = min(number_of_words, rng.randint(3, 10))
+        lines.append(" ".join(rng.choice(VOCABULARY) for _ in range(line_length)))
+        number_of_words -= line_length
+    return "\n".join(lines)
+
+
+def generate_corpus(number_of_songs: int, words_per_song: int, seed: int = 0) -> list:
+    """Generates the lyrics of many songs
+
+    :int number_of_songs: number of songs in the corpus
+    :int words_per_song: mean number of words in each song
+    :int seed: seed of the random number generator
+    :list returns: List of lyrics
+    """
+    rng = random.Random(seed)
+    return [
+        generate_lyrics(max(1, int(rng.gauss(words_per_song, words_per_song / 3))), rng)
+        for _ in range(number_of_songs)
+    ]
+
+
+def count_with_split(texts: list) -> list:
+    # How Song.get_word_count counted words before word_counter
+    return [len(text.split()) for text in texts]
+
+
+def measure(function, corpus: list, long_lyrics: str) -> dict:
+    """Times counting a corpus and measures the memory used to count one long lyric
+
+    :function function: counts the words of a list of texts
+    :list corpus: List of lyrics timed
+    :str long_lyrics: lyrics the peak allocation is measured with
+    :dict returns: Dictionary of measurements
+    """
+    started_at = time.perf_counter()
+    number_of_words = sum(function(corpus))
+    wall_time = time.perf_counter() - started_at
+
+    # Traced separately, tracing slows down the timed run
+    tracemalloc.start()
+    function([long_lyrics])
+    peak_traced = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "Wall_time": round(wall_time, 4),
+        "Words": number_of_words,
+        "Words_per_second": round(number_of_words / wall_time),
+        "Peak_traced_bytes": peak_traced,
+    }
+
+
+def run_benchmarks(corpus: list, long_lyrics: str) -> dict:
+    """Counts the corpus with str.split and with every word_counter tokenizer,
+        one song at a time and batched
+
+    :list corpus: List of lyrics
+    :str long_lyrics: lyrics the peak allocation is measured with
+    :dict returns: Dictionary of measurements by method
+    """
+    results = {"Split": measure(count_with_split, corpus, long_lyrics)}
+    for name, tokenizer in word_counter.TOKENIZERS.items():
+        results[name.capitalize()] = measure(
+            lambda texts: [tokenizer.count(text) for text in texts],
+            corpus,
+            long_lyrics,
+        )
+        results[name.capitalize() + "_batch"] = measure(
+            tokenizer.count_batch, corpus, long_lyrics
+        )
+    return results
+
+
+def display_results(results: dict) -> None:
+    """Prints a table of the results
+
+    :dict results: Dictionary of measurements by method
+    :None returns:
+    """
+    print(
+        "{:<16} | {:>9} | {:>10} | {:>12} | {}".format(
+            "Method", "Time (s)", "Words", "Words/s", "Peak traced (KiB)"
+        )
+    )
+    for method, measurements in results.items():
+        print(
+            "{:<16} | {:>9.3f} | {:>10} | {:>12} | {:.0f}".format(
+                method,
+                measurements["Wall_time"],
+                measurements["Words"],
+                measurements["Words_per_second"],
+                measurements["Peak_traced_bytes"] / 1024,
+            )
+        )
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+    """Parses the command line arguments
+
+    :list arguments: command line arguments, defaults to sys.argv
+    :argparse.Namespace returns: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks word counting on a synthetic lyric corpus"
+    )
+    parser.add_argument("--songs", type=int, default=20_000)
+    parser.add_argument("--words-per-song", type=int, default=300)
+    parser.add_argument(
+        "--long-song-words",
+        type=int,
+        default=200_000,
+        help="words in the song the peak allocation is measured with",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(arguments)
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    corpus = generate_corpus(arguments.songs, arguments.words_per_song, arguments.seed)
+    long_lyrics = generate_lyrics(
+        arguments.long_song_words, random.Random(arguments.seed)
+    )
+    display_results(run_benchmarks(corpus, long_lyrics))
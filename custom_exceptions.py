@@ -3,3 +3,9 @@ class BreakLoopError(Exception):
     # anywhere else so i thought it best to create its own module
     # regardless of the size
     pass
+
+
+class NotFoundError(LookupError):
+    # The api answered but has nothing at the url, e.g. no lyrics for a song.
+    # Unlike other LookupErrors sending the request again won't help
+    pass
@@ -0,0 +1,388 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import api_caller
+import async_api_caller
+from artist_index import normalise_name
+from custom_exceptions import NotFoundError
+
+# Latency percentile of the primary after which a lookup is hedged
+DEFAULT_HEDGE_PERCENTILE = 95
+# Share of lookups that may be hedged, so a slow primary can't double the load
+DEFAULT_MAX_HEDGE_RATIO = 0.1
+# Requests the primary must have answered before its percentile is trusted,
+# until then lookups are hedged after DEFAULT_INITIAL_HEDGE_DELAY seconds
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_INITIAL_HEDGE_DELAY = 1.0
+# Lookups waiting on the primary or secondary at once across every thread
+DEFAULT_HEDGE_WORKERS = 64
+# Seconds between recalculations of the hedge delay, sorting every latency
+# on every lookup would cost more than it saves
+_HEDGE_DELAY_REFRESH_INTERVAL = 1.0
+
+
+class LyricsProvider:
+    """Somewhere the lyrics of a song can be looked up by artist name and title"""
+
+    # Name of the endpoint the provider's requests are recorded under in api_caller.metrics
+    endpoint = None
+
+    def get_lyrics(self, artist_name: str, song_title: str) -> dict:
+        """Looks up the lyrics of a song
+
+        :str artist_name: Name of artist
+        :str song_title: Name of song
+        :dict returns: dictionary containing lyrics of requested song
+        :raises NotFoundError: if the provider has no lyrics for the song
+        :raises LookupError: if the lookup failed
+        """
+        raise NotImplementedError
+
+    async def get_lyrics_async(self, artist_name: str, song_title: str) -> dict:
+        """Async version of get_lyrics"""
+        return await asyncio.to_thread(self.get_lyrics, artist_name, song_title)
+
+
+class LyricsOvhProvider(LyricsProvider):
+    """Lyrics from the lyrics.ovh api. Without coalescing, a lookup is sent
+    even if the same song is already being requested, so it can hedge one
+    """
+
+    endpoint = "lyrics"
+
+    def __init__(self, coalesce: bool = True):
+        self.coalesce = coalesce
+
+    def get_lyrics(self, artist_name: str, song_title: str) -> dict:
+        return api_caller.get_lyrics_from_artist_name_and_title(
+            artist_name, song_title, **self._get_coalesce_argument()
+        )
+
+    async def get_lyrics_async(self, artist_name: str, song_title: str) -> dict:
+        return await async_api_caller.get_lyrics_from_artist_name_and_title(
+            artist_name, song_title, **self._get_coalesce_argument()
+        )
+
+    def _get_coalesce_argument(self) -> dict:
+        # Left out when coalescing so existing callers see the same call
+        return {} if self.coalesce else {"coalesce": False}
+
+
+class DirectoryProvider(LyricsProvider):
+    """Lyrics kept in text files, one folder per artist: <directory>/<artist>/<title>.txt.
+    Names are matched after normalise_name so case, accents and punctuation
+    don't have to match the names on MusicBrainz
+    """
+
+    endpoint = "directory"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._paths = None
+        self._lock = threading.Lock()
+
+    def get_lyrics(self, artist_name: str, song_title: str) -> dict:
+        started_at = time.perf_counter()
+        path = self._get_paths().get(
+            (normalise_name(artist_name), normalise_name(song_title))
+        )
+        lyrics = None
+        if path != None:
+            try:
+                with open(path, encoding="utf-8") as file:
+                    lyrics = file.read()
+            except (OSError, UnicodeDecodeError) as err:
+                # A file that isn't UTF-8 is left to the next provider like an
+                # unreadable one, it isn't a reason to stop counting
+                api_caller.metrics.record(
+                    self.endpoint, "error", 0, time.perf_counter() - started_at
+                )
+                raise LookupError("Could not read {}: {}".format(path, err))
+
+        if not (lyrics or "").strip():
+            api_caller.metrics.record(
+                self.endpoint, "404", 0, time.perf_counter() - started_at
+            )
+            raise NotFoundError("No lyrics found")
+        api_caller.metrics.record(
+            self.endpoint,
+            "200",
+            len(lyrics.encode("utf-8")),
+            time.perf_counter() - started_at,
+        )
+        return {"lyrics": lyrics}
+
+    async def get_lyrics_async(self, artist_name: str, song_title: str) -> dict:
+        # Reading a small local file is quicker than handing it to a thread
+        return self.get_lyrics(artist_name, song_title)
+
+    def reload(self) -> None:
+        """Forgets the files found so far, they are listed again on the next lookup
+
+        :None returns:
+        """
+        with self._lock:
+            self._paths = None
+
+    def _get_paths(self) -> dict:
+        with self._lock:
+            if self._paths == None:
+                try:
+                    self._paths = _list_lyric_files(self.directory)
+                except OSError as err:
+                    # Not remembered, so the directory is listed again next time
+                    api_caller.metrics.record(self.endpoint, "error", 0, 0.0)
+                    raise LookupError(
+                        "Could not list {}: {}".format(self.directory, err)
+                    )
+            return self._paths
+
+
+class FallbackProvider(LyricsProvider):
+    """Asks each provider in turn until one has the lyrics, e.g. a local
+    directory before lyrics.ovh
+    """
+
+    def __init__(self, providers: list):
+        self.providers = providers
+        self.endpoint = providers[0].endpoint
+
+    def get_lyrics(self, artist_name: str, song_title: str) -> dict:
+        errors = []
+        for provider in self.providers:
+            try:
+                return provider.get_lyrics(artist_name, song_title)
+            except LookupError as err:
+                errors.append(err)
+        raise _get_lookup_error(errors)
+
+    async def get_lyrics_async(self, artist_name: str, song_title: str) -> dict:
+        errors = []
+        for provider in self.providers:
+            try:
+                return await provider.get_lyrics_async(artist_name, song_title)
+            except LookupError as err:
+                errors.append(err)
+        raise _get_lookup_error(errors)
+
+
+class HedgedProvider(LyricsProvider):
+    """Sends a lookup to the primary, and if it hasn't answered by the
+    hedge_percentile latency of the primary's requests so far, sends the same
+    lookup to the secondary and takes whichever answers first.
+
+    Only the slowest lookups are hedged, and no more than max_hedge_ratio of
+    them, so the tail latency is cut for a few percent more requests. Every
+    lookup is recorded in api_caller.metrics under "hedged" with the status
+    of which provider answered it, so its p99 is the p99 time per song.
+    """
+
+    endpoint = "hedged"
+
+    def __init__(
+        self,
+        primary: LyricsProvider,
+        secondary: LyricsProvider,
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        max_hedge_ratio: float = DEFAULT_MAX_HEDGE_RATIO,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        initial_delay: float = DEFAULT_INITIAL_HEDGE_DELAY,
+        max_workers: int = DEFAULT_HEDGE_WORKERS,
+        clock=time.monotonic,
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.hedge_percentile = hedge_percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.lookups = 0
+        self.hedged_lookups = 0
+        self._clock = clock
+        self._hedge_delay = None
+        self._hedge_delay_at = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hedged-lyrics"
+        )
+
+    def get_hedge_delay(self) -> float:
+        """Gets how long a lookup waits on the primary before it is hedged
+
+        :float returns: seconds, the hedge_percentile latency of the primary
+        """
+        if api_caller.metrics.get_requests(self.primary.endpoint) < self.min_samples:
+            return self.initial_delay
+
+        with self._lock:
+            now = self._clock()
+            if (
+                self._hedge_delay_at == None
+                or now - self._hedge_delay_at >= _HEDGE_DELAY_REFRESH_INTERVAL
+            ):
+                self._hedge_delay = api_caller.metrics.get_recent_percentile(
+                    self.primary.endpoint, self.hedge_percentile
+                )
+                self._hedge_delay_at = now
+            return self._hedge_delay
+
+    def get_lyrics(self, artist_name: str, song_title: str) -> dict:
+        started_at = time.perf_counter()
+        primary_request = self._executor.submit(
+            self.primary.get_lyrics, artist_name, song_title
+        )
+        requests = {primary_request: "primary"}
+        done, _ = wait([primary_request], timeout=self.get_hedge_delay())
+        if self._reserve_hedge(hedge=not done):
+            secondary_request = self._executor.submit(
+                self.secondary.get_lyrics, artist_name, song_title
+            )
+            requests[secondary_request] = "secondary"
+
+        # The first request to answer wins, whether or not it found lyrics.
+        # One that fails only loses if the other fails too
+        pending = set(requests)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for request in done:
+                if _is_answer(request.exception()):
+                    self._record(requests[request], started_at)
+                    return request.result()
+        self._record("error", started_at)
+        raise _get_lookup_error([request.exception() for request in requests])
+
+    async def get_lyrics_async(self, artist_name: str, song_title: str) -> dict:
+        started_at = time.perf_counter()
+        primary_request = asyncio.ensure_future(
+            self.primary.get_lyrics_async(artist_name, song_title)
+        )
+        requests = {primary_request: "primary"}
+        done, _ = await asyncio.wait([primary_request], timeout=self.get_hedge_delay())
+        if self._reserve_hedge(hedge=not done):
+            secondary_request = asyncio.ensure_future(
+                self.secondary.get_lyrics_async(artist_name, song_title)
+            )
+            requests[secondary_request] = "secondary"
+
+        pending = set(requests)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for request in done:
+                    if _is_answer(request.exception()):
+                        self._record(requests[request], started_at)
+                        return request.result()
+        finally:
+            # Unlike a thread, the slower request can be called off
+            for request in requests:
+                if not request.done():
+                    request.cancel()
+                elif not request.cancelled():
+                    # Marks its error as seen so asyncio doesn't log it
+                    request.exception()
+        self._record("error", started_at)
+        raise _get_lookup_error([request.exception() for request in requests])
+
+    def close(self) -> None:
+        """Stops the threads the lookups are sent from, once they finish
+
+        :None returns:
+        """
+        self._executor.shutdown(wait=False)
+
+    def _reserve_hedge(self, hedge: bool) -> bool:
+        # Counts the lookup, and whether it is hedged if it wants to be
+        with self._lock:
+            self.lookups += 1
+            if not hedge or (
+                self.hedged_lookups + 1 > self.max_hedge_ratio * self.lookups
+            ):
+                return False
+            self.hedged_lookups += 1
+            return True
+
+    def _record(self, status: str, started_at: float) -> None:
+        api_caller.metrics.record(
+            self.endpoint, status, 0, time.perf_counter() - started_at
+        )
+
+
+def _is_answer(err: BaseException) -> bool:
+    # Having no lyrics for a song is an answer, only a failed lookup isn't
+    return err == None or isinstance(err, NotFoundError)
+
+
+def _list_lyric_files(directory: str) -> dict:
+    paths = {}
+    for artist_name in sorted(os.listdir(directory)):
+        artist_directory = os.path.join(directory, artist_name)
+        try:
+            file_names = sorted(os.listdir(artist_directory))
+        except OSError:
+            # Not a directory, or one that can't be read
+            continue
+        for file_name in file_names:
+            song_title, extension = os.path.splitext(file_name)
+            if extension.lower() == ".txt":
+                paths.setdefault(
+                    (normalise_name(artist_name), normalise_name(song_title)),
+                    os.path.join(artist_directory, file_name),
+                )
+    return paths
+
+
+def _get_lookup_error(errors: list) -> LookupError:
+    # A miss everywhere is a NotFoundError, so it is counted as missing lyrics
+    # rather than a failed request
+    for err in errors:
+        if not isinstance(err, NotFoundError):
+            return err
+    return errors[0]
+
+
+_lyrics_provider = LyricsOvhProvider()
+
+
+def create_lyrics_provider(
+    lyrics_directory: str = None, hedge_percentile: float = None
+) -> LyricsProvider:
+    """Creates a lyrics provider from the command line options
+
+    :str lyrics_directory: directory of lyric files looked in before lyrics.ovh
+    :float hedge_percentile: latency percentile of lyrics.ovh after which a
+                             lookup is sent again, None to never send it again
+    :LyricsProvider returns: The lyrics provider
+    """
+    provider = LyricsOvhProvider()
+    if hedge_percentile != None:
+        # lyrics.ovh is the only api, so the hedge is a second request to it
+        # on another connection rather than waiting on the first
+        provider = HedgedProvider(
+            provider, LyricsOvhProvider(coalesce=False), hedge_percentile
+        )
+    if lyrics_directory != None:
+        provider = FallbackProvider([DirectoryProvider(lyrics_directory), provider])
+    return provider
+
+
+def configure_lyrics_provider(lyrics_provider: LyricsProvider) -> None:
+    """Sets where the lyrics of every song are looked up
+
+    :LyricsProvider lyrics_provider: The lyrics provider
+    :None returns:
+    """
+    global _lyrics_provider
+
+    _lyrics_provider = lyrics_provider
+
+
+def get_lyrics_provider() -> LyricsProvider:
+    """Gets where the lyrics of every song are looked up
+
+    :LyricsProvider returns: The configured lyrics provider
+    """
+    return _lyrics_provider
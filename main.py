@@ -1,8 +1,53 @@
+import argparse
+import csv
+import json
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import api_caller
 import artist
 import artist_logic as al
-from time import sleep
+import lyrics_providers
+from artist_jobs import DEFAULT_BACKGROUND_JOBS, ArtistJob
+from artist_registry import ArtistRegistry, ArtistSummary
+import song_sources
+import statistics_engine
+import word_counter
+from time import localtime, sleep, strftime
 from custom_exceptions import BreakLoopError
+from progress_display import ProgressDisplay
+from results_store import ResultsStore, open_results_store
+
+try:
+    import readline
+except ImportError:
+    # Not available on Windows, names just aren't completed with tab there
+    readline = None
+
+BATCH_FIELDNAMES = [
+    "Query",
+    "Mbid",
+    "Name",
+    "Songs",
+    "Songs_with_lyrics",
+    "Missing_lyrics",
+    "Failed_lyric_requests",
+    "Mean",
+    "Max",
+    "Min",
+    "Variance",
+    "Std_dev",
+    "Error",
+]
+# Added to BATCH_FIELDNAMES by --detailed-statistics
+DETAILED_FIELDNAMES = [
+    "Median",
+    *(f"P{percentile}" for percentile in statistics_engine.PERCENTILES),
+    "Iqr",
+    "Histogram",
+]
+# Number of artists processed at once in batch mode
+DEFAULT_BATCH_CONCURRENCY = 4
 
 
 def display_initial_message() -> None:
@@ -51,11 +96,14 @@ def display_artist_search_results(
             )
 
 
-def get_input_from_user(user_message: str, number_of_results: int) -> int:
-    """Gets input from user between 1 -> number_of_results
+def get_input_from_user(
+    user_message: str, number_of_results: int, minimum: int = 1
+) -> int:
+    """Gets input from user between minimum -> number_of_results
 
     :str user_message: Message to display to the user
     :int number_of_results: Number of results the user has to choose from
+    :int minimum: Lowest number the user can choose
     :int returns: index of list chosen
     :raises ValueError: When input != int
     """
@@ -66,28 +114,65 @@ def get_input_from_user(user_message: str, number_of_results: int) -> int:
             print("Please choose an integer.")
             continue
 
-        if chosen_artist_index < 1 or chosen_artist_index > number_of_results:
-            print(f"Please choose a number between 1 and {number_of_results}.")
+        if chosen_artist_index < minimum or chosen_artist_index > number_of_results:
+            print(f"Please choose a number between {minimum} and {number_of_results}.")
         else:
             break
     return chosen_artist_index
 
 
+def get_artist_name_from_user(user_message: str) -> str:
+    """Gets the name of an artist from user, pressing tab completes
+    the names of artists in the local index
+
+    :str user_message: Message to display to the user
+    :str returns: Name entered by user
+    """
+    artist_index = al.get_artist_index()
+    if readline == None or artist_index == None:
+        return input(user_message)
+
+    completions = {}
+
+    def complete(text: str, state: int) -> str:
+        if text not in completions:
+            completions[text] = artist_index.complete(text)
+        return completions[text][state] if state < len(completions[text]) else None
+
+    old_completer = readline.get_completer()
+    old_delimiters = readline.get_completer_delims()
+    # The whole line is completed, artist names have spaces in them
+    readline.set_completer_delims("")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+    try:
+        return input(user_message)
+    finally:
+        readline.set_completer(old_completer)
+        readline.set_completer_delims(old_delimiters)
+
+
 class Main:
     # Private Fields
-    _list_of_artists = []
     _number_of_results = 10
-    _max_artists = 5
 
     # Dunder Methods
-    def __init__(self) -> None:
+    def __init__(self, results_store: ResultsStore = None) -> None:
+        # Artists of this session by mbid
+        self._artists = ArtistRegistry()
+        # Artists processed in earlier sessions are loaded from here
+        self._results_store = results_store
+        # Jobs fetching the songs and lyrics of new artists, by mbid
+        self._jobs = {}
+        self._executor = ThreadPoolExecutor(max_workers=DEFAULT_BACKGROUND_JOBS)
         self.choices = {
             "1": self.display_artists,
             "2": self.create_artist,
             "3": self.delete_artist,
             "4": self.display_artist_statistics,
             "5": self.compare_artists,
-            "6": self.quit,
+            "6": self.refresh_artist,
+            "7": self.quit,
         }
 
     # Regular Methods
@@ -96,7 +181,36 @@ class Main:
 
         :None returns:
         """
-        return True if len(self._list_of_artists) > 0 else False
+        return True if len(self._artists) > 0 else False
+
+    def choose_artist(self, user_message: str):
+        """Asks user to choose one of the artists shown by display_artists
+
+        :str user_message: Message to display to the user
+        :returns: The chosen Artist or ArtistSummary
+        """
+        user_input = get_input_from_user(user_message, len(self._artists))
+        return self._artists.get_by_position(user_input - 1)
+
+    def expand_artist(self, artist_) -> artist.Artist:
+        """Gets the whole artist, with its song list, of a compacted artist.
+        Its songs are loaded from the results store or else fetched again
+
+        :param artist_: Artist or the ArtistSummary of one
+        :artist.Artist returns: The whole artist
+        """
+        if not isinstance(artist_, ArtistSummary):
+            return artist_
+        whole_artist = (
+            self._results_store.load(artist_.mbid)
+            if self._results_store != None
+            else None
+        )
+        if whole_artist == None:
+            whole_artist = artist.Artist(artist_.name)
+            whole_artist.mbid = artist_.mbid
+        self._artists.replace(whole_artist)
+        return whole_artist
 
     def create_artist(self) -> None:
         """Creates an artist using functions from artist_logic module
@@ -104,11 +218,25 @@ class Main:
 
         :None returns:
         """
-        if len(self._list_of_artists) < self._max_artists:
-            # Object instantiation
-            artist_name = input("Artist name: ")
-            artist_ = artist.Artist(artist_name)
+        # Object instantiation
+        artist_name = get_artist_name_from_user("Artist name: ")
+        artist_ = artist.Artist(artist_name)
+
+        # Artists seen before are shown without asking the api
+        response = al.search_artist_index(artist_name, self._number_of_results)
+        chosen_index = 0
+        if response != None:
+            artist_list = al.get_artist_list(response)
+            display_artist_search_results(artist_list, self._number_of_results)
+            user_message = (
+                "Please Choose the Id of the Artist you wish to select, "
+                "or 0 to search MusicBrainz: "
+            )
+            chosen_index = get_input_from_user(
+                user_message, len(artist_list), minimum=0
+            )
 
+        if chosen_index == 0:
             # Display of queried artists
             response = al.get_artist_response(artist_name)
             artist_list = al.get_artist_list(response)
@@ -117,17 +245,102 @@ class Main:
             # Selection and assignment of artist MBID
             user_message = "Please Choose the Id of the Artist you wish to select: "
             chosen_index = get_input_from_user(user_message, self._number_of_results)
-            artist_mbid = al.get_artist_mbid_by_index(response, chosen_index - 1)
-            artist_display_name = al.get_artist_display_name_by_index(
-                response, chosen_index - 1
+        artist_mbid = al.get_artist_mbid_by_index(response, chosen_index - 1)
+        artist_display_name = al.get_artist_display_name_by_index(
+            response, chosen_index - 1
+        )
+        artist_.name = artist_display_name
+        artist_.mbid = artist_mbid
+        if artist_mbid in self._artists:
+            print(f"{artist_display_name} has already been added")
+            return
+
+        stored_artist = (
+            self._results_store.load(artist_mbid)
+            if self._results_store != None
+            else None
+        )
+        if stored_artist != None and stored_artist.has_statistics():
+            artist_ = stored_artist
+            print(
+                f"Loaded {artist_.name} from results fetched "
+                f"{get_fetched_at_string(artist_.fetched_at)}, "
+                "use Refresh Artist to fetch them again"
             )
-            artist_.name = artist_display_name
-            artist_.mbid = artist_mbid
-            self._list_of_artists.append(artist_)
+        elif stored_artist != None:
+            artist_ = stored_artist
+            print(
+                f"Carrying on from where fetching {artist_.name} stopped, "
+                f"{artist_.wordcount_accumulator.count} of {len(artist_.song_list)} "
+                "songs already have lyrics"
+            )
+        self._artists.add(artist_)
+        if not artist_.has_statistics():
+            self.start_artist_job(artist_)
+            print(
+                "Artist Added Successfully, their songs and lyrics are being "
+                "fetched in the background"
+            )
+        else:
             print("Artist Added Successfully")
 
-        else:
-            print("Maximum Artists Reached, please delete one before proceeding\n")
+    def start_artist_job(self, artist_: artist.Artist) -> ArtistJob:
+        """Starts fetching the songs and lyrics of an artist in the background
+
+        :artist.Artist artist_: Artist to fetch the songs and lyrics of
+        :ArtistJob returns: The started job
+        """
+        job = ArtistJob(
+            artist_, on_finished=self.save_artist, results_store=self._results_store
+        )
+        self._jobs[artist_.mbid] = job
+        job.start(self._executor).add_done_callback(
+            lambda future: self.forget_finished_job(job)
+        )
+        return job
+
+    def forget_finished_job(self, job: ArtistJob) -> None:
+        """Removes a job that finished with statistics from the jobs of the session.
+            A failed job is kept so its error is shown when its statistics are asked
+            for, and the next attempt carries on from where it stopped
+
+        :ArtistJob job: Finished job
+        :None returns:
+        """
+        if job.future.cancelled() or job.future.exception() != None:
+            return
+        if self._jobs.get(job.artist.mbid) is job:
+            del self._jobs[job.artist.mbid]
+        # The registry now holds the only reference to the artist, so it can be
+        # compacted if more artists than the registry keeps whole were used since
+        self._artists.compact_excess()
+
+    def save_artist(self, artist_: artist.Artist) -> None:
+        """Saves an artist to the results store, if there is one
+
+        :artist.Artist artist_: Artist with statistics
+        :None returns:
+        """
+        if self._results_store != None:
+            self._results_store.save(artist_)
+
+    def resume_unfinished_artists(self) -> None:
+        """Adds the artists whose jobs were interrupted last session and carries
+        on fetching their lyrics in the background
+
+        :None returns:
+        """
+        if self._results_store == None:
+            return
+        for artist_mbid in self._results_store.get_unfinished_mbids():
+            artist_ = self._results_store.load(artist_mbid)
+            if artist_ != None and self._artists.add(artist_):
+                self.start_artist_job(artist_)
+                print(
+                    f"Carrying on fetching the lyrics of {artist_.name}, "
+                    f"{artist_.wordcount_accumulator.count} of "
+                    f"{len(artist_.song_list)} songs already have lyrics"
+                )
 
     def display_artists(self) -> None:
         """Displays the list of current artists if available
@@ -140,9 +353,16 @@ class Main:
              Artist Table
             --------------"""
             )
-            for index, artist in enumerate(self._list_of_artists):
+            for index, artist in enumerate(self._artists):
+                job = self._jobs.get(artist.mbid)
+                job_status = (
+                    f" | {job.get_status_line()}"
+                    if job != None and not job.done()
+                    else ""
+                )
                 print(
                     f"Id: {index+1} | Name: {artist.name} | Has Statistics?: {artist.has_statistics()}"
+                    + job_status
                 )
         else:
             print("Artist list empty, please add an Artist to view")
@@ -155,13 +375,19 @@ class Main:
         if self.is_artist_available():
             # User input
             self.display_artists()
-            user_message = "Please Choose an Artist to delete: "
-            user_input = get_input_from_user(user_message, len(self._list_of_artists))
+            artist_ = self.choose_artist("Please Choose an Artist to delete: ")
 
             # Deleting selected Artist
-            artist_name = self._list_of_artists[user_input - 1].name
-            del self._list_of_artists[user_input - 1]
-            print(f"{artist_name} was successfully deleted.")
+            job = self._jobs.pop(artist_.mbid, None)
+            if job != None:
+                # A running job removes the artist's results itself when it ends,
+                # otherwise it could save them again after they are deleted
+                job.stop(delete_results=True)
+            if self._results_store != None:
+                # Or the next session would carry on fetching an unfinished artist
+                self._results_store.delete(artist_.mbid)
+            self._artists.remove(artist_.mbid)
+            print(f"{artist_.name} was successfully deleted.")
         else:
             print("There are no artists, please add an artist in order to use delete")
 
@@ -173,25 +399,62 @@ class Main:
         :artist.Artist artist_:
         :dict return: Dictionary containing statistics
         """
-        if artist_.has_statistics():
+        job = self._jobs.get(artist_.mbid)
+        if job == None and artist_.has_statistics():
             return artist_.statistics
-        else:
-            # I wasnt sure what was better, getting the values then assigning,
-            # or passing artist into a class and assigning it inline"
-            # I went with this because it looks cleaner and easier to read
-            # Also since i dont use song_list or lyrics, there is not reason to
-            # store then as variables here
-            al.assign_artist_song_list(artist_)
-            failed_lyric_requests = al.assign_lyrics_to_songs(artist_)
-            total_songs_with_lyrics = sum(
-                [1 if song.has_wordcount else 0 for song in artist_.song_list]
-            )
-            print(
-                f"{failed_lyric_requests} lyric request(s) failed out of {total_songs_with_lyrics} songs"
-            )
-            statistics = artist_.get_artist_statistics()
+        if job == None:
+            # Even when waited for straight away the work is done by a job, so
+            # it is checkpointed and a failed attempt is carried on by the next
+            job = self.start_artist_job(artist_)
+
+        if not job.done():
+            print(f"Waiting for the songs and lyrics of {artist_.name}...")
+        try:
+            statistics = job.wait()
+        finally:
+            if job.done() and self._jobs.get(artist_.mbid) is job:
+                del self._jobs[artist_.mbid]
+        # The registry may have compacted the artist since the job finished
+        artist_ = job.artist
+        print(
+            f"{artist_.lyric_errors} lyric request(s) failed and {artist_.missing_lyrics} "
+            f"song(s) have no lyrics, {artist_.wordcount_accumulator.count} songs have lyrics"
+        )
+        return statistics
+
+    def refresh_artist(self) -> None:
+        """Brings the songs and statistics of an artist chosen by user up to date.
+        Only the lyrics of new or changed works are requested
 
-            return statistics
+        :None returns:
+        """
+        if self.is_artist_available():
+            self.display_artists()
+            artist_ = self.choose_artist("Please Choose an Artist to refresh: ")
+            job = self._jobs.get(artist_.mbid)
+            if job != None and job.done():
+                # Its callback may not have run yet
+                self.forget_finished_job(job)
+            artist_ = self.expand_artist(artist_)
+            if artist_.mbid in self._jobs or not artist_.has_statistics():
+                # Songs and lyrics still being fetched are up to date already,
+                # and a failed job is carried on after showing its error
+                self.get_artist_statistics_dict(artist_)
+            else:
+                number_of_songs = len(artist_.song_list)
+                al.refresh_artist(artist_, retain_lyrics=False)
+                print(
+                    f"{len(artist_.song_list) - number_of_songs:+} song(s), "
+                    f"{artist_.lyric_errors} lyric request(s) failed and "
+                    f"{artist_.missing_lyrics} new song(s) have no lyrics"
+                )
+                artist_.get_artist_statistics()
+                artist_.fetched_at = None
+                if self._results_store != None:
+                    self._results_store.save(artist_)
+            print(f"{artist_.name} was successfully refreshed.")
+        else:
+            print("There are no artists, please add an artist in order to refresh")
 
     def display_artist_statistics(self, artist_: artist.Artist = None) -> None:
         """Displays the statistics of the artist given
@@ -205,11 +468,9 @@ class Main:
         if self.is_artist_available():
             if artist_ == None:
                 self.display_artists()
-                user_message = "Please Choose an Artist to show statistics for: "
-                user_input = get_input_from_user(
-                    user_message, len(self._list_of_artists)
+                artist_ = self.choose_artist(
+                    "Please Choose an Artist to show statistics for: "
                 )
-                artist_ = self._list_of_artists[user_input - 1]
 
             statistics_dict = self.get_artist_statistics_dict(artist_)
             print(f"Statistics for {artist_.name}")
@@ -226,18 +487,14 @@ class Main:
 
         :None returns:
         """
-        if len(self._list_of_artists) > 1:
+        if len(self._artists) > 1:
             artists_to_compare = []
             self.display_artists()
             for choice_as_string in ["First", "Second"]:
                 user_message = (
                     f"Please Choose the {choice_as_string} Artist to compare: "
                 )
-                user_input = get_input_from_user(
-                    user_message, len(self._list_of_artists)
-                )
-
-                artists_to_compare.append(self._list_of_artists[user_input - 1])
+                artists_to_compare.append(self.choose_artist(user_message))
             for artist_ in artists_to_compare:
                 self.display_artist_statistics(artist_)
         else:
@@ -259,7 +516,8 @@ class Main:
         3. Delete Artist
         4. Display Artist Statistics
         5. Compare Artists
-        6. Quit
+        6. Refresh Artist
+        7. Quit
         """
         )
 
@@ -269,6 +527,7 @@ class Main:
         :None returns:
         """
         display_initial_message()
+        self.resume_unfinished_artists()
 
         while True:
             try:
@@ -293,9 +552,272 @@ class Main:
         :None returns:
         """
 
+        # Copied as finished jobs remove themselves from another thread
+        jobs = list(self._jobs.values())
+        for job in jobs:
+            job.stop()
+        running_jobs = [job for job in jobs if not job.done()]
+        if running_jobs != []:
+            print(
+                f"Stopping {len(running_jobs)} background job(s), the lyrics "
+                "fetched so far are saved and the rest are fetched next session"
+            )
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        print("Api requests made this session:")
+        api_caller.metrics.display()
         print("Thank you for using my cli app")
         sys.exit(0)
 
 
+def get_fetched_at_string(fetched_at: float) -> str:
+    """Formats when an artist's results were fetched in local time
+
+    :float fetched_at: Unix time the results were fetched
+    :str returns: e.g. "on 2024-05-01 at 13:45"
+    """
+    return strftime("on %Y-%m-%d at %H:%M", localtime(fetched_at))
+
+
+def read_artist_queries(file_path: str) -> list:
+    """Reads artist names or mbids from a file, one per line.
+        Blank lines and lines starting with # are skipped
+
+    :str file_path: path of the file, or "-" to read from stdin
+    :list returns: List of artist names or mbids
+    """
+    if file_path == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(file_path, encoding="utf-8") as file:
+            lines = file.readlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def get_batch_fieldnames(detailed: bool = False) -> list:
+    """Gets the fields of a batch record, the detailed statistics go before the Error
+
+    :bool detailed: If True the DETAILED_FIELDNAMES are included
+    :list returns: List of field names
+    """
+    if not detailed:
+        return BATCH_FIELDNAMES
+    return BATCH_FIELDNAMES[:-1] + DETAILED_FIELDNAMES + BATCH_FIELDNAMES[-1:]
+
+
+def get_artist_record(
+    artist_query: str,
+    count_titles_once: bool = False,
+    detailed: bool = False,
+    use_index: bool = False,
+) -> dict:
+    """Resolves and processes a single artist without any user input
+
+    :str artist_query: Name or mbid of the artist
+    :bool count_titles_once: If True each song title counts once in the statistics
+    :bool detailed: If True the DETAILED_FIELDNAMES statistics are added
+    :bool use_index: If True names only one indexed artist has aren't searched for
+    :dict returns: Dictionary with the BATCH_FIELDNAMES keys, Error is None unless
+                   the artist couldn't be processed
+    """
+    record = dict.fromkeys(get_batch_fieldnames(detailed))
+    record["Query"] = artist_query
+    try:
+        artist_ = al.resolve_artist(artist_query, use_index)
+        record["Mbid"] = artist_.mbid
+        record["Name"] = artist_.name
+
+        al.assign_artist_song_list(artist_)
+        al.assign_lyrics_to_songs(
+            artist_,
+            count_titles_once=count_titles_once,
+            retain_lyrics=False,
+            progress=ProgressDisplay(stream=None),
+        )
+        record["Missing_lyrics"] = artist_.missing_lyrics
+        record["Failed_lyric_requests"] = artist_.lyric_errors
+        record["Songs"] = len(artist_.song_list)
+        record["Songs_with_lyrics"] = artist_.wordcount_accumulator.count
+        record.update(artist_.get_artist_statistics(detailed))
+    except (BreakLoopError, LookupError) as err:
+        record["Error"] = str(err)
+    except Exception as err:
+        # Anything else, e.g. a response that isn't JSON, only fails this artist
+        record["Error"] = f"{type(err).__name__}: {err}"
+    return record
+
+
+def run_batch(
+    artist_queries: list,
+    output_format: str = "json",
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    count_titles_once: bool = False,
+    detailed: bool = False,
+    use_index: bool = False,
+    stream=None,
+) -> int:
+    """Processes many artists concurrently, writing one record per artist
+        to stream as soon as it finishes
+
+    :list artist_queries: Names or mbids of the artists
+    :str output_format: "json" for one JSON object per line, or "csv"
+    :int concurrency: Number of artists processed at once
+    :bool count_titles_once: If True each song title counts once in the statistics
+    :bool detailed: If True the DETAILED_FIELDNAMES statistics are added
+    :bool use_index: If True names only one indexed artist has aren't searched for
+    :stream: stream the records are written to, defaults to sys.stdout
+    :int returns: Number of artists that couldn't be processed
+    """
+    stream = stream if stream != None else sys.stdout
+    if output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=get_batch_fieldnames(detailed))
+        writer.writeheader()
+
+        def write_record(record: dict) -> None:
+            if record.get("Histogram") != None:
+                record = dict(record, Histogram=json.dumps(record["Histogram"]))
+            writer.writerow(record)
+
+    else:
+
+        def write_record(record: dict) -> None:
+            stream.write(json.dumps(record) + "\n")
+
+    number_of_errors = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [
+            executor.submit(
+                get_artist_record,
+                artist_query,
+                count_titles_once,
+                detailed,
+                use_index,
+            )
+            for artist_query in artist_queries
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            number_of_errors += 0 if record["Error"] == None else 1
+            write_record(record)
+            stream.flush()
+    return number_of_errors
+
+
+def parse_arguments(arguments: list) -> argparse.Namespace:
+    """Parses the command line arguments
+
+    :list arguments: command line arguments, without the program name
+    :argparse.Namespace returns: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Gets statistics on the number of words in an artist's songs. "
+        "Runs the interactive menu unless artists are given."
+    )
+    parser.add_argument(
+        "artists", nargs="*", help="names or mbids of artists to process in batch"
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        help='file of artist names or mbids, one per line ("-" for stdin)',
+    )
+    parser.add_argument(
+        "--format", choices=["json", "csv"], default="json", help="output format"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_BATCH_CONCURRENCY,
+        help="number of artists processed at once",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="file to write the api request metrics to when the program ends",
+    )
+    parser.add_argument(
+        "--count-titles-once",
+        action="store_true",
+        help="count each song title once in the statistics",
+    )
+    parser.add_argument(
+        "--detailed-statistics",
+        action="store_true",
+        help="add the median, percentiles, IQR and a histogram of the wordcounts",
+    )
+    parser.add_argument(
+        "--use-artist-index",
+        action="store_true",
+        help="take a name only one artist seen before has to be that artist "
+        "without searching MusicBrainz, which may differ from the top result",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        choices=sorted(word_counter.TOKENIZERS),
+        default=word_counter.DEFAULT_TOKENIZER,
+        help="how words are counted: split on whitespace, runs of letters "
+        "and digits, or whitespace leaving out section markers like [Chorus]",
+    )
+    parser.add_argument(
+        "--song-source",
+        choices=list(song_sources.SONG_SOURCES),
+        default=song_sources.DEFAULT_SONG_SOURCE,
+        help="where songs are listed from: the artist's works, their recordings "
+        "(covers groups, more requests) or their official releases (fewest "
+        "requests, misses songs only released as singles)",
+    )
+    parser.add_argument(
+        "--lyrics-directory",
+        help="directory of lyric files, <artist>/<title>.txt, looked in before "
+        "lyrics.ovh",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        help="send a lyric request to lyrics.ovh again if it hasn't answered by "
+        "this percentile of its latency so far, e.g. 95",
+    )
+    parsed_arguments = parser.parse_args(arguments)
+    if parsed_arguments.lyrics_directory != None and not os.path.isdir(
+        parsed_arguments.lyrics_directory
+    ):
+        parser.error(f"{parsed_arguments.lyrics_directory} is not a directory")
+    return parsed_arguments
+
+
 if __name__ == "__main__":
-    Main().run()
+    arguments = parse_arguments(sys.argv[1:])
+    api_caller.configure_cache()
+    al.configure_artist_index()
+    word_counter.configure_tokenizer(arguments.tokenizer)
+    song_sources.configure_song_source(arguments.song_source)
+    lyrics_providers.configure_lyrics_provider(
+        lyrics_providers.create_lyrics_provider(
+            arguments.lyrics_directory, arguments.hedge_percentile
+        )
+    )
+
+    artist_queries = list(arguments.artists)
+    if arguments.file:
+        artist_queries.extend(read_artist_queries(arguments.file))
+
+    try:
+        if artist_queries:
+            # Every artist being processed has its own pool of lyric requests
+            api_caller.configure_session(
+                pool_maxsize=max(1, arguments.concurrency) * al.DEFAULT_LYRIC_WORKERS
+            )
+            number_of_errors = run_batch(
+                artist_queries,
+                arguments.format,
+                arguments.concurrency,
+                arguments.count_titles_once,
+                arguments.detailed_statistics,
+                arguments.use_artist_index,
+            )
+            # stdout only has the records so they can be piped elsewhere
+            api_caller.metrics.display(file=sys.stderr)
+            sys.exit(1 if number_of_errors > 0 else 0)
+        else:
+            Main(open_results_store()).run()
+    finally:
+        if arguments.metrics_json:
+            api_caller.metrics.save(arguments.metrics_json)
@@ -0,0 +1,238 @@
+import json
+import math
+import threading
+from array import array
+from collections import deque
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+PERCENTILES = (50, 95, 99)
+# Latencies kept for get_recent_percentile, read on every hedged lookup
+RECENT_LATENCIES = 1000
+
+
+def _get_nearest_rank(latencies, percentile: float) -> float:
+    if len(latencies) == 0:
+        return None
+    sorted_latencies = sorted(latencies)
+    rank = math.ceil(percentile / 100 * len(sorted_latencies))
+    return sorted_latencies[max(0, rank - 1)]
+
+
+class EndpointMetrics:
+    """Counts, status codes, bytes received and latencies of one api endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.status_codes = {}
+        self.bytes_received = 0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self._latencies = array("d")
+        self.recent_latencies = deque(maxlen=RECENT_LATENCIES)
+
+    def record(self, status: str, number_of_bytes: int, latency: float) -> None:
+        """Records a request sent over the network
+
+        :str status: status code of the response, or "error" if there was no response
+        :int number_of_bytes: size of the response body
+        :float latency: seconds taken to get the response
+        :None returns:
+        """
+        self.requests += 1
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        self.bytes_received += number_of_bytes
+        self._latencies.append(latency)
+        self.recent_latencies.append(latency)
+        for index, upper_bound in enumerate(LATENCY_BUCKETS):
+            if latency <= upper_bound:
+                self.bucket_counts[index] += 1
+                break
+
+    def get_percentile(self, percentile: float) -> float:
+        """Gets a latency percentile using the nearest rank
+
+        :float percentile: percentile between 0 and 100
+        :float returns: latency in seconds, or None if nothing was recorded
+        """
+        return _get_nearest_rank(self._latencies, percentile)
+
+    def get_summary(self) -> dict:
+        """Returns the metrics as a dictionary
+
+        :dict returns: Dictionary of metrics
+        """
+        summary = {
+            "Requests": self.requests,
+            "Cache_hits": self.cache_hits,
+            "Coalesced": self.coalesced,
+            "Status_codes": dict(self.status_codes),
+            "Bytes_received": self.bytes_received,
+        }
+        for percentile in PERCENTILES:
+            summary[f"P{percentile}"] = self.get_percentile(percentile)
+        summary["Histogram"] = {
+            f"<={upper_bound}": count
+            for upper_bound, count in zip(LATENCY_BUCKETS, self.bucket_counts)
+        }
+        return summary
+
+
+class MetricsRegistry:
+    """Metrics of every endpoint, safe to record into from many threads"""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, endpoint: str, status: str, number_of_bytes: int, latency: float
+    ) -> None:
+        """Records a request sent over the network to an endpoint
+
+        :str endpoint: name of the endpoint e.g. "lyrics"
+        :str status: status code of the response, or "error" if there was no response
+        :int number_of_bytes: size of the response body
+        :float latency: seconds taken to get the response
+        :None returns:
+        """
+        with self._lock:
+            self._get_endpoint(endpoint).record(status, number_of_bytes, latency)
+
+    def record_cache_hit(self, endpoint: str) -> None:
+        """Records a request answered from the response cache
+
+        :str endpoint: name of the endpoint e.g. "lyrics"
+        :None returns:
+        """
+        with self._lock:
+            self._get_endpoint(endpoint).cache_hits += 1
+
+    def record_coalesced(self, endpoint: str) -> None:
+        """Records a request answered by waiting on an identical one already in flight
+
+        :str endpoint: name of the endpoint e.g. "lyrics"
+        :None returns:
+        """
+        with self._lock:
+            self._get_endpoint(endpoint).coalesced += 1
+
+    def get_summary(self) -> dict:
+        """Returns the metrics of every endpoint
+
+        :dict returns: Dictionary of endpoint name to its metrics
+        """
+        with self._lock:
+            return {
+                endpoint: endpoint_metrics.get_summary()
+                for endpoint, endpoint_metrics in self._endpoints.items()
+            }
+
+    def get_percentile(self, endpoint: str, percentile: float) -> float:
+        """Gets a latency percentile of one endpoint using the nearest rank
+
+        :str endpoint: name of the endpoint e.g. "lyrics"
+        :float percentile: percentile between 0 and 100
+        :float returns: latency in seconds, or None if nothing was recorded
+        """
+        with self._lock:
+            endpoint_metrics = self._endpoints.get(endpoint)
+            if endpoint_metrics == None:
+                return None
+            return endpoint_metrics.get_percentile(percentile)
+
+    def get_recent_percentile(self, endpoint: str, percentile: float) -> float:
+        """Gets a latency percentile of the last RECENT_LATENCIES requests to one
+            endpoint. Its cost doesn't grow with the session and the registry's
+            lock is only held to copy them
+
+        :str endpoint: name of the endpoint e.g. "lyrics"
+        :float percentile: percentile between 0 and 100
+        :float returns: latency in seconds, or None if nothing was recorded
+        """
+        with self._lock:
+            endpoint_metrics = self._endpoints.get(endpoint)
+            if endpoint_metrics == None:
+                return None
+            recent_latencies = list(endpoint_metrics.recent_latencies)
+        return _get_nearest_rank(recent_latencies, percentile)
+
+    def get_requests(self, endpoint: str) -> int:
+        """Gets the number of requests sent over the network to an endpoint
+
+        :str endpoint: name of the endpoint e.g. "lyrics"
+        :int returns: number of requests
+        """
+        with self._lock:
+            endpoint_metrics = self._endpoints.get(endpoint)
+            return endpoint_metrics.requests if endpoint_metrics != None else 0
+
+    def reset(self) -> None:
+        """Forgets everything recorded so far
+
+        :None returns:
+        """
+        with self._lock:
+            self._endpoints = {}
+
+    def save(self, path: str) -> None:
+        """Writes the metrics of every endpoint to a JSON file
+
+        :str path: path of the file
+        :None returns:
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.get_summary(), file, indent=2)
+
+    def display(self, file=None) -> None:
+        """Prints a table of the metrics of every endpoint
+
+        :file file: stream to print to, defaults to stdout
+        :None returns:
+        """
+        summary = self.get_summary()
+        print(
+            "{:<8} | {:>8} | {:>10} | {:>9} | {:>10} | {:>8} | {:>8} | {:>8} | {}".format(
+                "Endpoint",
+                "Requests",
+                "Cache hits",
+                "Coalesced",
+                "KiB",
+                "p50 (ms)",
+                "p95 (ms)",
+                "p99 (ms)",
+                "Status codes",
+            ),
+            file=file,
+        )
+        for endpoint, endpoint_summary in summary.items():
+            print(
+                "{:<8} | {:>8} | {:>10} | {:>9} | {:>10.1f} | {:>8} | {:>8} | {:>8} | {}".format(
+                    endpoint,
+                    endpoint_summary["Requests"],
+                    endpoint_summary["Cache_hits"],
+                    endpoint_summary["Coalesced"],
+                    endpoint_summary["Bytes_received"] / 1024,
+                    *(
+                        _format_milliseconds(endpoint_summary[f"P{percentile}"])
+                        for percentile in PERCENTILES
+                    ),
+                    ", ".join(
+                        f"{status}: {count}"
+                        for status, count in sorted(
+                            endpoint_summary["Status_codes"].items()
+                        )
+                    ),
+                ),
+                file=file,
+            )
+
+    def _get_endpoint(self, endpoint: str) -> EndpointMetrics:
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = EndpointMetrics()
+        return self._endpoints[endpoint]
+
+
+def _format_milliseconds(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}" if seconds != None else "N/A"
@@ -0,0 +1,172 @@
+import sys
+import threading
+import time
+from wordcount_accumulator import WordcountAccumulator
+
+# Default stream standing for whatever sys.stdout is at the time of printing,
+# so the output follows redirect_stdout and unittest's buffering
+STDOUT = object()
+
+
+def resolve_stream(stream):
+    """Gets the stream to print to, looking up sys.stdout for STDOUT
+
+    :stream: a stream, STDOUT or None
+    :returns: the stream, or None to print nothing
+    """
+    return sys.stdout if stream == STDOUT else stream
+
+
+def format_duration(seconds: float) -> str:
+    """Formats a number of seconds as e.g. "1h02m", "3m05s" or "12s"
+
+    :float seconds: number of seconds
+    :str returns: formatted duration
+    """
+    seconds = int(round(seconds))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours > 0:
+        return f"{hours}h{minutes:02d}m"
+    if minutes > 0:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressDisplay:
+    """Shows a single line that refreshes while lyric requests complete, with
+    the running statistics, requests per second, failure rate and ETA.
+
+    With stream=None nothing is printed but the counters are still kept, so
+    the progress can be read from another thread instead. By default it is
+    printed to sys.stdout as it is when printing.
+    """
+
+    bar_width = 10
+
+    def __init__(
+        self, stream=STDOUT, refresh_interval: float = 0.2, clock=time.monotonic
+    ):
+        self._stream = stream
+        self.refresh_interval = refresh_interval
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.accumulator = None
+        self._clock = clock
+        self._started_at = None
+        self._last_refresh = None
+        self._line_length = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stream(self):
+        return resolve_stream(self._stream)
+
+    def start(self, total: int, accumulator: WordcountAccumulator = None) -> None:
+        """Starts showing progress
+
+        :int total: number of requests that will be made
+        :WordcountAccumulator accumulator: running statistics to show
+        :None returns:
+        """
+        with self._lock:
+            self.total = total
+            self.completed = 0
+            self.failed = 0
+            self.accumulator = accumulator
+            self._started_at = self._clock()
+            self._last_refresh = None
+        self._refresh(force=True)
+
+    def update(self, succeeded: bool) -> None:
+        """Records a completed request and refreshes the line if it is due
+
+        :bool succeeded: whether the request got a wordcount
+        :None returns:
+        """
+        with self._lock:
+            self.completed += 1
+            self.failed += 0 if succeeded else 1
+        self._refresh()
+
+    def finish(self) -> None:
+        """Refreshes the line one last time and moves onto a new line
+
+        :None returns:
+        """
+        self._refresh(force=True)
+        if self.stream != None:
+            print(" = Completed", file=self.stream, flush=True)
+
+    @property
+    def requests_per_second(self) -> float:
+        if self._started_at == None:
+            return 0.0
+        elapsed = self._clock() - self._started_at
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failed / self.completed if self.completed > 0 else 0.0
+
+    @property
+    def eta(self) -> float:
+        """Seconds left at the current rate, or None before the first request completes"""
+        requests_per_second = self.requests_per_second
+        if requests_per_second == 0:
+            return None
+        return (self.total - self.completed) / requests_per_second
+
+    def get_status_line(self) -> str:
+        """Builds the progress line
+
+        :str returns: progress line
+        """
+        filled = (
+            self.bar_width * self.completed // self.total
+            if self.total > 0
+            else self.bar_width
+        )
+        sections = [
+            "[{}{}] {}/{}".format(
+                "#" * filled,
+                " " * (self.bar_width - filled),
+                self.completed,
+                self.total,
+            )
+        ]
+        if self.accumulator != None:
+            statistics = self.accumulator.get_statistics()
+            mean = statistics["Mean"]
+            sections.append(
+                "Mean: {} Min: {} Max: {} Std_dev: {:.1f}".format(
+                    f"{mean:.1f}" if mean != None else "N/A",
+                    statistics["Min"],
+                    statistics["Max"],
+                    statistics["Std_dev"],
+                )
+            )
+        eta = self.eta
+        sections.append(f"{self.requests_per_second:.1f} req/s")
+        sections.append(f"{self.failure_rate:.1%} failed")
+        sections.append("ETA " + (format_duration(eta) if eta != None else "N/A"))
+        return " | ".join(sections)
+
+    def _refresh(self, force: bool = False) -> None:
+        if self.stream == None:
+            return
+        now = self._clock()
+        with self._lock:
+            if (
+                not force
+                and self._last_refresh != None
+                and now - self._last_refresh < self.refresh_interval
+            ):
+                return
+            self._last_refresh = now
+            line = self.get_status_line()
+            # Pads with spaces to clear what is left of a longer previous line
+            padding = " " * max(0, self._line_length - len(line))
+            self._line_length = len(line)
+            print("\r" + line + padding, end="", file=self.stream, flush=True)
@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Paces requests to a single host at a given rate.
+
+    Each request takes one token, tokens refill at `rate` per second and at
+    most `capacity` can be saved up for a burst. When the host throttles us the
+    rate is halved (down to min_rate) and recovers a step at a time on success.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        min_rate: float = None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate != None else rate / 16
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        # Theoretical arrival time of the next request, every reservation
+        # pushes it on by one interval so waiting callers queue up in order
+        self._next_arrival = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token from the bucket
+
+        :float returns: seconds the caller must wait before sending its request
+        """
+        with self._lock:
+            now = self._clock()
+            interval = 1 / self.rate
+            self._next_arrival = max(self._next_arrival, now) + interval
+            send_at = self._next_arrival - self.capacity * interval
+            return max(0.0, send_at - now)
+
+    def acquire(self) -> None:
+        """Takes a token from the bucket, sleeping until the request may be sent
+
+        :None returns:
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+    def penalize(self, delay: float) -> None:
+        """Called when the host throttles a request. Halves the rate and stops
+        new requests being sent for at least delay seconds
+
+        :float delay: seconds to hold off, e.g. from a Retry-After header
+        :None returns:
+        """
+        with self._lock:
+            now = self._clock()
+            self.rate = max(self.min_rate, self.rate / 2)
+            interval = 1 / self.rate
+            # The next reservation is sent at _next_arrival + interval - capacity * interval
+            earliest_arrival = now + delay + (self.capacity - 1) * interval
+            self._next_arrival = max(self._next_arrival, earliest_arrival)
+
+    def on_success(self) -> None:
+        """Called when a request succeeds, steps the rate back up towards max_rate
+
+        :None returns:
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
@@ -0,0 +1,200 @@
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+# Seconds a cached response stays fresh for, by endpoint
+DEFAULT_TTLS = {
+    "artist": 24 * 60 * 60,
+    "works": 24 * 60 * 60,
+    "recordings": 24 * 60 * 60,
+    "releases": 24 * 60 * 60,
+    "lyrics": 30 * 24 * 60 * 60,
+}
+# Seconds the api is trusted to still have nothing at a url after a 404, by
+# endpoint. Shorter than DEFAULT_TTLS as missing lyrics do get added eventually
+DEFAULT_NOT_FOUND_TTLS = {"lyrics": 7 * 24 * 60 * 60}
+DEFAULT_MAX_ENTRIES = 100_000
+# Seconds a hit leaves last_access as it is for, so most hits don't write.
+# The least recently used entries are only told apart to within this long
+DEFAULT_ACCESS_INTERVAL = 60
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a url so equivalent requests share a cache entry.
+        Scheme and host are lower cased, the path is re-quoted consistently
+        and the query parameters are sorted
+
+    :str url: url to normalize
+    :str returns: normalized url
+    """
+    parts = urlsplit(url)
+    path = quote(unquote(parts.path), safe="/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+class ResponseCache:
+    """SQLite backed cache of api responses keyed by normalized url.
+
+    Entries expire after the ttl of their endpoint and once there are more
+    than max_entries the least recently used are evicted. Urls the api had
+    nothing at (404) are stored too, with the shorter not_found_ttls, for the
+    endpoints that have one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttls: dict = None,
+        clock=time.time,
+        not_found_ttls: dict = None,
+        access_interval: float = DEFAULT_ACCESS_INTERVAL,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.not_found_ttls = dict(DEFAULT_NOT_FOUND_TTLS, **(not_found_ttls or {}))
+        self.access_interval = access_interval
+        self.hits = 0
+        self.not_found_hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                body TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        (self._size,) = self._connection.execute(
+            "SELECT COUNT(*) FROM responses"
+        ).fetchone()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, url: str) -> dict:
+        """Gets the cached response body of a url
+
+        :str url: url of the request
+        :dict returns: response body, or None if not cached or expired
+        """
+        entry = self.get_entry(url)
+        return entry[1] if entry != None else None
+
+    def get_entry(self, url: str) -> tuple:
+        """Gets the cached status code and response body of a url
+
+        :str url: url of the request
+        :tuple returns: status code and response body, or None if not cached or expired
+        """
+        key = normalize_url(url)
+        now = self._clock()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status, body, expires_at, last_access FROM responses "
+                "WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row == None or row[2] <= now:
+                if row != None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+
+            if now - row[3] >= self.access_interval:
+                self._connection.execute(
+                    "UPDATE responses SET last_access = ? WHERE url = ?", (now, key)
+                )
+            if row[0] < 400:
+                self.hits += 1
+            else:
+                self.not_found_hits += 1
+        return row[0], json.loads(row[1])
+
+    def set(self, url: str, endpoint: str, body: dict, status: int = 200) -> None:
+        """Stores the response body of a url
+
+        :str url: url of the request
+        :str endpoint: name of the endpoint, used to look up the ttl
+        :dict body: response body
+        :int status: status code of the response, 404 uses the not_found_ttls
+        :None returns:
+        """
+        ttls = self.ttls if status < 400 else self.not_found_ttls
+        if ttls.get(endpoint, 0) <= 0:
+            # The entry would have expired before it could be read
+            return
+        key = normalize_url(url)
+        now = self._clock()
+        expires_at = now + ttls[endpoint]
+        with self._lock:
+            is_new = (
+                self._connection.execute(
+                    "SELECT 1 FROM responses WHERE url = ?", (key,)
+                ).fetchone()
+                == None
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, status, json.dumps(body), expires_at, now),
+            )
+            self._size += 1 if is_new else 0
+            if self._size > self.max_entries:
+                self._evict(self._size - self.max_entries)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache
+
+        :None returns:
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._size = 0
+
+    def close(self) -> None:
+        """Closes the database connection
+
+        :None returns:
+        """
+        with self._lock:
+            self._connection.close()
+
+    def get_statistics(self) -> dict:
+        """Returns the hit and miss counters and the number of entries.
+            Not_found_hits are hits on urls the api had nothing at
+
+        :dict returns: Dictionary of cache statistics
+        """
+        return {
+            "Hits": self.hits,
+            "Not_found_hits": self.not_found_hits,
+            "Misses": self.misses,
+            "Entries": self._size,
+        }
+
+    def _delete(self, key: str) -> None:
+        self._connection.execute("DELETE FROM responses WHERE url = ?", (key,))
+        self._size -= 1
+
+    def _evict(self, number_of_entries: int) -> None:
+        self._connection.execute(
+            """DELETE FROM responses WHERE url IN (
+                SELECT url FROM responses ORDER BY last_access LIMIT ?
+            )""",
+            (number_of_entries,),
+        )
+        self._size -= number_of_entries
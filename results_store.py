@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import artist
+import song
+
+DEFAULT_RESULTS_PATH = os.path.join(
+    os.path.expanduser("~"), ".airelogic_cli", "results.sqlite3"
+)
+
+
+class ResultsStore:
+    """SQLite backed store of processed artists keyed by mbid.
+
+    Holds the name, the wordcount of every song, the statistics and when the
+    songs were fetched, so an artist can be loaded again without any requests.
+    """
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS artists (
+                mbid TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                statistics TEXT,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS songs (
+                artist_mbid TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                wordcount INTEGER,
+                work_id TEXT,
+                PRIMARY KEY (artist_mbid, position)
+            )"""
+        )
+        song_columns = [
+            column[1] for column in self._connection.execute("PRAGMA table_info(songs)")
+        ]
+        if "work_id" not in song_columns:
+            # Stores made before work ids were kept, their songs all count as new
+            self._connection.execute("ALTER TABLE songs ADD COLUMN work_id TEXT")
+
+    def __contains__(self, mbid: str) -> bool:
+        with self._lock:
+            return (
+                self._connection.execute(
+                    "SELECT 1 FROM artists WHERE mbid = ?", (mbid,)
+                ).fetchone()
+                != None
+            )
+
+    def save(self, artist_: artist.Artist) -> None:
+        """Stores an artist, replacing what was stored for its mbid before.
+            The artist's fetched_at is set to now if it hasn't got one
+
+        :artist.Artist artist_: Artist with an mbid and song list
+        :None returns:
+        """
+        if artist_.fetched_at == None:
+            artist_.fetched_at = self._clock()
+        statistics = (
+            json.dumps(artist_.statistics) if artist_.has_statistics() else None
+        )
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._delete(artist_.mbid)
+                self._connection.execute(
+                    "INSERT INTO artists VALUES (?, ?, ?, ?)",
+                    (artist_.mbid, artist_.name, statistics, artist_.fetched_at),
+                )
+                self._connection.executemany(
+                    "INSERT INTO songs VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (
+                            artist_.mbid,
+                            position,
+                            song_.title,
+                            song_.wordcount if song_.has_wordcount else None,
+                            song_.work_id,
+                        )
+                        for position, song_ in enumerate(artist_.song_list)
+                    ),
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def load(self, mbid: str) -> artist.Artist:
+        """Loads a stored artist, its songs have their wordcounts but no lyrics
+
+        :str mbid: mbid of the artist
+        :artist.Artist returns: The stored artist, or None if it isn't stored
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT name, statistics, fetched_at FROM artists WHERE mbid = ?",
+                (mbid,),
+            ).fetchone()
+            if row == None:
+                return None
+            song_rows = self._connection.execute(
+                "SELECT title, wordcount, work_id FROM songs WHERE artist_mbid = ? "
+                "ORDER BY position",
+                (mbid,),
+            ).fetchall()
+
+        name, statistics, fetched_at = row
+        artist_ = artist.Artist(name)
+        artist_.mbid = mbid
+        artist_.fetched_at = fetched_at
+        for title, wordcount, work_id in song_rows:
+            song_ = song.Song(title, artist_.wordcount_accumulator, work_id)
+            if wordcount != None:
+                song_.assign_wordcount(wordcount)
+            artist_.song_list.append(song_)
+        if statistics != None:
+            artist_.statistics = json.loads(statistics)
+        return artist_
+
+    def save_wordcounts(self, mbid: str, wordcounts: list) -> None:
+        """Updates the wordcounts of some of a stored artist's songs
+
+        :str mbid: mbid of the artist
+        :list wordcounts: List of (position in song list, wordcount) tuples
+        :None returns:
+        """
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "UPDATE songs SET wordcount = ? "
+                    "WHERE artist_mbid = ? AND position = ?",
+                    ((wordcount, mbid, position) for position, wordcount in wordcounts),
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def get_unfinished_mbids(self) -> list:
+        """Gets the stored artists whose songs were fetched but not their
+            statistics, because the job fetching their lyrics was interrupted.
+            Artists without songs never get statistics so aren't included
+
+        :list returns: List of mbids
+        """
+        with self._lock:
+            return [
+                mbid
+                for (mbid,) in self._connection.execute(
+                    "SELECT mbid FROM artists WHERE statistics IS NULL "
+                    "AND EXISTS "
+                    "(SELECT 1 FROM songs WHERE artist_mbid = artists.mbid) "
+                    "ORDER BY fetched_at"
+                )
+            ]
+
+    def delete(self, mbid: str) -> None:
+        """Removes a stored artist and its songs
+
+        :str mbid: mbid of the artist
+        :None returns:
+        """
+        with self._lock:
+            self._delete(mbid)
+
+    def close(self) -> None:
+        """Closes the database connection
+
+        :None returns:
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _delete(self, mbid: str) -> None:
+        self._connection.execute("DELETE FROM artists WHERE mbid = ?", (mbid,))
+        self._connection.execute("DELETE FROM songs WHERE artist_mbid = ?", (mbid,))
+
+
+def open_results_store(path: str = DEFAULT_RESULTS_PATH) -> ResultsStore:
+    """Opens the results store at path, creating its directory if needed
+
+    :str path: path of the SQLite database
+    :ResultsStore returns: The results store
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return ResultsStore(path)
+
+
+class ArtistCheckpoint:
+    """Writes the wordcounts of an artist's songs to a ResultsStore as their
+    lyrics arrive, so an interrupted job can carry on from where it stopped.
+
+    Wordcounts are written a batch at a time, at most every flush_interval
+    seconds, rather than a transaction per song.
+    """
+
+    def __init__(
+        self,
+        results_store: ResultsStore,
+        artist_: artist.Artist,
+        flush_interval: float = 1.0,
+        clock=time.monotonic,
+    ):
+        self.results_store = results_store
+        self.artist = artist_
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._positions = {
+            id(song_): position for position, song_ in enumerate(artist_.song_list)
+        }
+        self._pending_songs = []
+        self._last_flush = clock()
+
+    def song_group_done(self, song_group: list) -> None:
+        """Records songs that have been given a wordcount, writing them
+            to the store if a flush is due
+
+        :list song_group: Songs that now have a wordcount
+        :None returns:
+        """
+        self._pending_songs.extend(song_group)
+        if self._clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the recorded wordcounts to the store
+
+        :None returns:
+        """
+        wordcounts = [
+            (self._positions[id(song_)], song_.wordcount)
+            for song_ in self._pending_songs
+            if song_.has_wordcount and id(song_) in self._positions
+        ]
+        self._pending_songs = []
+        self._last_flush = self._clock()
+        if wordcounts != []:
+            self.results_store.save_wordcounts(self.artist.mbid, wordcounts)
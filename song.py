@@ -1,25 +1,67 @@
+import word_counter
+from wordcount_accumulator import WordcountAccumulator
+
+
 class Song:
-    def __init__(self, title: str):
+    # Slots keep each song small, an artist can have thousands of them
+    __slots__ = (
+        "title",
+        "has_wordcount",
+        "lyrics",
+        "wordcount",
+        "accumulator",
+        "work_id",
+        "work_type",
+        "language",
+    )
+
+    def __init__(
+        self, title: str, accumulator: WordcountAccumulator = None, work_id: str = None
+    ):
         self.title = title
+        # MusicBrainz id of the work, used to tell which songs changed on a refresh.
+        # Songs of a recording not linked to a work have the recording's id
+        self.work_id = work_id
+        # Type and language of the work, when the song source lists them
+        self.work_type = None
+        self.language = None
         self.has_wordcount = False
         self.lyrics = None
+        self.accumulator = accumulator
 
-    def assign_lyrics(self, lyrics: str | None) -> None:
+    def assign_lyrics(self, lyrics: str | None, retain_lyrics: bool = True) -> None:
         """Assigns lyrics to the obejct, calculates the wordcount,
-        and sets has_wordcount = True if lyrics != None
+        and sets has_wordcount = True if lyrics != None.
 
         :param lyrics: The lyrics the to assign to the song
         :type lyrics: None or str
+        :bool retain_lyrics: If False the lyrics are dropped once they are counted
         :None returns:
         """
         if lyrics != None:
             self.lyrics = lyrics
-            self.wordcount = self.get_word_count()
-            self.has_wordcount = True
+            self.assign_wordcount(self.get_word_count())
+            if not retain_lyrics:
+                self.lyrics = None
+
+    def assign_wordcount(self, wordcount: int) -> None:
+        """Assigns the wordcount of the song and sets has_wordcount = True.
+        The wordcount is added to the song's accumulator if it has one
+
+        :int wordcount: number of words in the song
+        :None returns:
+        """
+        if self.has_wordcount and self.accumulator != None:
+            self.accumulator.remove(self.wordcount)
+        self.wordcount = wordcount
+        self.has_wordcount = True
+        if self.accumulator != None:
+            self.accumulator.add(wordcount)
 
     def get_word_count(self) -> int:
         """Calculates the number of words in the lyrics field
+        with the tokenizer configured in word_counter
 
         :int returns: number of words in the lyrics attribute
         """
-        return len(self.lyrics.split())
+        return word_counter.count_words(self.lyrics)
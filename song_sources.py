@@ -0,0 +1,251 @@
+import api_caller
+import async_api_caller
+import song
+from custom_exceptions import BreakLoopError
+from wordcount_accumulator import WordcountAccumulator
+
+DEFAULT_SONG_SOURCE = "works"
+
+
+class SongSource:
+    """Where an artist's songs are listed on MusicBrainz. The list is fetched a
+    page at a time by offset, subclasses decide which endpoint is asked and
+    how the songs are read from a page
+    """
+
+    # Name of the endpoint in api_caller's metrics and cache
+    endpoint = None
+    # Key of the response's total number of items, and of the items themselves
+    count_key = None
+    items_key = None
+    page_limit = api_caller.WORKS_PAGE_LIMIT
+    # Whether every page but the last holds page_limit items, so the offsets
+    # of the remaining pages can be planned from the first
+    full_pages = True
+
+    def get_page(self, artist_mbid: str, offset: int) -> dict:
+        """Requests a page of the artist's items
+
+        :str artist_mbid: mbid of the artist
+        :int offset: number of items to skip
+        :dict returns: response from api as dictionary
+        :raises LookupError: if api status_code >= 400
+        """
+        raise NotImplementedError
+
+    async def get_page_async(self, artist_mbid: str, offset: int) -> dict:
+        """Async version of get_page"""
+        raise NotImplementedError
+
+    def get_count(self, response: dict) -> int:
+        """Gets the total number of items the artist has
+
+        :dict response: first page of items
+        :int returns: number of items, or None if the response doesn't say
+        """
+        return response.get(self.count_key)
+
+    def get_number_of_items(self, response: dict) -> int:
+        """Gets the number of items in a page, which can differ from its number of songs
+
+        :dict response: page of items
+        :int returns: number of items
+        """
+        return len(response.get(self.items_key) or [])
+
+    def get_songs(
+        self, response: dict, accumulator: WordcountAccumulator = None
+    ) -> list:
+        """Gets the songs of a page
+
+        :dict response: page of items
+        :WordcountAccumulator accumulator: accumulator the songs add their wordcount to
+        :list returns: List of songs
+        :raises BreakLoopError: if the response has no items attribute
+        """
+        raise NotImplementedError
+
+    def deduplicate(self, song_list: list) -> list:
+        """Removes songs listed more than once, keeping the first of each
+
+        :list song_list: every song from every page
+        :list returns: List of songs
+        """
+        return song_list
+
+
+class WorksSource(SongSource):
+    """Works the artist is credited on. One request per hundred songs, but
+    groups whose works are credited to their members have few or none
+    """
+
+    endpoint = "works"
+    count_key = "work-count"
+    items_key = "works"
+    page_limit = api_caller.WORKS_PAGE_LIMIT
+
+    def get_page(self, artist_mbid: str, offset: int) -> dict:
+        return api_caller.get_songs_from_artist_mbid(artist_mbid, offset)
+
+    async def get_page_async(self, artist_mbid: str, offset: int) -> dict:
+        return await async_api_caller.get_songs_from_artist_mbid(artist_mbid, offset)
+
+    def get_songs(
+        self, response: dict, accumulator: WordcountAccumulator = None
+    ) -> list:
+        try:
+            return [
+                _create_song(work["title"], accumulator, work.get("id"), work)
+                for work in response["works"]
+            ]
+        except KeyError:
+            raise BreakLoopError("Response has no works attribute")
+
+
+class RecordingsSource(SongSource):
+    """Recordings the artist performs, with the works they are performances
+    of. Every live version and remaster is a recording so there are more pages,
+    but groups are covered and songs of the same work are listed once
+    """
+
+    endpoint = "recordings"
+    count_key = "recording-count"
+    items_key = "recordings"
+    page_limit = api_caller.RECORDINGS_PAGE_LIMIT
+
+    def get_page(self, artist_mbid: str, offset: int) -> dict:
+        return api_caller.get_recordings_from_artist_mbid(artist_mbid, offset)
+
+    async def get_page_async(self, artist_mbid: str, offset: int) -> dict:
+        return await async_api_caller.get_recordings_from_artist_mbid(
+            artist_mbid, offset
+        )
+
+    def get_songs(
+        self, response: dict, accumulator: WordcountAccumulator = None
+    ) -> list:
+        try:
+            recordings = response["recordings"]
+        except KeyError:
+            raise BreakLoopError("Response has no recordings attribute")
+
+        song_list = []
+        for recording in recordings:
+            works = [
+                relation["work"]
+                for relation in recording.get("relations") or []
+                if relation.get("work") != None
+            ]
+            if works == []:
+                # Not linked to a work yet, the recording stands in for it
+                song_list.append(
+                    _create_song(recording["title"], accumulator, recording.get("id"))
+                )
+            for work in works:
+                song_list.append(
+                    _create_song(work["title"], accumulator, work.get("id"), work)
+                )
+        return song_list
+
+    def deduplicate(self, song_list: list) -> list:
+        return _deduplicate(song_list, lambda song_: song_.work_id or song_.title)
+
+
+class ReleasesSource(SongSource):
+    """Tracks of the artist's official releases. Each request brings back the
+    track lists of many releases, so it takes the fewest requests, but songs
+    not yet linked to a work have no work type or language
+    """
+
+    endpoint = "releases"
+    count_key = "release-count"
+    items_key = "releases"
+    page_limit = api_caller.RELEASES_PAGE_LIMIT
+    # MusicBrainz caps a page of releases with their recordings by its number
+    # of tracks, so it can hold fewer releases than the limit asked for
+    full_pages = False
+
+    def get_page(self, artist_mbid: str, offset: int) -> dict:
+        return api_caller.get_releases_from_artist_mbid(artist_mbid, offset)
+
+    async def get_page_async(self, artist_mbid: str, offset: int) -> dict:
+        return await async_api_caller.get_releases_from_artist_mbid(artist_mbid, offset)
+
+    def get_songs(
+        self, response: dict, accumulator: WordcountAccumulator = None
+    ) -> list:
+        try:
+            releases = response["releases"]
+        except KeyError:
+            raise BreakLoopError("Response has no releases attribute")
+
+        song_list = []
+        for release in releases:
+            for medium in release.get("media") or []:
+                for track in medium.get("tracks") or []:
+                    recording = track.get("recording") or {}
+                    song_list.append(
+                        _create_song(
+                            recording.get("title", track.get("title")),
+                            accumulator,
+                            recording.get("id"),
+                        )
+                    )
+        return song_list
+
+    def deduplicate(self, song_list: list) -> list:
+        # Albums, singles and compilations repeat the same tracks
+        return _deduplicate(song_list, lambda song_: song_.title.casefold())
+
+
+def _create_song(
+    title: str, accumulator: WordcountAccumulator, work_id: str, work: dict = None
+) -> song.Song:
+    song_ = song.Song(title, accumulator, work_id)
+    if work != None:
+        song_.work_type = work.get("type")
+        song_.language = work.get("language")
+    return song_
+
+
+def _deduplicate(song_list: list, get_key) -> list:
+    keys = set()
+    unique_song_list = []
+    for song_ in song_list:
+        key = get_key(song_)
+        if key not in keys:
+            keys.add(key)
+            unique_song_list.append(song_)
+    return unique_song_list
+
+
+SONG_SOURCES = {
+    "works": WorksSource(),
+    "recordings": RecordingsSource(),
+    "releases": ReleasesSource(),
+}
+
+_song_source = SONG_SOURCES[DEFAULT_SONG_SOURCE]
+
+
+def configure_song_source(song_source) -> None:
+    """Sets where the songs of every artist are listed from
+
+    :param song_source: name of one of the SONG_SOURCES, or a SongSource
+    :type song_source: str or SongSource
+    :None returns:
+    :raises KeyError: if there is no song source with the given name
+    """
+    global _song_source
+
+    _song_source = (
+        SONG_SOURCES[song_source] if isinstance(song_source, str) else song_source
+    )
+
+
+def get_song_source() -> SongSource:
+    """Gets where the songs of every artist are listed from
+
+    :SongSource returns: The configured song source
+    """
+    return _song_source
@@ -0,0 +1,128 @@
+import bisect
+import math
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    # The same statistics are calculated in pure python, just more slowly
+    numpy = None
+
+# Median and IQR are always included as well
+PERCENTILES = (25, 75, 90, 99)
+# Lower edges of the histogram bins in words, the last bin has no upper edge.
+# Fixed rather than fitted to each artist so histograms can be compared
+HISTOGRAM_BIN_EDGES = (0, 50, 100, 150, 200, 300, 400, 500, 750, 1000)
+
+
+def get_histogram_labels(bin_edges: tuple = HISTOGRAM_BIN_EDGES) -> list:
+    """Gets the label of each histogram bin e.g. "100-149" or "1000+"
+
+    :tuple bin_edges: lower edges of the bins
+    :list returns: List of labels
+    """
+    labels = [f"{low}-{high - 1}" for low, high in zip(bin_edges, bin_edges[1:])]
+    return labels + [f"{bin_edges[-1]}+"]
+
+
+def get_statistics(wordcounts: array, bin_edges: tuple = HISTOGRAM_BIN_EDGES) -> dict:
+    """Calculates the statistics of the wordcounts of an artist's songs. Has the
+        same keys as WordcountAccumulator.get_statistics, plus the median,
+        PERCENTILES, interquartile range and a histogram.
+        Uses numpy if it is installed
+
+    :array wordcounts: wordcount of each song, an array("I") is read by numpy without copying
+    :tuple bin_edges: lower edges of the histogram bins
+    :dict returns: Dictionary of statistics
+    """
+    if len(wordcounts) == 0:
+        statistics_dict = {
+            "Mean": None,
+            "Max": 0,
+            "Min": 0,
+            "Variance": 0,
+            "Std_dev": 0,
+        }
+        statistics_dict["Median"] = None
+        statistics_dict.update({f"P{percentile}": None for percentile in PERCENTILES})
+        statistics_dict["Iqr"] = None
+        histogram_counts = [0] * len(bin_edges)
+    elif numpy != None:
+        statistics_dict, histogram_counts = _get_statistics_with_numpy(
+            wordcounts, bin_edges
+        )
+    else:
+        statistics_dict, histogram_counts = _get_statistics_in_python(
+            wordcounts, bin_edges
+        )
+
+    statistics_dict["Histogram"] = dict(
+        zip(get_histogram_labels(bin_edges), histogram_counts)
+    )
+    return statistics_dict
+
+
+def _get_statistics_with_numpy(wordcounts: array, bin_edges: tuple) -> tuple:
+    if isinstance(wordcounts, array) and wordcounts.typecode == "I":
+        values = numpy.frombuffer(wordcounts, dtype=numpy.uintc)
+    else:
+        values = numpy.asarray(wordcounts)
+    percentiles = numpy.percentile(values, (50, 25, 75) + PERCENTILES)
+    variance = float(values.var())
+    statistics_dict = {
+        "Mean": float(values.mean()),
+        "Max": int(values.max()),
+        "Min": int(values.min()),
+        "Variance": variance,
+        "Std_dev": variance ** 0.5,
+        "Median": float(percentiles[0]),
+    }
+    for percentile, value in zip(PERCENTILES, percentiles[3:]):
+        statistics_dict[f"P{percentile}"] = float(value)
+    statistics_dict["Iqr"] = float(percentiles[2] - percentiles[1])
+
+    bin_indexes = numpy.searchsorted(bin_edges, values, side="right") - 1
+    histogram_counts = numpy.bincount(
+        bin_indexes[bin_indexes >= 0], minlength=len(bin_edges)
+    )
+    return statistics_dict, [int(count) for count in histogram_counts]
+
+
+def _get_statistics_in_python(wordcounts: array, bin_edges: tuple) -> tuple:
+    sorted_values = sorted(wordcounts)
+    count = len(sorted_values)
+    mean = math.fsum(sorted_values) / count
+    variance = math.fsum((value - mean) ** 2 for value in sorted_values) / count
+    statistics_dict = {
+        "Mean": mean,
+        "Max": sorted_values[-1],
+        "Min": sorted_values[0],
+        "Variance": variance,
+        "Std_dev": variance ** 0.5,
+        "Median": _get_percentile(sorted_values, 50),
+    }
+    for percentile in PERCENTILES:
+        statistics_dict[f"P{percentile}"] = _get_percentile(sorted_values, percentile)
+    statistics_dict["Iqr"] = _get_percentile(sorted_values, 75) - _get_percentile(
+        sorted_values, 25
+    )
+
+    histogram_counts = [0] * len(bin_edges)
+    # Values are sorted so each bin is a slice found by bisecting its edges
+    bin_starts = [bisect.bisect_left(sorted_values, edge) for edge in bin_edges]
+    for index, start in enumerate(bin_starts):
+        end = bin_starts[index + 1] if index + 1 < len(bin_starts) else count
+        histogram_counts[index] = end - start
+    return statistics_dict, histogram_counts
+
+
+def _get_percentile(sorted_values: list, percentile: float) -> float:
+    # Linear interpolation between the closest ranks, the same as numpy's default
+    position = (len(sorted_values) - 1) * percentile / 100
+    lower_index = math.floor(position)
+    upper_index = min(lower_index + 1, len(sorted_values) - 1)
+    fraction = position - lower_index
+    return float(
+        sorted_values[lower_index]
+        + (sorted_values[upper_index] - sorted_values[lower_index]) * fraction
+    )
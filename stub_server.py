@@ -0,0 +1,365 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+STUB_ARTIST_NAME = "Stub Artist"
+STUB_ARTIST_MBID = "00000000-0000-4000-8000-000000000000"
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive needs HTTP/1.1, the session pools depend on it
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without this every response
+    # waits on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.server.stub.handle_request(self)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when many clients connect at once
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients hang up on slow responses they no longer need, e.g. the
+        # loser of a hedged request, which isn't worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Local HTTP server answering like MusicBrainz and lyrics.ovh, for benchmarks.
+
+    Every response is delayed by a random latency (mean latency, standard
+    deviation jitter), slow_rate of them by slow_latency more to give the
+    latencies a long tail, error_rate of requests are answered with a 503 and
+    lyric_miss_rate of songs have no lyrics. The artist has catalog_size works,
+    each with a recording (every fourth also has a live one) and all but every
+    seventh on an album of ten tracks (every third album has a deluxe edition).
+    Serves /ws/2/... like MusicBrainz, /v1/... like lyrics.ovh and the request
+    counts at /_stats. Run this module to serve from a separate process so the
+    server doesn't compete with the code being benchmarked for the GIL.
+    """
+
+    def __init__(
+        self,
+        catalog_size: int = 500,
+        latency: float = 0.05,
+        jitter: float = 0.01,
+        error_rate: float = 0.0,
+        lyric_miss_rate: float = 0.1,
+        words_per_song: int = 250,
+        seed: int = 0,
+        port: int = 0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 1.0,
+    ):
+        self.catalog_size = catalog_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.lyric_miss_rate = lyric_miss_rate
+        self.words_per_song = words_per_song
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.request_counts = {
+            "artist": 0,
+            "works": 0,
+            "recordings": 0,
+            "releases": 0,
+            "lyrics": 0,
+            "errors": 0,
+        }
+        self._recordings = self._create_recordings()
+        self._releases = self._create_releases()
+        self._random = random.Random(seed)
+        self._seed = seed
+        self._lock = threading.Lock()
+        self._server = _StubHTTPServer(("127.0.0.1", port), _StubRequestHandler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        """Starts serving requests on a background thread
+
+        :StubServer returns: the started server
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serves requests on the current thread until the server is stopped
+
+        :None returns:
+        """
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stops the server and closes its socket
+
+        :None returns:
+        """
+        if self._thread != None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def total_requests(self) -> int:
+        return sum(
+            count for kind, count in self.request_counts.items() if kind != "errors"
+        )
+
+    def get_title(self, index: int) -> str:
+        """Gets the title of a work in the catalog, some are versions of another
+        work so the catalog has duplicate titles like the real api
+
+        :int index: position of the work in the catalog
+        :str returns: title of the work
+        """
+        if index % 10 == 9:
+            return f"Song {index - 1} (Live)"
+        return f"Song {index}"
+
+    def handle_request(self, handler: BaseHTTPRequestHandler) -> None:
+        """Answers a single request, called from the server's handler threads
+
+        :BaseHTTPRequestHandler handler: handler of the request
+        :None returns:
+        """
+        parts = urlsplit(handler.path)
+        path = unquote(parts.path)
+        query = parse_qs(parts.query)
+
+        if path == "/_stats":
+            with self._lock:
+                return self._send(handler, 200, dict(self.request_counts))
+        if path.startswith("/ws/2/work"):
+            kind = "works"
+        elif path.startswith("/ws/2/recording"):
+            kind = "recordings"
+        elif path.startswith("/ws/2/release"):
+            kind = "releases"
+        elif path.startswith("/ws/2/artist"):
+            kind = "artist"
+        elif path.startswith("/v1/"):
+            kind = "lyrics"
+        else:
+            return self._send(handler, 404, {"error": "Not found"})
+
+        with self._lock:
+            self.request_counts[kind] += 1
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+            if self._random.random() < self.slow_rate:
+                delay += self.slow_latency
+            is_error = self._random.random() < self.error_rate
+            if is_error:
+                self.request_counts["errors"] += 1
+        time.sleep(delay)
+
+        if is_error:
+            return self._send(handler, 503, {"error": "Service unavailable"})
+        if kind == "artist":
+            return self._send(handler, 200, self._get_artist_body(path))
+        if kind == "lyrics":
+            return self._send_lyrics(handler, path.rsplit("/", 1)[-1])
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["25"])[0])
+        if kind == "works":
+            return self._send(handler, 200, self._get_works_body(offset, limit))
+        if kind == "recordings":
+            return self._send(
+                handler,
+                200,
+                self._get_page_body("recording", self._recordings, offset, limit),
+            )
+        return self._send(
+            handler, 200, self._get_page_body("release", self._releases, offset, limit)
+        )
+
+    def _get_work(self, index: int) -> dict:
+        return {
+            "id": str(uuid.UUID(int=index + 1)),
+            "title": self.get_title(index),
+            "type": "Song",
+            "language": "eng",
+        }
+
+    def _create_recordings(self) -> list:
+        recordings = []
+        for index in range(self.catalog_size):
+            work = self._get_work(index)
+            relations = [{"type": "performance", "work": work}]
+            recordings.append(
+                {
+                    "id": str(uuid.UUID(int=(1 << 64) + index)),
+                    "title": work["title"],
+                    "relations": relations,
+                }
+            )
+            if index % 4 == 3:
+                recordings.append(
+                    {
+                        "id": str(uuid.UUID(int=(2 << 64) + index)),
+                        "title": f"{work['title']} (Live at the Stub)",
+                        "relations": relations,
+                    }
+                )
+        return recordings
+
+    def _create_releases(self) -> list:
+        # Every seventh work is a b-side that never made it onto an album
+        album_tracks = [
+            {
+                "id": str(uuid.UUID(int=(1 << 64) + index)),
+                "title": self.get_title(index),
+            }
+            for index in range(self.catalog_size)
+            if index % 7 != 6
+        ]
+        releases = []
+        for number, start in enumerate(range(0, len(album_tracks), 10)):
+            tracks = [
+                {
+                    "position": position + 1,
+                    "title": recording["title"],
+                    "recording": recording,
+                }
+                for position, recording in enumerate(album_tracks[start : start + 10])
+            ]
+            releases.append(
+                {
+                    "id": str(uuid.UUID(int=(3 << 64) + number)),
+                    "title": f"Album {number + 1}",
+                    "media": [{"position": 1, "tracks": tracks}],
+                }
+            )
+            if number % 3 == 2:
+                releases.append(
+                    {
+                        "id": str(uuid.UUID(int=(4 << 64) + number)),
+                        "title": f"Album {number + 1} (Deluxe Edition)",
+                        "media": [{"position": 1, "tracks": tracks}],
+                    }
+                )
+        return releases
+
+    def _get_page_body(self, entity: str, items: list, offset: int, limit: int) -> dict:
+        return {
+            f"{entity}-count": len(items),
+            f"{entity}-offset": offset,
+            f"{entity}s": items[offset : offset + limit],
+        }
+
+    def _get_artist_body(self, path: str) -> dict:
+        artist_dict = {
+            "id": STUB_ARTIST_MBID,
+            "name": STUB_ARTIST_NAME,
+            "type": "Group",
+            "area": {"name": "Nowhere"},
+        }
+        if path.rstrip("/").endswith("/artist"):
+            return {"artists": [dict(artist_dict, score=100)]}
+        return artist_dict
+
+    def _get_works_body(self, offset: int, limit: int) -> dict:
+        works = [
+            self._get_work(index)
+            for index in range(offset, min(offset + limit, self.catalog_size))
+        ]
+        return {"work-count": self.catalog_size, "work-offset": offset, "works": works}
+
+    def _send_lyrics(self, handler: BaseHTTPRequestHandler, title: str) -> None:
+        # Lyrics only depend on the title so repeated runs see the same catalog
+        song_random = random.Random(f"{self._seed}:{title}")
+        if song_random.random() < self.lyric_miss_rate:
+            return self._send(handler, 404, {"error": "No lyrics found"})
+        number_of_words = max(
+            1, int(song_random.gauss(self.words_per_song, self.words_per_song / 3))
+        )
+        lines = [
+            " ".join("la" for _ in range(min(8, number_of_words - start)))
+            for start in range(0, number_of_words, 8)
+        ]
+        return self._send(handler, 200, {"lyrics": "\n".join(lines)})
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, body: dict) -> None:
+        encoded_body = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(encoded_body)))
+        handler.end_headers()
+        handler.wfile.write(encoded_body)
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+    """Parses the command line arguments
+
+    :list arguments: command line arguments, defaults to sys.argv
+    :argparse.Namespace returns: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Serves a stub of the MusicBrainz and lyrics.ovh apis"
+    )
+    parser.add_argument("--catalog-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--lyric-miss-rate", type=float, default=0.1)
+    parser.add_argument(
+        "--slow-rate", type=float, default=0.0, help="share of very slow responses"
+    )
+    parser.add_argument(
+        "--slow-latency",
+        type=float,
+        default=1.0,
+        help="seconds added to the very slow responses",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    return parser.parse_args(arguments)
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    stub = StubServer(
+        arguments.catalog_size,
+        arguments.latency,
+        arguments.jitter,
+        arguments.error_rate,
+        arguments.lyric_miss_rate,
+        seed=arguments.seed,
+        port=arguments.port,
+        slow_rate=arguments.slow_rate,
+        slow_latency=arguments.slow_latency,
+    )
+    # The first line tells whoever started the server where to find it
+    print(stub.url, flush=True)
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
@@ -1,10 +1,13 @@
+import threading
 from unittest import TestCase, mock
 import api_caller
+from custom_exceptions import NotFoundError
 
 # All tthe tests here are kind of unecessary because theyre all effectively the same function
 # but with different API URLs. However, tests are needed nontheless.
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
 class TestGetArtistListFromName(TestCase):
-    @mock.patch("api_caller.requests.get")
+    @mock.patch("api_caller.requests.Session.get")
     def test_shouldReturnDictionary(self, mock_api_call):
         json_response = {"key": "value"}
         mock_api_call.return_value.ok = True
@@ -15,7 +18,7 @@ class TestGetArtistListFromName(TestCase):
 
         self.assertEqual(actual, expected)
 
-    @mock.patch("api_caller.requests.get")
+    @mock.patch("api_caller.requests.Session.get")
     def test_shouldRaiseLookupError(self, mock_api_call):
         status_code = 200
         mock_api_call.return_value.ok = False
@@ -29,8 +32,9 @@ class TestGetArtistListFromName(TestCase):
         self.assertEqual(actual, expected)
 
 
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
 class TestGetSongsFromArtistMbid(TestCase):
-    @mock.patch("api_caller.requests.get")
+    @mock.patch("api_caller.requests.Session.get")
     def test_shouldReturnDictionary(self, mock_api_call):
         json_response = {"key": "value"}
         mock_api_call.return_value.ok = True
@@ -41,7 +45,7 @@ class TestGetSongsFromArtistMbid(TestCase):
 
         self.assertEqual(actual, expected)
 
-    @mock.patch("api_caller.requests.get")
+    @mock.patch("api_caller.requests.Session.get")
     def test_shouldRaiseLookupError(self, mock_api_call):
         status_code = 200
         mock_api_call.return_value.ok = False
@@ -55,8 +59,9 @@ class TestGetSongsFromArtistMbid(TestCase):
         self.assertEqual(actual, expected)
 
 
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
 class TestGetLyricsFromArtistNameAndTitle(TestCase):
-    @mock.patch("api_caller.requests.get")
+    @mock.patch("api_caller.requests.Session.get")
     def test_shouldReturnDictionary(self, mock_api_call):
         json_response = {"key": "value"}
         mock_api_call.return_value.ok = True
@@ -67,7 +72,7 @@ class TestGetLyricsFromArtistNameAndTitle(TestCase):
 
         self.assertEqual(actual, expected)
 
-    @mock.patch("api_caller.requests.get")
+    @mock.patch("api_caller.requests.Session.get")
     def test_shouldRaiseLookupError(self, mock_api_call):
         status_code = 200
         mock_api_call.return_value.ok = False
@@ -79,3 +84,274 @@ class TestGetLyricsFromArtistNameAndTitle(TestCase):
         actual = err.exception.args[0]
         expected = f"Server error with status code {status_code}"
         self.assertEqual(actual, expected)
+
+
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
+class TestGetResponse(TestCase):
+    def tearDown(self) -> None:
+        api_caller.close_session()
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldPassTimeouts_whenSessionConfigured(self, mock_api_call):
+        api_caller.configure_session(connect_timeout=1, read_timeout=2)
+
+        api_caller.get_response("https://example.com")
+
+        actual = mock_api_call.call_args.kwargs["timeout"]
+        expected = (1, 2)
+        self.assertEqual(actual, expected)
+
+    @mock.patch(
+        "api_caller.requests.Session.get",
+        side_effect=api_caller.requests.Timeout("timed out"),
+    )
+    def test_shouldRaiseLookupError_whenRequestTimesOut(self, mock_api_call):
+        with self.assertRaises(LookupError) as err:
+            api_caller.get_response("https://example.com")
+
+        actual = err.exception.args[0]
+        expected = "Request failed: timed out"
+        self.assertEqual(actual, expected)
+
+    def test_shouldReuseSession_whenCalledTwice(self):
+        actual = api_caller.get_session()
+        expected = api_caller.get_session()
+        self.assertIs(actual, expected)
+
+    @mock.patch("api_caller.time.sleep")
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldRetryWithRetryAfter_whenThrottled(self, mock_api_call, mock_sleep):
+        throttled = mock.MagicMock(status_code=503, headers={"Retry-After": "2"})
+        success = mock.MagicMock(status_code=200)
+        mock_api_call.side_effect = [throttled, success]
+
+        actual = api_caller.get_response("https://example.com")
+        expected = success
+        self.assertIs(actual, expected)
+        mock_sleep.assert_called_once_with(2.0)
+
+    @mock.patch("api_caller.time.sleep")
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldReturnThrottledResponse_whenRetriesExhausted(
+        self, mock_api_call, mock_sleep
+    ):
+        mock_api_call.return_value = mock.MagicMock(status_code=503, headers={})
+
+        actual = api_caller.get_response("https://example.com").status_code
+        expected = 503
+        self.assertEqual(actual, expected)
+        self.assertEqual(mock_api_call.call_count, api_caller.MAX_RETRIES + 1)
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldPenalizeRateLimiter_whenHostIsRateLimited(self, mock_api_call):
+        throttled = mock.MagicMock(status_code=429, headers={"Retry-After": "3"})
+        success = mock.MagicMock(status_code=200)
+        mock_api_call.side_effect = [throttled, success]
+        rate_limiter = mock.MagicMock()
+        api_caller._rate_limiters["example.com"] = rate_limiter
+
+        api_caller.get_response("https://example.com/ws")
+
+        rate_limiter.penalize.assert_called_once_with(3.0)
+        self.assertEqual(rate_limiter.acquire.call_count, 2)
+
+    def test_shouldGetRateLimiterOfUrlsHost(self):
+        api_caller.configure_rate_limit("example.com", 2.0)
+
+        self.assertIsNotNone(api_caller.get_rate_limiter("https://example.com/ws"))
+        self.assertIsNone(api_caller.get_rate_limiter("https://example.org/ws"))
+
+
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
+class TestFetchJson(TestCase):
+    def setUp(self) -> None:
+        api_caller.configure_cache(":memory:")
+
+    def tearDown(self) -> None:
+        api_caller.disable_cache()
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldNotCallApi_whenResponseCached(self, mock_api_call):
+        mock_api_call.return_value.status_code = 200
+        mock_api_call.return_value.ok = True
+        mock_api_call.return_value.json.return_value = {"lyrics": "la la"}
+
+        api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+        actual = api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+        expected = {"lyrics": "la la"}
+        self.assertEqual(actual, expected)
+        self.assertEqual(mock_api_call.call_count, 1)
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldNotCacheResponse_whenRequestFails(self, mock_api_call):
+        mock_api_call.return_value.status_code = 500
+        mock_api_call.return_value.ok = False
+
+        for _ in range(2):
+            with self.assertRaises(LookupError):
+                api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+
+        self.assertEqual(mock_api_call.call_count, 2)
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldRememberNotFound_whenLyricsMissing(self, mock_api_call):
+        mock_api_call.return_value.status_code = 404
+        mock_api_call.return_value.ok = False
+
+        for _ in range(2):
+            with self.assertRaises(NotFoundError):
+                api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+
+        self.assertEqual(mock_api_call.call_count, 1)
+        self.assertEqual(api_caller.get_cache().not_found_hits, 1)
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldRaiseNotFoundError_whenLyricsEmpty(self, mock_api_call):
+        mock_api_call.return_value.status_code = 200
+        mock_api_call.return_value.ok = True
+        mock_api_call.return_value.json.return_value = {"lyrics": " \n"}
+
+        for _ in range(2):
+            with self.assertRaises(NotFoundError):
+                api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+
+        self.assertEqual(mock_api_call.call_count, 1)
+
+
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
+class TestMetrics(TestCase):
+    def setUp(self) -> None:
+        api_caller.metrics.reset()
+
+    def tearDown(self) -> None:
+        api_caller.metrics.reset()
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldRecordRequestUnderEndpoint(self, mock_api_call):
+        mock_api_call.return_value.status_code = 200
+        mock_api_call.return_value.ok = True
+        mock_api_call.return_value.content = b"12345"
+        mock_api_call.return_value.json.return_value = {"lyrics": "la"}
+
+        api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+
+        summary = api_caller.metrics.get_summary()["lyrics"]
+        self.assertEqual(summary["Requests"], 1)
+        self.assertEqual(summary["Status_codes"], {"200": 1})
+        self.assertEqual(summary["Bytes_received"], 5)
+
+    @mock.patch(
+        "api_caller.requests.Session.get",
+        side_effect=api_caller.requests.ConnectionError("refused"),
+    )
+    def test_shouldRecordError_whenRequestFails(self, mock_api_call):
+        with self.assertRaises(LookupError):
+            api_caller.get_artist_list_from_name("")
+
+        actual = api_caller.metrics.get_summary()["artist"]["Status_codes"]
+        expected = {"error": 1}
+        self.assertEqual(actual, expected)
+
+
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
+class TestCoalescing(TestCase):
+    def setUp(self) -> None:
+        api_caller.metrics.reset()
+        self.release_response = threading.Event()
+
+    def tearDown(self) -> None:
+        api_caller.metrics.reset()
+
+    def fetch_in_threads(self, number_of_threads: int) -> list:
+        results = [None] * number_of_threads
+
+        def fetch(index):
+            try:
+                results[index] = api_caller.get_lyrics_from_artist_name_and_title(
+                    "artist", "title"
+                )
+            except LookupError as err:
+                results[index] = err
+
+        threads = [
+            threading.Thread(target=fetch, args=(index,))
+            for index in range(number_of_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        # Let the response through once every other thread is waiting on the first
+        while (
+            api_caller.metrics.get_summary().get("lyrics", {}).get("Coalesced", 0)
+            < number_of_threads - 1
+        ):
+            self.release_response.wait(0.001)
+        self.release_response.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def return_slow_response(self, ok: bool) -> mock.Mock:
+        self.release_response.wait()
+        response = mock.Mock(status_code=200 if ok else 404, ok=ok, content=b"")
+        response.json.return_value = {"lyrics": "one two"}
+        return response
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldSendOneRequest_whenSameUrlRequestedConcurrently(self, mock_api_call):
+        mock_api_call.side_effect = lambda *args, **kwargs: self.return_slow_response(
+            True
+        )
+
+        results = self.fetch_in_threads(4)
+
+        self.assertEqual(mock_api_call.call_count, 1)
+        self.assertEqual(results, [{"lyrics": "one two"}] * 4)
+        self.assertEqual(api_caller.metrics.get_summary()["lyrics"]["Coalesced"], 3)
+        self.assertEqual(api_caller._in_flight, {})
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldRaiseLookupErrorForEveryCaller_whenSharedRequestFails(
+        self, mock_api_call
+    ):
+        mock_api_call.side_effect = lambda *args, **kwargs: self.return_slow_response(
+            False
+        )
+
+        results = self.fetch_in_threads(3)
+
+        self.assertEqual(mock_api_call.call_count, 1)
+        self.assertTrue(all(isinstance(result, LookupError) for result in results))
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldSendAgain_whenFirstRequestFinished(self, mock_api_call):
+        self.release_response.set()
+        mock_api_call.side_effect = lambda *args, **kwargs: self.return_slow_response(
+            True
+        )
+
+        api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+        api_caller.get_lyrics_from_artist_name_and_title("artist", "title")
+
+        self.assertEqual(mock_api_call.call_count, 2)
+
+    @mock.patch("api_caller.requests.Session.get")
+    def test_shouldSendAgain_whenNotCoalescing(self, mock_api_call):
+        mock_api_call.side_effect = lambda *args, **kwargs: self.return_slow_response(
+            True
+        )
+        first_request = threading.Thread(
+            target=api_caller.get_lyrics_from_artist_name_and_title,
+            args=("artist", "title"),
+        )
+        first_request.start()
+        while mock_api_call.call_count == 0:
+            self.release_response.wait(0.001)
+
+        threading.Timer(0.05, self.release_response.set).start()
+        api_caller.get_lyrics_from_artist_name_and_title(
+            "artist", "title", coalesce=False
+        )
+        first_request.join()
+
+        self.assertEqual(mock_api_call.call_count, 2)
+        self.assertEqual(api_caller.metrics.get_summary()["lyrics"]["Coalesced"], 0)
@@ -194,20 +194,13 @@ class TestGetArtistStatistics(TestCase):
     def setUp(self) -> None:
         self.artist = a.Artist("")
 
-    def set_up_mocks(self) -> None:
-        self.mean = 25
-        self.max = 50
-        self.min = 10
-        self.variance = 9
-        self.standard_dev = 3
-
-        self.artist.calculate_mean_wordcount = mock.MagicMock(return_value=self.mean)
-        self.artist.calculate_max_wordcount = mock.Mock(return_value=self.max)
-        self.artist.calculate_min_wordcount = mock.Mock(return_value=self.min)
-        self.artist.calculate_variance_wordcount = mock.Mock(return_value=self.variance)
-        self.artist.calculate_standard_deviation_wordcount = mock.Mock(
-            return_value=self.standard_dev
-        )
+    def set_up_songs(self) -> None:
+        self.wordcounts = [10, 20, 30, 40]
+        self.artist.song_list = []
+        for index, wordcount in enumerate(self.wordcounts):
+            song = s.Song(f"Song{index}", self.artist.wordcount_accumulator)
+            song.assign_lyrics("word " * wordcount)
+            self.artist.song_list.append(song)
 
     def test_shouldRaiseBreakLoopError_whenSongListIsEmptyList(self):
         with self.assertRaises(BreakLoopError) as err:
@@ -218,15 +211,57 @@ class TestGetArtistStatistics(TestCase):
         self.assertEqual(actual, expected)
 
     def test_shouldReturnDictionaryWithStatistics(self):
-        self.set_up_mocks()
-        self.artist.song_list = None
+        self.set_up_songs()
         actual = self.artist.get_artist_statistics()
         expected = {
-            "Mean": self.mean,
-            "Max": self.max,
-            "Min": self.min,
-            "Variance": self.variance,
-            "Std_dev": self.standard_dev,
+            "Mean": 25,
+            "Max": 40,
+            "Min": 10,
+            "Variance": 125,
+            "Std_dev": 125 ** 0.5,
         }
 
         self.assertDictEqual(actual, expected)
+
+    def test_shouldNotRescanSongList(self):
+        self.set_up_songs()
+        self.artist.song_list = mock.MagicMock()
+
+        self.artist.get_artist_statistics()
+
+        self.artist.song_list.__iter__.assert_not_called()
+
+    def test_shouldCountSongs_whenAddedWithoutAccumulator(self):
+        self.set_up_songs()
+        song = s.Song("Song without accumulator")
+        song.assign_lyrics("one two three")
+        self.artist.add_songs([song])
+
+        actual = self.artist.get_artist_statistics()
+
+        self.assertEqual(actual["Mean"], self.artist.calculate_mean_wordcount())
+        self.assertEqual(actual["Min"], 3)
+        self.assertEqual(self.artist.wordcount_accumulator.count, 5)
+
+    def test_shouldCountSongs_whenNoneHaveAccumulator(self):
+        song = s.Song("t")
+        self.artist.add_songs([song])
+        song.assign_lyrics("one two three")
+
+        actual = self.artist.get_artist_statistics()
+
+        self.assertEqual(actual["Mean"], 3.0)
+        self.assertEqual(actual["Max"], 3)
+
+    def test_shouldAddPercentilesAndHistogram_whenDetailed(self):
+        self.set_up_songs()
+        self.artist.song_list.append(s.Song("Song without lyrics"))
+
+        actual = self.artist.get_artist_statistics(detailed=True)
+
+        self.assertEqual(
+            {key: actual[key] for key in ("Mean", "Max", "Min", "Variance")},
+            {"Mean": 25, "Max": 40, "Min": 10, "Variance": 125},
+        )
+        self.assertEqual(actual["Median"], 25)
+        self.assertEqual(actual["Histogram"]["0-49"], 4)
@@ -0,0 +1,83 @@
+from unittest import TestCase
+import artist_index as ai
+
+RECORDS = [
+    {
+        "id": "mbid1",
+        "name": "Beyoncé",
+        "sort-name": "Knowles, Beyoncé",
+        "type": "Person",
+        "area": {"name": "United States"},
+        "score": 100,
+    },
+    {
+        "id": "mbid2",
+        "name": "Radiohead",
+        "type": "Group",
+        "aliases": [{"name": "On a Friday"}],
+    },
+    {"id": "mbid3", "name": "Radio Moscow"},
+]
+
+
+class TestNormaliseName(TestCase):
+    def test_shouldRemoveAccentsPunctuationAndCase(self):
+        actual = ai.normalise_name("  Beyoncé  & The   B.C. ")
+        expected = "beyonce the bc"
+        self.assertEqual(actual, expected)
+
+
+class TestArtistIndex(TestCase):
+    def setUp(self) -> None:
+        self.index = ai.ArtistIndex(":memory:")
+        self.index.add_artists(RECORDS)
+
+    def tearDown(self) -> None:
+        self.index.close()
+
+    def test_shouldKeepDisplayedFields(self):
+        actual = self.index.search("beyonce")[0]
+        expected = {
+            "id": "mbid1",
+            "name": "Beyoncé",
+            "sort-name": "Knowles, Beyoncé",
+            "type": "Person",
+            "area": {"name": "United States"},
+        }
+        self.assertEqual(actual, expected)
+
+    def test_shouldRankPrefixMatchesFirst(self):
+        actual = [record["id"] for record in self.index.search("Radio")]
+        expected = ["mbid2", "mbid3"]
+        self.assertCountEqual(actual, expected)
+        actual = [record["id"] for record in self.index.search("Radioh")]
+        self.assertEqual(actual[0], "mbid2")
+
+    def test_shouldMatchTypos(self):
+        actual = [record["id"] for record in self.index.search("Radiohed")]
+        self.assertIn("mbid2", actual)
+
+    def test_shouldMatchAliases(self):
+        actual = [record["id"] for record in self.index.search("on a friday")]
+        expected = ["mbid2"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldReturnEmptyList_whenNothingAlike(self):
+        actual = self.index.search("Metallica")
+        expected = []
+        self.assertEqual(actual, expected)
+
+    def test_shouldFindExactNamesOnly(self):
+        self.assertEqual(self.index.find_exact("radiohead")[0]["id"], "mbid2")
+        self.assertEqual(self.index.find_exact("radio"), [])
+
+    def test_shouldCompletePrefix(self):
+        actual = self.index.complete("Radio")
+        expected = ["Radio Moscow", "Radiohead"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldReplaceNames_whenArtistAddedAgain(self):
+        self.index.add_artists([{"id": "mbid2", "name": "Renamed"}])
+
+        self.assertEqual(self.index.find_exact("radiohead"), [])
+        self.assertEqual(len(self.index), 3)
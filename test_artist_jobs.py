@@ -0,0 +1,212 @@
+import io
+from contextlib import redirect_stdout
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+import artist
+import song
+from artist_jobs import ArtistJob, DONE, FAILED, FETCHING_LYRICS, STOPPED
+from custom_exceptions import BreakLoopError
+from results_store import ResultsStore
+
+
+def assign_songs(artist_):
+    for title in ["A", "B"]:
+        artist_.song_list.append(song.Song(title, artist_.wordcount_accumulator))
+
+
+def assign_lyrics(
+    artist_, retain_lyrics, progress, on_song_group_done=None, stop_event=None
+):
+    progress.start(len(artist_.song_list), artist_.wordcount_accumulator)
+    for song_ in artist_.song_list:
+        song_.assign_lyrics("a b c", retain_lyrics)
+        progress.update(True)
+    progress.finish()
+    return 0
+
+
+@mock.patch("artist_logic.assign_lyrics_to_songs", side_effect=assign_lyrics)
+@mock.patch("artist_logic.assign_artist_song_list", side_effect=assign_songs)
+class TestArtistJob(TestCase):
+    def setUp(self) -> None:
+        self.artist = artist.Artist("artist_name")
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def test_shouldCalculateStatisticsInBackground(self, songs_func, lyrics_func):
+        job = ArtistJob(self.artist)
+        job.start(self.executor)
+
+        statistics = job.wait(stream=None)
+
+        self.assertEqual(statistics["Mean"], 3)
+        self.assertTrue(self.artist.has_statistics())
+        self.assertEqual(job.stage, DONE)
+        self.assertEqual(job.progress.completed, 2)
+
+    def test_shouldCallOnFinished_withArtist(self, songs_func, lyrics_func):
+        on_finished = mock.Mock()
+        job = ArtistJob(self.artist, on_finished=on_finished)
+        job.start(self.executor)
+        job.wait(stream=None)
+
+        on_finished.assert_called_once_with(self.artist)
+
+    def test_shouldKeepSongsAndRaise_whenJobFails(self, songs_func, lyrics_func):
+        lyrics_func.side_effect = BreakLoopError("failed")
+        job = ArtistJob(self.artist)
+        job.start(self.executor)
+
+        with self.assertRaises(BreakLoopError):
+            job.wait(stream=None)
+        self.assertEqual(job.stage, FAILED)
+        self.assertEqual(len(self.artist.song_list), 2)
+
+    def test_shouldNotFetchSongsAgain_whenRunAfterFailing(
+        self, songs_func, lyrics_func
+    ):
+        lyrics_func.side_effect = [BreakLoopError("failed"), 0]
+        ArtistJob(self.artist).start(self.executor).exception()
+
+        ArtistJob(self.artist).start(self.executor).result()
+
+        songs_func.assert_called_once()
+        self.assertEqual(len(self.artist.song_list), 2)
+
+    def test_shouldCheckpointSongsAndWordcounts(self, songs_func, lyrics_func):
+        def assign_first_lyrics_then_fail(
+            artist_, retain_lyrics, progress, on_song_group_done, stop_event
+        ):
+            artist_.song_list[0].assign_lyrics("a b c", retain_lyrics)
+            on_song_group_done([artist_.song_list[0]])
+            raise BreakLoopError("failed")
+
+        lyrics_func.side_effect = assign_first_lyrics_then_fail
+        self.artist.mbid = "mbid"
+        store = ResultsStore(":memory:")
+        ArtistJob(self.artist, results_store=store).start(self.executor).exception()
+
+        stored_artist = store.load("mbid")
+        store.close()
+        actual = [song_.has_wordcount for song_ in stored_artist.song_list]
+        expected = [True, False]
+        self.assertEqual(actual, expected)
+        self.assertFalse(stored_artist.has_statistics())
+
+    def test_shouldShowProgress_whileWaiting(self, songs_func, lyrics_func):
+        release = threading.Event()
+
+        def assign_lyrics_slowly(
+            artist_, retain_lyrics, progress, on_song_group_done, stop_event
+        ):
+            progress.start(len(artist_.song_list), artist_.wordcount_accumulator)
+            release.wait()
+            return assign_lyrics(artist_, retain_lyrics, progress)
+
+        lyrics_func.side_effect = assign_lyrics_slowly
+        job = ArtistJob(self.artist)
+        job.start(self.executor)
+        threading.Timer(0.05, release.set).start()
+        stream = io.StringIO()
+
+        job.wait(stream=stream, refresh_interval=0.01)
+
+        self.assertIn(FETCHING_LYRICS, stream.getvalue())
+        self.assertTrue(stream.getvalue().endswith("\n"))
+
+    def test_shouldShowProgressOnRedirectedStdout_whenStreamNotGiven(
+        self, songs_func, lyrics_func
+    ):
+        release = threading.Event()
+
+        def assign_lyrics_slowly(
+            artist_, retain_lyrics, progress, on_song_group_done, stop_event
+        ):
+            release.wait()
+            return assign_lyrics(artist_, retain_lyrics, progress)
+
+        lyrics_func.side_effect = assign_lyrics_slowly
+        job = ArtistJob(self.artist)
+        job.start(self.executor)
+        threading.Timer(0.05, release.set).start()
+        stream = io.StringIO()
+
+        with redirect_stdout(stream):
+            job.wait(refresh_interval=0.01)
+
+        self.assertTrue(stream.getvalue().endswith("\n"))
+
+    def test_shouldNotRun_whenCancelledBeforeStarting(self, songs_func, lyrics_func):
+        release = threading.Event()
+        self.executor.submit(release.wait)
+        job = ArtistJob(self.artist)
+        job.start(self.executor)
+
+        self.assertTrue(job.cancel())
+        release.set()
+        self.assertTrue(job.done())
+        songs_func.assert_not_called()
+
+    def test_shouldStopWithoutStatistics_whenStoppedWhileFetchingLyrics(
+        self, songs_func, lyrics_func
+    ):
+        def assign_first_lyrics_then_stop(
+            artist_, retain_lyrics, progress, on_song_group_done, stop_event
+        ):
+            artist_.song_list[0].assign_lyrics("a b c", retain_lyrics)
+            on_song_group_done([artist_.song_list[0]])
+            job.stop()
+            self.assertTrue(stop_event.is_set())
+            return 0
+
+        lyrics_func.side_effect = assign_first_lyrics_then_stop
+        self.artist.mbid = "mbid"
+        store = ResultsStore(":memory:")
+        on_finished = mock.Mock()
+        job = ArtistJob(self.artist, results_store=store, on_finished=on_finished)
+
+        statistics = job.start(self.executor).result()
+
+        stored_artist = store.load("mbid")
+        store.close()
+        self.assertEqual(statistics, None)
+        self.assertEqual(job.stage, STOPPED)
+        on_finished.assert_not_called()
+        actual = [song_.has_wordcount for song_ in stored_artist.song_list]
+        expected = [True, False]
+        self.assertEqual(actual, expected)
+
+    def test_shouldDeleteResults_whenStoppedToDelete(self, songs_func, lyrics_func):
+        def assign_first_lyrics_then_delete(
+            artist_, retain_lyrics, progress, on_song_group_done, stop_event
+        ):
+            artist_.song_list[0].assign_lyrics("a b c", retain_lyrics)
+            job.stop(delete_results=True)
+            on_song_group_done([artist_.song_list[0]])
+            return 0
+
+        lyrics_func.side_effect = assign_first_lyrics_then_delete
+        self.artist.mbid = "mbid"
+        store = ResultsStore(":memory:")
+        job = ArtistJob(self.artist, results_store=store)
+
+        job.start(self.executor).result()
+
+        stored_artist = store.load("mbid")
+        store.close()
+        self.assertEqual(stored_artist, None)
+
+    def test_shouldNotCheckpoint_whenArtistHasNoSongs(self, songs_func, lyrics_func):
+        songs_func.side_effect = None
+        self.artist.mbid = "mbid"
+        store = ResultsStore(":memory:")
+        job = ArtistJob(self.artist, results_store=store)
+
+        with self.assertRaises(BreakLoopError):
+            job.start(self.executor).result()
+
+        self.assertNotIn("mbid", store)
+        store.close()
@@ -1,6 +1,9 @@
+import threading
 from unittest import TestCase, mock
 import artist_logic as al
 from artist import BreakLoopError
+from custom_exceptions import NotFoundError
+from progress_display import ProgressDisplay
 import artist
 import song
 
@@ -187,3 +190,455 @@ class TestAssignLyricsToSongs(TestCase):
         actual = al.assign_lyrics_to_songs(self._artist)
         expected = 2
         self.assertEqual(actual, expected)
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        side_effect=return_function_good,
+    )
+    def test_shouldAssignAllLyrics_whenRunWithSingleWorker(self, func):
+        al.assign_lyrics_to_songs(self._artist, max_workers=1)
+        actual = [song.lyrics for song in self._artist.song_list]
+        expected = ["Song 1 lyrics", "Song 2 lyrics"]
+        self.assertEqual(actual, expected)
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        side_effect=return_function_good,
+    )
+    def test_shouldKeepSongOrder_whenManySongsFetchedConcurrently(self, func):
+        self._artist.song_list = [song.Song(f"Song{i % 2 + 1}") for i in range(50)]
+
+        actual = al.assign_lyrics_to_songs(self._artist, max_workers=8)
+        expected = 0
+        self.assertEqual(actual, expected)
+        self.assertEqual(
+            [s.title for s in self._artist.song_list],
+            [f"Song{i % 2 + 1}" for i in range(50)],
+        )
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        side_effect=return_function_good,
+    )
+    def test_shouldStopRequesting_whenStopEventSet(self, func):
+        stop_event = threading.Event()
+        stop_event.set()
+
+        al.assign_lyrics_to_songs(self._artist, max_workers=1, stop_event=stop_event)
+
+        # The first request has already started when the stop is noticed
+        self.assertEqual(func.call_count, 1)
+
+
+class TestAssignLyricsToSongs_withMissingLyrics(TestCase):
+    def return_function_mixed(self, _artist):
+        if _artist == "Song1":
+            raise NotFoundError("Server error with status code 404")
+        raise LookupError("Request failed: timed out")
+
+    def setUp(self) -> None:
+        self._artist = artist.Artist("artist_name")
+        self._artist.song_list = [song.Song("Song1"), song.Song("Song2")]
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        side_effect=return_function_mixed,
+    )
+    def test_shouldCountMissingLyricsApartFromErrors(self, func):
+        actual = al.assign_lyrics_to_songs(
+            self._artist, progress=ProgressDisplay(stream=None)
+        )
+        expected = 2
+        self.assertEqual(actual, expected)
+        self.assertEqual(self._artist.missing_lyrics, 1)
+        self.assertEqual(self._artist.lyric_errors, 1)
+
+
+class TestAssignLyricsToSong(TestCase):
+    def setUp(self) -> None:
+        self._song = song.Song("Song1")
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        return_value={"lyrics": "one two three"},
+    )
+    def test_shouldReturnTrue_whenLyricsAssigned(self, func):
+        actual = al.assign_lyrics_to_song("artist_name", self._song)
+        expected = True
+        self.assertEqual(actual, expected)
+        self.assertEqual(self._song.wordcount, 3)
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title", side_effect=LookupError
+    )
+    def test_shouldReturnFalse_whenRequestFails(self, func):
+        actual = al.assign_lyrics_to_song("artist_name", self._song)
+        expected = False
+        self.assertEqual(actual, expected)
+        self.assertFalse(self._song.has_wordcount)
+
+
+class TestAssignArtistSongList(TestCase):
+    def return_fake_api_response(self, mbid, offset, work_count=250):
+        total_songs = work_count if work_count != None else 100
+        number_of_songs = max(0, min(100, total_songs - offset))
+        response = {
+            "works": [{"title": f"{offset + i}"} for i in range(number_of_songs)]
+        }
+        if work_count != None:
+            response["work-count"] = work_count
+        return response
+
+    def setUp(self) -> None:
+        self._artist = artist.Artist("artist_name")
+        self._artist.mbid = "mbid_string"
+
+    @mock.patch("api_caller.get_songs_from_artist_mbid")
+    def test_shouldFetchEveryPageInOrder_whenWorkCountGiven(self, func):
+        func.side_effect = self.return_fake_api_response
+
+        al.assign_artist_song_list(self._artist)
+
+        actual = [song.title for song in self._artist.song_list]
+        expected = [str(i) for i in range(250)]
+        self.assertEqual(actual, expected)
+
+    @mock.patch("api_caller.get_songs_from_artist_mbid")
+    def test_shouldNotRequestTrailingEmptyPage_whenWorkCountGiven(self, func):
+        func.side_effect = self.return_fake_api_response
+
+        al.assign_artist_song_list(self._artist)
+
+        actual = sorted(call.args[1] for call in func.call_args_list)
+        expected = [0, 100, 200]
+        self.assertEqual(actual, expected)
+
+    @mock.patch("api_caller.get_songs_from_artist_mbid")
+    def test_shouldFetchUntilEmptyPage_whenWorkCountMissing(self, func):
+        func.side_effect = lambda mbid, offset: self.return_fake_api_response(
+            mbid, offset, work_count=None
+        )
+
+        al.assign_artist_song_list(self._artist)
+
+        actual = len(self._artist.song_list)
+        expected = 100
+        self.assertEqual(actual, expected)
+        self.assertEqual(func.call_count, 2)
+
+    @mock.patch("api_caller.get_songs_from_artist_mbid")
+    def test_shouldFetchEverySong_whenPagesComeBackShort(self, func):
+        func.side_effect = lambda mbid, offset: {
+            "works": [{"title": f"{i}"} for i in range(offset, min(offset + 20, 60))],
+            "work-count": 60,
+        }
+
+        al.assign_artist_song_list(self._artist)
+
+        actual = [song.title for song in self._artist.song_list]
+        expected = [str(i) for i in range(60)]
+        self.assertEqual(actual, expected)
+
+
+class TestNormaliseTitle(TestCase):
+    def test_shouldRemoveVersionSuffixes(self):
+        actual = [
+            al.normalise_title(title)
+            for title in ["Song (Live)", "Song [2011 Remaster]", "Song - Demo"]
+        ]
+        expected = ["song", "song", "song"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldIgnoreCaseAndPunctuation(self):
+        actual = al.normalise_title("Don't  STOP!")
+        expected = "dont stop"
+        self.assertEqual(actual, expected)
+
+    def test_shouldKeepWords_whenNotInBracketsOrAfterDash(self):
+        actual = al.normalise_title("Live Forever")
+        expected = "live forever"
+        self.assertEqual(actual, expected)
+
+    def test_shouldRemoveVersionSuffixes_whenQualifiedOrNamed(self):
+        actual = [
+            al.normalise_title(title)
+            for title in [
+                "Song (Live at Wembley 1986)",
+                "Song - Radio Edit",
+                "Song (Take 2)",
+                "Song (Mark Ronson Remix)",
+                "Song - 2011 Remaster (Mono)",
+            ]
+        ]
+        expected = ["song"] * 5
+        self.assertEqual(actual, expected)
+
+    def test_shouldKeepBrackets_whenNotOnlyVersionMarker(self):
+        actual = [
+            al.normalise_title(title)
+            for title in [
+                "Country Roads (Take Me Home)",
+                "Song (Live Forever)",
+                "Love Song (Edit Me)",
+            ]
+        ]
+        expected = [
+            "country roads take me home",
+            "song live forever",
+            "love song edit me",
+        ]
+        self.assertEqual(actual, expected)
+
+    def test_shouldKeepTitlesApart_whenTitleIsOnlyVersionMarker(self):
+        actual = [al.normalise_title(title) for title in ["(Live)", "[Demo]"]]
+        expected = ["(live)", "[demo]"]
+        self.assertEqual(actual, expected)
+
+
+class TestAssignLyricsToSongs_withDuplicateTitles(TestCase):
+    def setUp(self) -> None:
+        self._artist = artist.Artist("artist_name")
+        self._artist.song_list = [
+            song.Song("Song (Live)"),
+            song.Song("Song"),
+            song.Song("song - demo"),
+            song.Song("Other Song"),
+        ]
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        return_value={"lyrics": "one two three"},
+    )
+    def test_shouldRequestEachTitleOnce(self, func):
+        al.assign_lyrics_to_songs(self._artist)
+
+        actual = sorted(call.args[1] for call in func.call_args_list)
+        expected = ["Other Song", "Song"]
+        self.assertEqual(actual, expected)
+        self.assertTrue(all(s.wordcount == 3 for s in self._artist.song_list))
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        return_value={"lyrics": "one two three"},
+    )
+    def test_shouldKeepOneVersionOnly_whenCountTitlesOnce(self, func):
+        al.assign_lyrics_to_songs(self._artist, count_titles_once=True)
+
+        actual = [s.title for s in self._artist.song_list]
+        expected = ["Song", "Other Song"]
+        self.assertEqual(actual, expected)
+
+
+class TestIsMbid(TestCase):
+    def test_shouldReturnTrue_whenValueIsUuid(self):
+        actual = al.is_mbid("a74b1b7f-71a5-4011-9441-d0b5e4122711")
+        expected = True
+        self.assertEqual(actual, expected)
+
+    def test_shouldReturnFalse_whenValueIsName(self):
+        actual = al.is_mbid("Radiohead")
+        expected = False
+        self.assertEqual(actual, expected)
+
+
+class TestResolveArtist(TestCase):
+    @mock.patch(
+        "api_caller.get_artist_list_from_name",
+        return_value={
+            "artists": [
+                {"id": "mbid1", "name": "Name1"},
+                {"id": "mbid2", "name": "Name2"},
+            ]
+        },
+    )
+    def test_shouldPickFirstSearchResult_whenGivenName(self, func):
+        _artist = al.resolve_artist("Name")
+
+        actual = (_artist.name, _artist.mbid)
+        expected = ("Name1", "mbid1")
+        self.assertEqual(actual, expected)
+
+    @mock.patch("api_caller.get_artist_from_mbid", return_value={"name": "Name1"})
+    def test_shouldLookUpName_whenGivenMbid(self, func):
+        mbid = "a74b1b7f-71a5-4011-9441-d0b5e4122711"
+        _artist = al.resolve_artist(mbid)
+
+        actual = (_artist.name, _artist.mbid)
+        expected = ("Name1", mbid)
+        self.assertEqual(actual, expected)
+        func.assert_called_once_with(mbid)
+
+    @mock.patch("api_caller.get_artist_from_mbid", side_effect=LookupError)
+    def test_shouldRaiseBreakLoopError_whenMbidLookupFails(self, func):
+        with self.assertRaises(BreakLoopError):
+            al.resolve_artist("a74b1b7f-71a5-4011-9441-d0b5e4122711")
+
+
+class TestRefreshArtist(TestCase):
+    def setUp(self) -> None:
+        self._artist = artist.Artist("artist_name")
+        self._artist.mbid = "mbid_string"
+        for work_id, title, wordcount in [
+            ("w1", "Kept", 10),
+            ("w2", "Removed", 1000),
+            ("w3", "Old title", 20),
+        ]:
+            song_ = song.Song(title, self._artist.wordcount_accumulator, work_id)
+            song_.assign_wordcount(wordcount)
+            self._artist.song_list.append(song_)
+        self._works = [
+            {"id": "w1", "title": "Kept"},
+            {"id": "w3", "title": "New title"},
+            {"id": "w4", "title": "Added"},
+            {"id": "w5", "title": "Kept (Live)"},
+        ]
+
+    def refresh(self, lyric_func) -> None:
+        with mock.patch(
+            "api_caller.get_songs_from_artist_mbid",
+            return_value={"works": self._works, "work-count": len(self._works)},
+        ), mock.patch(
+            "api_caller.get_lyrics_from_artist_name_and_title", side_effect=lyric_func
+        ):
+            al.refresh_artist(
+                self._artist, retain_lyrics=False, progress=ProgressDisplay(None)
+            )
+
+    def test_shouldOnlyRequestLyricsOfNewOrChangedWorks(self):
+        requested_titles = []
+
+        def get_lyrics(artist_name, title):
+            requested_titles.append(title)
+            return {"lyrics": "a b c"}
+
+        self.refresh(get_lyrics)
+
+        actual = sorted(requested_titles)
+        expected = ["Added", "New title"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldUpdateSongListAndStatistics(self):
+        self.refresh(lambda artist_name, title: {"lyrics": "a b c"})
+
+        actual = [(song_.work_id, song_.wordcount) for song_ in self._artist.song_list]
+        expected = [("w1", 10), ("w3", 3), ("w4", 3), ("w5", 10)]
+        self.assertEqual(actual, expected)
+        statistics = self._artist.wordcount_accumulator.get_statistics()
+        self.assertAlmostEqual(statistics["Mean"], 6.5)
+        self.assertEqual((statistics["Min"], statistics["Max"]), (3, 10))
+
+    def test_shouldCountMissingLyrics_ofNewWorksOnly(self):
+        def get_lyrics(artist_name, title):
+            raise NotFoundError(title)
+
+        self.refresh(get_lyrics)
+
+        self.assertEqual(self._artist.missing_lyrics, 2)
+        self.assertEqual(self._artist.wordcount_accumulator.count, 2)
+
+
+class TestArtistIndex(TestCase):
+    def setUp(self) -> None:
+        al.configure_artist_index(":memory:")
+        al.index_artist_records(
+            [
+                {"id": "mbid1", "name": "Radiohead"},
+                {"id": "mbid2", "name": "Nirvana"},
+                {"id": "mbid3", "name": "Nirvana", "area": {"name": "United Kingdom"}},
+            ]
+        )
+
+    def tearDown(self) -> None:
+        al.disable_artist_index()
+
+    @mock.patch("api_caller.get_artist_list_from_name")
+    def test_shouldSearchIndex_withoutRequest(self, func):
+        actual = al.search_artist_index("radioh")["artists"][0]["id"]
+        expected = "mbid1"
+        self.assertEqual(actual, expected)
+        func.assert_not_called()
+
+    def test_shouldReturnNone_whenNoIndexedNameStartsWithQuery(self):
+        actual = al.search_artist_index("Oasis")
+        expected = None
+        self.assertEqual(actual, expected)
+
+    @mock.patch("api_caller.get_artist_list_from_name")
+    def test_shouldIndexSearchResponses(self, func):
+        func.return_value = {"artists": [{"id": "mbid4", "name": "Oasis"}]}
+
+        al.get_artist_response("Oasis")
+
+        actual = al.search_artist_index("Oasis")["artists"][0]["id"]
+        expected = "mbid4"
+        self.assertEqual(actual, expected)
+
+    @mock.patch("api_caller.get_artist_list_from_name")
+    def test_shouldResolveOnlyIndexedArtist_withoutRequest(self, func):
+        actual = al.resolve_artist("radiohead", use_index=True).mbid
+        expected = "mbid1"
+        self.assertEqual(actual, expected)
+        func.assert_not_called()
+
+    @mock.patch("api_caller.get_artist_list_from_name")
+    def test_shouldSearchApi_whenIndexNotUsed(self, func):
+        func.return_value = {"artists": [{"id": "mbid5", "name": "Radiohead"}]}
+
+        actual = al.resolve_artist("radiohead").mbid
+
+        expected = "mbid5"
+        self.assertEqual(actual, expected)
+        func.assert_called_once()
+
+    @mock.patch("api_caller.get_artist_list_from_name")
+    def test_shouldSearchApi_whenIndexedNameIsAmbiguous(self, func):
+        func.return_value = {"artists": [{"id": "mbid2", "name": "Nirvana"}]}
+
+        al.resolve_artist("Nirvana", use_index=True)
+
+        func.assert_called_once()
+
+
+class TestAssignLyricsToSongs_withWordcountsFromEarlierRun(TestCase):
+    def setUp(self) -> None:
+        self._artist = artist.Artist("artist_name")
+        for title in ["Done", "Done (Live)", "Pending"]:
+            self._artist.song_list.append(
+                song.Song(title, self._artist.wordcount_accumulator)
+            )
+        self._artist.song_list[0].assign_wordcount(7)
+
+    @mock.patch("api_caller.get_lyrics_from_artist_name_and_title")
+    def test_shouldOnlyRequestSongsWithoutWordcount(self, func):
+        func.return_value = {"lyrics": "a b"}
+        done_groups = []
+
+        al.assign_lyrics_to_songs(
+            self._artist,
+            retain_lyrics=False,
+            progress=ProgressDisplay(None),
+            on_song_group_done=done_groups.append,
+        )
+
+        func.assert_called_once_with("artist_name", "Pending")
+        actual = [song_.wordcount for song_ in self._artist.song_list]
+        expected = [7, 7, 2]
+        self.assertEqual(actual, expected)
+        self.assertEqual(done_groups, [[self._artist.song_list[2]]])
+
+
+class TestAssignArtistSongList_whenPageFails(TestCase):
+    @mock.patch("api_caller.get_songs_from_artist_mbid")
+    def test_shouldLeaveSongListEmpty(self, func):
+        def get_page(mbid, offset):
+            if offset > 0:
+                raise LookupError
+            return {"works": [{"title": "A"}], "work-count": 150}
+
+        func.side_effect = get_page
+        artist_ = artist.Artist("artist_name")
+        artist_.mbid = "mbid"
+
+        with self.assertRaises(LookupError):
+            al.assign_artist_song_list(artist_)
+        self.assertEqual(artist_.song_list, [])
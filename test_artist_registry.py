@@ -0,0 +1,94 @@
+from unittest import TestCase
+import artist
+import song
+from artist_registry import ArtistRegistry, ArtistSummary
+
+
+def make_artist(mbid: str, with_statistics: bool = True) -> artist.Artist:
+    artist_ = artist.Artist(f"name_{mbid}")
+    artist_.mbid = mbid
+    for wordcount in [10, 20, 30]:
+        song_ = song.Song("title", artist_.wordcount_accumulator)
+        song_.assign_wordcount(wordcount)
+        artist_.song_list.append(song_)
+    if with_statistics:
+        artist_.get_artist_statistics()
+    return artist_
+
+
+class TestArtistRegistry(TestCase):
+    def setUp(self) -> None:
+        self.registry = ArtistRegistry(max_full_artists=2)
+
+    def test_shouldNotAddSameMbidTwice(self):
+        self.assertTrue(self.registry.add(make_artist("a")))
+        self.assertFalse(self.registry.add(make_artist("a")))
+        self.assertEqual(len(self.registry), 1)
+
+    def test_shouldKeepOrderArtistsWereAdded(self):
+        for mbid in ["a", "b", "c"]:
+            self.registry.add(make_artist(mbid))
+
+        actual = [entry.mbid for entry in self.registry]
+        expected = ["a", "b", "c"]
+        self.assertEqual(actual, expected)
+        self.assertEqual(self.registry.get_by_position(1).mbid, "b")
+
+    def test_shouldCompactLeastRecentlyUsed(self):
+        for mbid in ["a", "b"]:
+            self.registry.add(make_artist(mbid))
+        self.registry.get("a")
+        self.registry.add(make_artist("c"))
+
+        actual = [isinstance(entry, ArtistSummary) for entry in self.registry]
+        expected = [False, True, False]
+        self.assertEqual(actual, expected)
+
+    def test_shouldKeepArtistsWithoutStatisticsWhole(self):
+        self.registry.add(make_artist("a", with_statistics=False))
+        for mbid in ["b", "c"]:
+            self.registry.add(make_artist(mbid))
+
+        self.assertIsInstance(self.registry.get("a"), artist.Artist)
+
+    def test_shouldCompactArtist_whenItsStatisticsArrive(self):
+        artist_ = make_artist("a", with_statistics=False)
+        self.registry.add(artist_)
+        self.registry.add(make_artist("b", with_statistics=False))
+        self.registry.add(make_artist("c"))
+        artist_.get_artist_statistics()
+
+        self.registry.compact_excess()
+
+        actual = [isinstance(entry, ArtistSummary) for entry in self.registry]
+        expected = [True, False, False]
+        self.assertEqual(actual, expected)
+
+    def test_shouldKeepStatisticsAndWordcounts_whenCompacted(self):
+        artist_ = make_artist("a")
+        self.registry.add(artist_)
+
+        self.registry.compact("a")
+
+        summary = self.registry.get("a")
+        self.assertEqual(summary.statistics, artist_.statistics)
+        self.assertEqual(list(summary.get_wordcounts()), [10, 20, 30])
+        self.assertEqual(summary.get_artist_statistics(detailed=True)["Median"], 20)
+
+    def test_shouldForgetArtist_whenRemoved(self):
+        self.registry.add(make_artist("a"))
+
+        self.registry.remove("a")
+
+        self.assertNotIn("a", self.registry)
+        self.assertEqual(self.registry.get("a"), None)
+
+    def test_shouldHoldThousandsOfArtists(self):
+        for index in range(2000):
+            self.registry.add(make_artist(str(index)))
+
+        full_artists = [
+            entry for entry in self.registry if isinstance(entry, artist.Artist)
+        ]
+        self.assertEqual(len(self.registry), 2000)
+        self.assertEqual(len(full_artists), 2)
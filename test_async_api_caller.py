@@ -0,0 +1,96 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+import api_caller
+import async_api_caller
+from stub_server import STUB_ARTIST_MBID, StubServer
+
+
+# These go over real http to a local stub, the async session can't be patched
+# the way requests.Session.get is in test_api_caller
+@mock.patch.dict("api_caller._rate_limiters", clear=True)
+class TestAsyncApiCaller(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.stub = StubServer(
+            catalog_size=150, latency=0, jitter=0, lyric_miss_rate=0
+        ).start()
+        self.urls = (api_caller.MUSICBRAINZ_API_URL, api_caller.LYRICS_API_URL)
+        api_caller.configure_api_urls(self.stub.url + "/ws/2", self.stub.url + "/v1")
+        api_caller.metrics.reset()
+
+    async def asyncTearDown(self) -> None:
+        await async_api_caller.close_session()
+
+    def tearDown(self) -> None:
+        api_caller.configure_api_urls(*self.urls)
+        api_caller.metrics.reset()
+        self.stub.stop()
+
+    async def test_shouldReturnDictionary(self):
+        actual = await async_api_caller.get_songs_from_artist_mbid(
+            STUB_ARTIST_MBID, 100
+        )
+
+        self.assertEqual(actual["work-count"], 150)
+        self.assertEqual(len(actual["works"]), 50)
+
+    async def test_shouldRaiseLookupError_whenLyricsNotFound(self):
+        self.stub.lyric_miss_rate = 1
+
+        with self.assertRaises(LookupError) as err:
+            await async_api_caller.get_lyrics_from_artist_name_and_title(
+                "Stub Artist", "Song 1"
+            )
+
+        actual = err.exception.args[0]
+        expected = "Server error with status code 404"
+        self.assertEqual(actual, expected)
+
+    @mock.patch("async_api_caller.asyncio.sleep")
+    async def test_shouldRetry_whenThrottled(self, mock_sleep):
+        self.stub.error_rate = 1
+
+        with self.assertRaises(LookupError):
+            await async_api_caller.get_artist_list_from_name("Stub Artist")
+
+        self.assertEqual(self.stub.request_counts["artist"], 4)
+        self.assertEqual(mock_sleep.call_count, 3)
+
+    async def test_shouldRecordRequestInSharedMetrics(self):
+        await async_api_caller.get_artist_from_mbid(STUB_ARTIST_MBID)
+
+        summary = api_caller.metrics.get_summary()["artist"]
+        self.assertEqual(summary["Requests"], 1)
+        self.assertEqual(summary["Status_codes"], {"200": 1})
+
+    async def test_shouldSendOneRequest_whenSameUrlRequestedConcurrently(self):
+        results = await asyncio.gather(
+            *(async_api_caller.get_artist_from_mbid(STUB_ARTIST_MBID) for _ in range(5))
+        )
+
+        self.assertEqual(self.stub.request_counts["artist"], 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(api_caller.metrics.get_summary()["artist"]["Coalesced"], 4)
+        self.assertEqual(async_api_caller._in_flight, {})
+
+    async def test_shouldKeepRequestGoing_whenOneOfTheCallersIsCancelled(self):
+        self.stub.latency = 0.05
+        first_call = asyncio.ensure_future(
+            async_api_caller.get_artist_from_mbid(STUB_ARTIST_MBID)
+        )
+        second_call = asyncio.ensure_future(
+            async_api_caller.get_artist_from_mbid(STUB_ARTIST_MBID)
+        )
+        await asyncio.sleep(0.01)
+        first_call.cancel()
+
+        actual = await second_call
+
+        self.assertEqual(actual["id"], STUB_ARTIST_MBID)
+        self.assertTrue(first_call.cancelled())
+
+    @mock.patch("async_api_caller.aiohttp", None)
+    async def test_shouldUseBlockingApiCaller_whenAiohttpMissing(self):
+        actual = await async_api_caller.get_artist_from_mbid(STUB_ARTIST_MBID)
+        api_caller.close_session()
+
+        self.assertEqual(actual["id"], STUB_ARTIST_MBID)
@@ -0,0 +1,173 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+import artist
+import async_artist_logic as aal
+import song
+from custom_exceptions import BreakLoopError, NotFoundError
+from progress_display import ProgressDisplay
+
+
+class TestResolveArtist(IsolatedAsyncioTestCase):
+    @mock.patch("async_api_caller.get_artist_list_from_name")
+    async def test_shouldTakeFirstResult_whenGivenName(self, func):
+        func.return_value = {
+            "artists": [
+                {"id": "mbid1", "name": "name1"},
+                {"id": "mbid2", "name": "name2"},
+            ]
+        }
+
+        actual = await aal.resolve_artist("name")
+
+        self.assertEqual((actual.name, actual.mbid), ("name1", "mbid1"))
+
+    @mock.patch("async_api_caller.get_artist_list_from_name")
+    async def test_shouldRaiseBreakLoopError_whenNoArtistsFound(self, func):
+        func.return_value = {"artists": []}
+
+        with self.assertRaises(BreakLoopError):
+            await aal.resolve_artist("name")
+
+
+class TestAssignArtistSongList(IsolatedAsyncioTestCase):
+    def return_fake_api_response(self, mbid, offset, work_count=250):
+        works = [{"title": f"title{i}"} for i in range(offset, min(offset + 100, 250))]
+        response = {"works": works}
+        if work_count != None:
+            response["work-count"] = work_count
+        return response
+
+    def setUp(self) -> None:
+        self._artist = artist.Artist("Name")
+        self._artist.mbid = "mbid"
+
+    @mock.patch("async_api_caller.get_songs_from_artist_mbid")
+    async def test_shouldFetchEveryPageInOrder_whenWorkCountGiven(self, func):
+        func.side_effect = self.return_fake_api_response
+
+        await aal.assign_artist_song_list(self._artist)
+
+        actual = [song_.title for song_ in self._artist.song_list]
+        expected = [f"title{i}" for i in range(250)]
+        self.assertEqual(actual, expected)
+        self.assertEqual(func.await_count, 3)
+
+    @mock.patch("async_api_caller.get_songs_from_artist_mbid")
+    async def test_shouldFetchUntilEmptyPage_whenWorkCountMissing(self, func):
+        func.side_effect = lambda mbid, offset: self.return_fake_api_response(
+            mbid, offset, work_count=None
+        )
+
+        await aal.assign_artist_song_list(self._artist)
+
+        self.assertEqual(len(self._artist.song_list), 250)
+        self.assertEqual(func.await_count, 4)
+
+    @mock.patch("async_api_caller.get_songs_from_artist_mbid")
+    async def test_shouldFetchEverySong_whenPagesComeBackShort(self, func):
+        func.side_effect = lambda mbid, offset: {
+            "works": [
+                {"title": f"title{i}"} for i in range(offset, min(offset + 20, 60))
+            ],
+            "work-count": 60,
+        }
+
+        await aal.assign_artist_song_list(self._artist)
+
+        actual = [song_.title for song_ in self._artist.song_list]
+        expected = [f"title{i}" for i in range(60)]
+        self.assertEqual(actual, expected)
+
+
+class TestAssignLyricsToSongs(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._artist = artist.Artist("Name")
+        self._artist.song_list = [
+            song.Song(f"title{i}", self._artist.wordcount_accumulator)
+            for i in range(20)
+        ] + [song.Song("title1 (Live)", self._artist.wordcount_accumulator)]
+        self.progress = ProgressDisplay(stream=None)
+
+    @mock.patch("async_api_caller.get_lyrics_from_artist_name_and_title")
+    async def test_shouldAssignLyricsToEverySong(self, func):
+        func.return_value = {"lyrics": "one two three"}
+
+        failed_requests = await aal.assign_lyrics_to_songs(
+            self._artist, progress=self.progress
+        )
+
+        self.assertEqual(failed_requests, 0)
+        self.assertTrue(all(song_.wordcount == 3 for song_ in self._artist.song_list))
+        # title1 and title1 (Live) share a request
+        self.assertEqual(func.await_count, 20)
+
+    @mock.patch("async_api_caller.get_lyrics_from_artist_name_and_title")
+    async def test_shouldReturnNumberOfFailedRequests(self, func):
+        func.side_effect = LookupError("Server error with status code 404")
+
+        failed_requests = await aal.assign_lyrics_to_songs(
+            self._artist, progress=self.progress
+        )
+
+        self.assertEqual(failed_requests, 20)
+        self.assertEqual(self._artist.lyric_errors, 20)
+
+    @mock.patch("async_api_caller.get_lyrics_from_artist_name_and_title")
+    async def test_shouldCountMissingLyricsApartFromErrors(self, func):
+        func.side_effect = lambda artist_name, song_title: (
+            {"lyrics": "one"} if song_title != "title2" else self.raise_not_found()
+        )
+
+        failed_requests = await aal.assign_lyrics_to_songs(
+            self._artist, progress=self.progress
+        )
+
+        self.assertEqual(failed_requests, 1)
+        self.assertEqual(self._artist.missing_lyrics, 1)
+        self.assertEqual(self._artist.lyric_errors, 0)
+
+    def raise_not_found(self):
+        raise NotFoundError("Server error with status code 404")
+
+    @mock.patch("async_api_caller.get_lyrics_from_artist_name_and_title")
+    async def test_shouldLimitConcurrentRequests(self, func):
+        in_flight = 0
+        most_in_flight = 0
+
+        async def fake_api_call(artist_name, song_title):
+            nonlocal in_flight, most_in_flight
+            in_flight += 1
+            most_in_flight = max(most_in_flight, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return {"lyrics": "one"}
+
+        func.side_effect = fake_api_call
+
+        await aal.assign_lyrics_to_songs(
+            self._artist, max_concurrency=4, progress=self.progress
+        )
+
+        self.assertEqual(most_in_flight, 4)
+
+    @mock.patch("async_api_caller.get_lyrics_from_artist_name_and_title")
+    async def test_shouldCancelRequests_whenCancelled(self, func):
+        started = asyncio.Event()
+
+        async def never_answer(artist_name, song_title):
+            started.set()
+            await asyncio.Event().wait()
+
+        func.side_effect = never_answer
+        task = asyncio.ensure_future(
+            aal.assign_lyrics_to_songs(
+                self._artist, max_concurrency=4, progress=self.progress
+            )
+        )
+        await started.wait()
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        self.assertEqual(func.await_count, 4)
@@ -0,0 +1,264 @@
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+import asyncio
+import os
+import tempfile
+import threading
+import artist
+import artist_logic as al
+import lyrics_providers as lp
+import song
+from custom_exceptions import NotFoundError
+from metrics import MetricsRegistry
+from progress_display import ProgressDisplay
+
+
+class FakeProvider(lp.LyricsProvider):
+    endpoint = "fake"
+
+    def __init__(self, lyrics: str = None, delay: float = 0, error=None):
+        self.lyrics = lyrics
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._released = threading.Event()
+
+    def release(self) -> None:
+        self._released.set()
+
+    def get_lyrics(self, artist_name: str, song_title: str) -> dict:
+        self.calls += 1
+        self._released.wait(self.delay)
+        if self.error != None:
+            raise self.error
+        return {"lyrics": self.lyrics}
+
+    async def get_lyrics_async(self, artist_name: str, song_title: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error != None:
+            raise self.error
+        return {"lyrics": self.lyrics}
+
+
+class TestDirectoryProvider(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        artist_directory = os.path.join(self.directory.name, "Beyoncé")
+        os.mkdir(artist_directory)
+        with open(os.path.join(artist_directory, "Halo.txt"), "w") as file:
+            file.write("remember those walls I built")
+        with open(os.path.join(artist_directory, "Empty.txt"), "w") as file:
+            file.write("  \n")
+        with open(os.path.join(artist_directory, "Latin.txt"), "wb") as file:
+            file.write("déjà vu".encode("latin-1"))
+        self.provider = lp.DirectoryProvider(self.directory.name)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_shouldReadLyrics_whenNamesDifferInCaseAndAccents(self):
+        actual = self.provider.get_lyrics("beyonce", "HALO")
+        expected = {"lyrics": "remember those walls I built"}
+        self.assertEqual(actual, expected)
+
+    def test_shouldRaiseNotFoundError_whenNoFile(self):
+        with self.assertRaises(NotFoundError):
+            self.provider.get_lyrics("Beyoncé", "Single Ladies")
+
+    def test_shouldRaiseNotFoundError_whenFileEmpty(self):
+        with self.assertRaises(NotFoundError):
+            self.provider.get_lyrics("Beyoncé", "Empty")
+
+    def test_shouldAskNextProvider_whenFileNotUtf8(self):
+        provider = lp.FallbackProvider([self.provider, FakeProvider("deja vu")])
+
+        actual = provider.get_lyrics("Beyoncé", "Latin")
+        expected = {"lyrics": "deja vu"}
+        self.assertEqual(actual, expected)
+
+
+class TestDirectoryProviderMissingDirectory(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.missing_directory = os.path.join(self.directory.name, "missing")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_shouldRaiseLookupError_whenDirectoryMissing(self):
+        provider = lp.DirectoryProvider(self.missing_directory)
+
+        with self.assertRaises(LookupError):
+            provider.get_lyrics("artist", "title")
+
+    def test_shouldAskNextProvider_whenDirectoryMissing(self):
+        provider = lp.FallbackProvider(
+            [lp.DirectoryProvider(self.missing_directory), FakeProvider("la la")]
+        )
+
+        actual = provider.get_lyrics("artist", "title")
+        expected = {"lyrics": "la la"}
+        self.assertEqual(actual, expected)
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        return_value={"lyrics": "one two three"},
+    )
+    def test_shouldFetchFromLyricsOvh_whenDirectoryMissing(self, func):
+        lp.configure_lyrics_provider(
+            lp.create_lyrics_provider(lyrics_directory=self.missing_directory)
+        )
+        self.addCleanup(lp.configure_lyrics_provider, lp.LyricsOvhProvider())
+        _artist = artist.Artist("artist")
+        _artist.song_list.append(song.Song("title", _artist.wordcount_accumulator))
+
+        failed_requests = al.assign_lyrics_to_songs(
+            _artist, progress=ProgressDisplay(stream=None)
+        )
+
+        self.assertEqual(failed_requests, 0)
+        self.assertEqual(_artist.song_list[0].wordcount, 3)
+
+
+class TestFallbackProvider(TestCase):
+    def test_shouldAskNextProvider_whenFirstHasNoLyrics(self):
+        provider = lp.FallbackProvider(
+            [FakeProvider(error=NotFoundError()), FakeProvider("la la")]
+        )
+
+        actual = provider.get_lyrics("artist", "title")
+        expected = {"lyrics": "la la"}
+        self.assertEqual(actual, expected)
+
+    def test_shouldRaiseLookupError_whenAnyProviderFailed(self):
+        provider = lp.FallbackProvider(
+            [FakeProvider(error=NotFoundError()), FakeProvider(error=LookupError())]
+        )
+
+        with self.assertRaises(LookupError) as context:
+            provider.get_lyrics("artist", "title")
+        self.assertNotIsInstance(context.exception, NotFoundError)
+
+
+@mock.patch("api_caller.metrics", new_callable=MetricsRegistry)
+class TestHedgedProvider(TestCase):
+    def create_provider(self, primary, secondary, **kwargs) -> lp.HedgedProvider:
+        provider = lp.HedgedProvider(
+            primary, secondary, initial_delay=0.01, max_hedge_ratio=1, **kwargs
+        )
+        self.addCleanup(provider.close)
+        return provider
+
+    def test_shouldNotHedge_whenPrimaryAnswersInTime(self, mock_metrics):
+        primary, secondary = FakeProvider("primary"), FakeProvider("secondary")
+        provider = self.create_provider(primary, secondary)
+
+        actual = provider.get_lyrics("artist", "title")
+
+        self.assertEqual(actual, {"lyrics": "primary"})
+        self.assertEqual(secondary.calls, 0)
+
+    def test_shouldTakeSecondary_whenPrimarySlow(self, mock_metrics):
+        primary = FakeProvider("primary", delay=5)
+        secondary = FakeProvider("secondary")
+        provider = self.create_provider(primary, secondary)
+
+        actual = provider.get_lyrics("artist", "title")
+        primary.release()
+
+        self.assertEqual(actual, {"lyrics": "secondary"})
+        self.assertEqual(
+            mock_metrics.get_summary()["hedged"]["Status_codes"], {"secondary": 1}
+        )
+
+    def test_shouldWaitForPrimary_whenSecondaryFails(self, mock_metrics):
+        primary = FakeProvider("primary", delay=0.1)
+        secondary = FakeProvider(error=LookupError())
+        provider = self.create_provider(primary, secondary)
+
+        actual = provider.get_lyrics("artist", "title")
+
+        self.assertEqual(actual, {"lyrics": "primary"})
+
+    def test_shouldRaiseNotFoundError_whenFirstAnswerHasNoLyrics(self, mock_metrics):
+        primary = FakeProvider("primary", delay=5)
+        secondary = FakeProvider(error=NotFoundError())
+        provider = self.create_provider(primary, secondary)
+
+        with self.assertRaises(NotFoundError):
+            provider.get_lyrics("artist", "title")
+        primary.release()
+
+    def test_shouldNotHedgeMoreThanRatio(self, mock_metrics):
+        primary = FakeProvider("primary", delay=0.02)
+        secondary = FakeProvider("secondary", delay=0.02)
+        provider = self.create_provider(primary, secondary)
+        provider.max_hedge_ratio = 0.5
+
+        for _ in range(10):
+            provider.get_lyrics("artist", "title")
+
+        self.assertEqual(provider.lookups, 10)
+        self.assertEqual(secondary.calls, 5)
+
+    def test_shouldUsePercentileOfPrimary_whenEnoughSamples(self, mock_metrics):
+        for latency in range(1, 101):
+            mock_metrics.record("fake", "200", 0, latency / 1000)
+        provider = self.create_provider(
+            FakeProvider(), FakeProvider(), hedge_percentile=90
+        )
+
+        actual = provider.get_hedge_delay()
+        expected = 0.09
+        self.assertEqual(actual, expected)
+
+    def test_shouldUseInitialDelay_whenTooFewSamples(self, mock_metrics):
+        mock_metrics.record("fake", "200", 0, 5)
+        provider = self.create_provider(FakeProvider(), FakeProvider())
+
+        actual = provider.get_hedge_delay()
+        expected = 0.01
+        self.assertEqual(actual, expected)
+
+
+@mock.patch("api_caller.metrics", new_callable=MetricsRegistry)
+class TestHedgedProviderAsync(IsolatedAsyncioTestCase):
+    async def test_shouldTakeSecondary_whenPrimarySlow(self, mock_metrics):
+        primary = FakeProvider("primary", delay=5)
+        provider = lp.HedgedProvider(
+            primary, FakeProvider("secondary"), initial_delay=0.01, max_hedge_ratio=1
+        )
+        self.addCleanup(provider.close)
+
+        actual = await provider.get_lyrics_async("artist", "title")
+
+        self.assertEqual(actual, {"lyrics": "secondary"})
+
+
+class TestCreateLyricsProvider(TestCase):
+    def test_shouldUseLyricsOvh_whenNoOptions(self):
+        actual = lp.create_lyrics_provider()
+        self.assertIsInstance(actual, lp.LyricsOvhProvider)
+
+    def test_shouldHedgeWithUncoalescedRequest_whenPercentileGiven(self):
+        actual = lp.create_lyrics_provider(hedge_percentile=95)
+        self.addCleanup(actual.close)
+
+        self.assertIsInstance(actual, lp.HedgedProvider)
+        self.assertEqual(actual.hedge_percentile, 95)
+        self.assertFalse(actual.secondary.coalesce)
+
+    def test_shouldLookInDirectoryFirst_whenDirectoryGiven(self):
+        actual = lp.create_lyrics_provider(lyrics_directory="lyrics")
+
+        self.assertIsInstance(actual.providers[0], lp.DirectoryProvider)
+        self.assertIsInstance(actual.providers[1], lp.LyricsOvhProvider)
+
+    @mock.patch(
+        "api_caller.get_lyrics_from_artist_name_and_title",
+        return_value={"lyrics": "la"},
+    )
+    def test_shouldSendUncoalescedRequest_whenNotCoalescing(self, func):
+        lp.LyricsOvhProvider(coalesce=False).get_lyrics("artist", "title")
+
+        func.assert_called_once_with("artist", "title", coalesce=False)
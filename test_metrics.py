@@ -0,0 +1,86 @@
+from unittest import TestCase, mock
+import io
+import json
+import os
+import tempfile
+from metrics import EndpointMetrics, MetricsRegistry
+
+
+class TestEndpointMetrics(TestCase):
+    def setUp(self) -> None:
+        self.endpoint_metrics = EndpointMetrics()
+        for latency in range(1, 101):
+            self.endpoint_metrics.record("200", 10, latency / 1000)
+
+    def test_shouldReturnNearestRankPercentiles(self):
+        actual = [self.endpoint_metrics.get_percentile(p) for p in (50, 95, 99)]
+        expected = [0.05, 0.095, 0.099]
+        self.assertEqual(actual, expected)
+
+    def test_shouldReturnNone_whenNothingRecorded(self):
+        actual = EndpointMetrics().get_percentile(50)
+        expected = None
+        self.assertEqual(actual, expected)
+
+    def test_shouldCountStatusCodesBytesAndBuckets(self):
+        self.endpoint_metrics.record("404", 5, 20)
+        summary = self.endpoint_metrics.get_summary()
+
+        self.assertEqual(summary["Requests"], 101)
+        self.assertEqual(summary["Status_codes"], {"200": 100, "404": 1})
+        self.assertEqual(summary["Bytes_received"], 1005)
+        self.assertEqual(summary["Histogram"]["<=0.01"], 10)
+        self.assertEqual(summary["Histogram"]["<=inf"], 1)
+
+
+class TestMetricsRegistry(TestCase):
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+        self.registry.record("lyrics", "200", 100, 0.2)
+        self.registry.record_cache_hit("lyrics")
+        self.registry.record_coalesced("lyrics")
+        self.registry.record("works", "503", 0, 0.1)
+
+    def test_shouldKeepEndpointsSeparate(self):
+        summary = self.registry.get_summary()
+
+        self.assertEqual(summary["lyrics"]["Requests"], 1)
+        self.assertEqual(summary["lyrics"]["Cache_hits"], 1)
+        self.assertEqual(summary["lyrics"]["Coalesced"], 1)
+        self.assertEqual(summary["works"]["Status_codes"], {"503": 1})
+
+    def test_shouldGetPercentileAndRequestsOfEndpoint(self):
+        self.assertEqual(self.registry.get_percentile("works", 99), 0.1)
+        self.assertEqual(self.registry.get_requests("lyrics"), 1)
+
+    @mock.patch("metrics.RECENT_LATENCIES", 2)
+    def test_shouldGetPercentileOfRecentRequestsOnly(self):
+        registry = MetricsRegistry()
+        for latency in [5, 0.1, 0.2]:
+            registry.record("lyrics", "200", 100, latency)
+
+        self.assertEqual(registry.get_recent_percentile("lyrics", 99), 0.2)
+        self.assertEqual(registry.get_percentile("lyrics", 99), 5)
+
+    def test_shouldReturnNoneAndZero_whenEndpointUnknown(self):
+        self.assertEqual(self.registry.get_recent_percentile("artist", 99), None)
+        self.assertEqual(self.registry.get_percentile("artist", 99), None)
+        self.assertEqual(self.registry.get_requests("artist"), 0)
+
+    def test_shouldSaveSummaryAsJson(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            self.registry.save(path)
+            with open(path) as file:
+                actual = json.load(file)
+
+        expected = self.registry.get_summary()
+        self.assertEqual(actual, expected)
+
+    def test_shouldDisplayRowPerEndpoint(self):
+        stream = io.StringIO()
+        self.registry.display(file=stream)
+
+        actual = len(stream.getvalue().splitlines())
+        expected = 3
+        self.assertEqual(actual, expected)
@@ -0,0 +1,84 @@
+from contextlib import redirect_stdout
+from unittest import TestCase
+import io
+import progress_display as pd
+from wordcount_accumulator import WordcountAccumulator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestFormatDuration(TestCase):
+    def test_shouldFormatSecondsMinutesAndHours(self):
+        actual = [pd.format_duration(seconds) for seconds in [12, 185, 3720]]
+        expected = ["12s", "3m05s", "1h02m"]
+        self.assertEqual(actual, expected)
+
+
+class TestProgressDisplay(TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.stream = io.StringIO()
+        self.accumulator = WordcountAccumulator()
+        self.progress = pd.ProgressDisplay(self.stream, clock=self.clock)
+        self.progress.start(4, self.accumulator)
+
+    def complete_requests(self) -> None:
+        for wordcount in [10, 30]:
+            self.clock.now += 1
+            self.accumulator.add(wordcount)
+            self.progress.update(True)
+        self.clock.now += 1
+        self.progress.update(False)
+
+    def test_shouldReportThroughputFailureRateAndEta(self):
+        self.complete_requests()
+
+        self.assertEqual(self.progress.requests_per_second, 1)
+        self.assertEqual(self.progress.failure_rate, 1 / 3)
+        self.assertEqual(self.progress.eta, 1)
+
+    def test_shouldShowRunningStatistics(self):
+        self.complete_requests()
+
+        actual = self.progress.get_status_line()
+        expected = (
+            "[#######   ] 3/4 | Mean: 20.0 Min: 10 Max: 30 Std_dev: 10.0"
+            " | 1.0 req/s | 33.3% failed | ETA 1s"
+        )
+        self.assertEqual(actual, expected)
+
+    def test_shouldRefreshLineInPlace(self):
+        self.complete_requests()
+        self.progress.finish()
+
+        actual = self.stream.getvalue()
+        self.assertTrue(actual.startswith("\r[          ] 0/4"))
+        self.assertTrue(actual.endswith(" = Completed\n"))
+        self.assertNotIn("\n", actual[:-1])
+
+    def test_shouldPrintToRedirectedStdout_whenStreamNotGiven(self):
+        progress = pd.ProgressDisplay(clock=self.clock)
+        stream = io.StringIO()
+
+        with redirect_stdout(stream):
+            progress.start(1)
+            progress.update(True)
+            progress.finish()
+
+        self.assertTrue(stream.getvalue().endswith(" = Completed\n"))
+
+    def test_shouldNotPrint_whenStreamIsNone(self):
+        progress = pd.ProgressDisplay(None, clock=self.clock)
+        progress.start(1)
+        progress.update(True)
+        progress.finish()
+
+        actual = progress.completed
+        expected = 1
+        self.assertEqual(actual, expected)
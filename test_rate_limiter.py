@@ -0,0 +1,95 @@
+from unittest import TestCase
+from rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestReserve(TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+
+    def test_shouldNotWait_whenBucketIsFull(self):
+        bucket = TokenBucket(1.0, clock=self.clock)
+
+        actual = bucket.reserve()
+        expected = 0
+        self.assertEqual(actual, expected)
+
+    def test_shouldQueueRequestsAtRate_whenBurstExceedsCapacity(self):
+        bucket = TokenBucket(2.0, capacity=2, clock=self.clock)
+
+        actual = [bucket.reserve() for _ in range(4)]
+        expected = [0, 0, 0.5, 1.0]
+        self.assertEqual(actual, expected)
+
+    def test_shouldRefill_whenTimePasses(self):
+        bucket = TokenBucket(1.0, clock=self.clock)
+        bucket.reserve()
+        self.clock.now += 1
+
+        actual = bucket.reserve()
+        expected = 0
+        self.assertEqual(actual, expected)
+
+
+class TestAcquire(TestCase):
+    def test_shouldPaceRequests_whenCalledRepeatedly(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1.0, clock=clock, sleep=clock.sleep)
+
+        for _ in range(5):
+            bucket.acquire()
+
+        actual = clock.now
+        expected = 4.0
+        self.assertEqual(actual, expected)
+
+
+class TestPenalize(TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(1.0, clock=self.clock)
+
+    def test_shouldHoldOffForDelay_whenPenalized(self):
+        self.bucket.penalize(5)
+
+        actual = self.bucket.reserve()
+        expected = 5
+        self.assertEqual(actual, expected)
+
+    def test_shouldHalveRate_whenPenalized(self):
+        self.bucket.penalize(0)
+
+        actual = self.bucket.rate
+        expected = 0.5
+        self.assertEqual(actual, expected)
+
+    def test_shouldNotDropBelowMinRate_whenPenalizedRepeatedly(self):
+        for _ in range(10):
+            self.bucket.penalize(0)
+
+        actual = self.bucket.rate
+        expected = self.bucket.min_rate
+        self.assertEqual(actual, expected)
+
+
+class TestOnSuccess(TestCase):
+    def test_shouldRecoverToMaxRate_whenRequestsSucceed(self):
+        bucket = TokenBucket(1.0)
+        bucket.penalize(0)
+
+        for _ in range(20):
+            bucket.on_success()
+
+        actual = bucket.rate
+        expected = 1.0
+        self.assertEqual(actual, expected)
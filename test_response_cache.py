@@ -0,0 +1,104 @@
+from unittest import TestCase
+import response_cache as rc
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestNormalizeUrl(TestCase):
+    def test_shouldSortQueryAndLowerCaseHost(self):
+        actual = rc.normalize_url("HTTPS://MusicBrainz.org/ws/2/work?offset=0&artist=a")
+        expected = "https://musicbrainz.org/ws/2/work?artist=a&offset=0"
+        self.assertEqual(actual, expected)
+
+    def test_shouldMatch_whenPathQuotedDifferently(self):
+        actual = rc.normalize_url("https://api.lyrics.ovh/v1/a/b%20c")
+        expected = rc.normalize_url("https://api.lyrics.ovh/v1/a/b c")
+        self.assertEqual(actual, expected)
+
+
+class TestResponseCache(TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.cache = rc.ResponseCache(
+            ":memory:",
+            max_entries=2,
+            ttls={"works": 10},
+            clock=self.clock,
+            not_found_ttls={"works": 5},
+            access_interval=1,
+        )
+
+    def tearDown(self) -> None:
+        self.cache.close()
+
+    def test_shouldReturnBody_whenUrlStored(self):
+        self.cache.set("https://a.org/x", "works", {"key": "value"})
+
+        actual = self.cache.get("https://a.org/x")
+        expected = {"key": "value"}
+        self.assertEqual(actual, expected)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_shouldReturnNone_whenUrlNotStored(self):
+        actual = self.cache.get("https://a.org/x")
+        expected = None
+        self.assertEqual(actual, expected)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_shouldReturnNone_whenEntryExpired(self):
+        self.cache.set("https://a.org/x", "works", {"key": "value"})
+        self.clock.now += 11
+
+        actual = self.cache.get("https://a.org/x")
+        expected = None
+        self.assertEqual(actual, expected)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_shouldExpireNotFoundEntriesSooner(self):
+        self.cache.set("https://a.org/x", "works", None, status=404)
+        self.clock.now += 4
+
+        self.assertEqual(self.cache.get_entry("https://a.org/x"), (404, None))
+        self.clock.now += 2
+        self.assertEqual(self.cache.get_entry("https://a.org/x"), None)
+        self.assertEqual(self.cache.get_statistics()["Not_found_hits"], 1)
+
+    def test_shouldNotStoreNotFound_whenEndpointHasNoNotFoundTtl(self):
+        self.cache.set("https://a.org/x", "artist", None, status=404)
+
+        self.assertEqual(self.cache.get_entry("https://a.org/x"), None)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_shouldEvictLeastRecentlyUsed_whenFull(self):
+        self.cache.set("https://a.org/1", "works", 1)
+        self.clock.now += 1
+        self.cache.set("https://a.org/2", "works", 2)
+        self.clock.now += 1
+        self.cache.get("https://a.org/1")
+        self.clock.now += 1
+        self.cache.set("https://a.org/3", "works", 3)
+
+        actual = [self.cache.get(f"https://a.org/{i}") for i in range(1, 4)]
+        expected = [1, None, 3]
+        self.assertEqual(actual, expected)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_shouldNotUpdateLastAccess_whenAccessedRecently(self):
+        self.cache.access_interval = 60
+        self.cache.set("https://a.org/1", "works", 1)
+        self.clock.now += 1
+        self.cache.set("https://a.org/2", "works", 2)
+        self.clock.now += 1
+        self.cache.get("https://a.org/1")
+        self.clock.now += 1
+        self.cache.set("https://a.org/3", "works", 3)
+
+        actual = [self.cache.get(f"https://a.org/{i}") for i in range(1, 4)]
+        expected = [None, 2, 3]
+        self.assertEqual(actual, expected)
@@ -0,0 +1,182 @@
+import os
+import tempfile
+from unittest import TestCase
+import artist
+import song
+import results_store as rs
+
+
+def make_artist() -> artist.Artist:
+    artist_ = artist.Artist("Artist")
+    artist_.mbid = "mbid"
+    for title, wordcount in [("A", 10), ("B", None), ("C", 30)]:
+        song_ = song.Song(title, artist_.wordcount_accumulator)
+        if wordcount != None:
+            song_.assign_wordcount(wordcount)
+        artist_.song_list.append(song_)
+    artist_.get_artist_statistics(detailed=True)
+    return artist_
+
+
+class TestResultsStore(TestCase):
+    def setUp(self) -> None:
+        self.store = rs.ResultsStore(":memory:", clock=lambda: 1000.0)
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_shouldReturnNone_whenMbidNotStored(self):
+        actual = self.store.load("mbid")
+        expected = None
+        self.assertEqual(actual, expected)
+        self.assertNotIn("mbid", self.store)
+
+    def test_shouldLoadSongsInOrderWithWordcounts(self):
+        self.store.save(make_artist())
+
+        artist_ = self.store.load("mbid")
+        actual = [
+            (song_.title, song_.has_wordcount, song_.lyrics)
+            for song_ in artist_.song_list
+        ]
+        expected = [("A", True, None), ("B", False, None), ("C", True, None)]
+        self.assertEqual(actual, expected)
+        self.assertEqual(list(artist_.get_wordcounts()), [10, 30])
+
+    def test_shouldRestoreAccumulator(self):
+        self.store.save(make_artist())
+
+        artist_ = self.store.load("mbid")
+        self.assertEqual(artist_.wordcount_accumulator.count, 2)
+        self.assertEqual(artist_.wordcount_accumulator.get_statistics()["Mean"], 20)
+
+    def test_shouldLoadNameStatisticsAndFetchedAt(self):
+        stored_artist = make_artist()
+        self.store.save(stored_artist)
+
+        artist_ = self.store.load("mbid")
+        self.assertEqual(artist_.name, "Artist")
+        self.assertEqual(artist_.mbid, "mbid")
+        self.assertEqual(artist_.statistics, stored_artist.statistics)
+        self.assertEqual(artist_.fetched_at, 1000.0)
+        self.assertEqual(stored_artist.fetched_at, 1000.0)
+
+    def test_shouldKeepFetchedAt_whenArtistAlreadyHasOne(self):
+        artist_ = make_artist()
+        artist_.fetched_at = 5.0
+        self.store.save(artist_)
+
+        actual = self.store.load("mbid").fetched_at
+        expected = 5.0
+        self.assertEqual(actual, expected)
+
+    def test_shouldReplaceSongs_whenSavedAgain(self):
+        self.store.save(make_artist())
+        artist_ = make_artist()
+        del artist_.song_list[1:]
+        self.store.save(artist_)
+
+        actual = [song_.title for song_ in self.store.load("mbid").song_list]
+        expected = ["A"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldForgetArtist_whenDeleted(self):
+        self.store.save(make_artist())
+        self.store.delete("mbid")
+
+        actual = self.store.load("mbid")
+        expected = None
+        self.assertEqual(actual, expected)
+
+    def test_shouldPersistAcrossConnections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results", "results.sqlite3")
+            store = rs.open_results_store(path)
+            store.save(make_artist())
+            store.close()
+
+            store = rs.open_results_store(path)
+            actual = [song_.title for song_ in store.load("mbid").song_list]
+            store.close()
+        expected = ["A", "B", "C"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldLoadWorkIds(self):
+        artist_ = make_artist()
+        for index, song_ in enumerate(artist_.song_list):
+            song_.work_id = f"work{index}"
+        self.store.save(artist_)
+
+        actual = [song_.work_id for song_ in self.store.load("mbid").song_list]
+        expected = ["work0", "work1", "work2"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldUpdateWordcounts(self):
+        artist_ = make_artist()
+        self.store.save(artist_)
+
+        self.store.save_wordcounts("mbid", [(1, 20)])
+
+        actual = list(self.store.load("mbid").get_wordcounts())
+        expected = [10, 20, 30]
+        self.assertEqual(actual, expected)
+
+    def test_shouldListArtistsWithoutStatistics_asUnfinished(self):
+        artist_ = make_artist()
+        self.store.save(artist_)
+        artist_.mbid = "unfinished"
+        artist_.statistics = None
+        self.store.save(artist_)
+
+        actual = self.store.get_unfinished_mbids()
+        expected = ["unfinished"]
+        self.assertEqual(actual, expected)
+
+    def test_shouldNotListArtistsWithoutSongs_asUnfinished(self):
+        artist_ = artist.Artist("Artist")
+        artist_.mbid = "no_songs"
+        self.store.save(artist_)
+
+        actual = self.store.get_unfinished_mbids()
+        expected = []
+        self.assertEqual(actual, expected)
+
+
+class TestArtistCheckpoint(TestCase):
+    def setUp(self) -> None:
+        self.store = rs.ResultsStore(":memory:")
+        self.now = 0.0
+        self.artist = artist.Artist("Artist")
+        self.artist.mbid = "mbid"
+        self.artist.song_list = [song.Song(title) for title in "ABC"]
+        self.store.save(self.artist)
+        self.checkpoint = rs.ArtistCheckpoint(
+            self.store, self.artist, flush_interval=1.0, clock=lambda: self.now
+        )
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def get_stored_wordcounts(self) -> list:
+        return [
+            song_.wordcount if song_.has_wordcount else None
+            for song_ in self.store.load("mbid").song_list
+        ]
+
+    def test_shouldWriteInBatches(self):
+        self.artist.song_list[0].assign_wordcount(5)
+        self.checkpoint.song_group_done([self.artist.song_list[0]])
+        self.assertEqual(self.get_stored_wordcounts(), [None, None, None])
+
+        self.now = 1.0
+        self.artist.song_list[2].assign_wordcount(7)
+        self.checkpoint.song_group_done([self.artist.song_list[2]])
+        self.assertEqual(self.get_stored_wordcounts(), [5, None, 7])
+
+    def test_shouldWriteRemainingWordcounts_whenFlushed(self):
+        self.artist.song_list[1].assign_wordcount(3)
+        self.checkpoint.song_group_done([self.artist.song_list[1]])
+
+        self.checkpoint.flush()
+
+        self.assertEqual(self.get_stored_wordcounts(), [None, 3, None])
@@ -0,0 +1,41 @@
+from unittest import TestCase
+from wordcount_accumulator import WordcountAccumulator
+import song as s
+
+
+class TestAssignLyrics(TestCase):
+    def setUp(self) -> None:
+        self.accumulator = WordcountAccumulator()
+        self.song = s.Song("title", self.accumulator)
+
+    def test_shouldAddWordcountToAccumulator(self):
+        self.song.assign_lyrics("one two three")
+
+        self.assertEqual(self.accumulator.count, 1)
+        self.assertEqual(self.accumulator.mean, 3)
+
+    def test_shouldReplaceWordcount_whenLyricsAssignedTwice(self):
+        self.song.assign_lyrics("one two three")
+        self.song.assign_lyrics("one")
+
+        self.assertEqual(self.accumulator.count, 1)
+        self.assertEqual(self.accumulator.mean, 1)
+
+    def test_shouldNotAddWordcount_whenLyricsNone(self):
+        self.song.assign_lyrics(None)
+
+        self.assertEqual(self.accumulator.count, 0)
+
+    def test_shouldDropLyrics_whenNotRetained(self):
+        self.song.assign_lyrics("one two three", retain_lyrics=False)
+
+        self.assertEqual(self.song.lyrics, None)
+        self.assertEqual(self.song.wordcount, 3)
+        self.assertTrue(self.song.has_wordcount)
+
+
+class TestSlots(TestCase):
+    def test_shouldHaveNoInstanceDict(self):
+        song = s.Song("title")
+
+        self.assertFalse(hasattr(song, "__dict__"))
@@ -0,0 +1,161 @@
+from unittest import TestCase, mock
+import api_caller
+import artist
+import artist_logic as al
+import song_sources
+from custom_exceptions import BreakLoopError
+from stub_server import STUB_ARTIST_MBID, StubServer
+
+
+class TestRecordingsSource(TestCase):
+    def setUp(self) -> None:
+        self.source = song_sources.RecordingsSource()
+
+    def test_shouldUseWorkOfRecording_whenLinked(self):
+        work = {"id": "work-id", "title": "Song", "type": "Song", "language": "eng"}
+        response = {
+            "recordings": [
+                {
+                    "id": "recording-id",
+                    "title": "Song (Live)",
+                    "relations": [{"type": "performance", "work": work}],
+                }
+            ]
+        }
+
+        actual = self.source.get_songs(response)
+
+        self.assertEqual(
+            [(s.title, s.work_id, s.work_type, s.language) for s in actual],
+            [("Song", "work-id", "Song", "eng")],
+        )
+
+    def test_shouldUseRecording_whenNotLinkedToWork(self):
+        response = {"recordings": [{"id": "recording-id", "title": "Song"}]}
+
+        actual = self.source.get_songs(response)
+
+        self.assertEqual(
+            [(s.title, s.work_id) for s in actual], [("Song", "recording-id")]
+        )
+        self.assertEqual(actual[0].work_type, None)
+
+    def test_shouldListWorkOnce_whenRecordedMoreThanOnce(self):
+        work = {"id": "work-id", "title": "Song"}
+        response = {
+            "recordings": [
+                {"title": "Song", "relations": [{"work": work}]},
+                {"title": "Song (Live)", "relations": [{"work": work}]},
+            ]
+        }
+
+        actual = self.source.deduplicate(self.source.get_songs(response))
+
+        self.assertEqual(len(actual), 1)
+
+    def test_shouldRaiseBreakLoopError_whenNoRecordings(self):
+        with self.assertRaises(BreakLoopError):
+            self.source.get_songs({})
+
+
+class TestReleasesSource(TestCase):
+    def test_shouldListTracksOnce_whenOnSeveralReleases(self):
+        tracks = [
+            {"title": "Song", "recording": {"id": "1", "title": "Song"}},
+            {"title": "Other", "recording": {"id": "2", "title": "Other"}},
+        ]
+        response = {
+            "releases": [
+                {"media": [{"tracks": tracks}]},
+                {"media": [{"tracks": tracks[:1]}, {"tracks": []}]},
+            ]
+        }
+        source = song_sources.ReleasesSource()
+
+        actual = source.deduplicate(source.get_songs(response))
+
+        self.assertEqual([s.title for s in actual], ["Song", "Other"])
+
+
+class TestConfigureSongSource(TestCase):
+    def tearDown(self) -> None:
+        song_sources.configure_song_source(song_sources.DEFAULT_SONG_SOURCE)
+
+    def test_shouldSetSourceByName(self):
+        song_sources.configure_song_source("releases")
+
+        self.assertIsInstance(
+            song_sources.get_song_source(), song_sources.ReleasesSource
+        )
+
+    def test_shouldRaiseKeyError_whenNameUnknown(self):
+        with self.assertRaises(KeyError):
+            song_sources.configure_song_source("albums")
+
+    @mock.patch("api_caller.get_releases_from_artist_mbid")
+    def test_shouldListSongsFromConfiguredSource(self, func):
+        func.return_value = {
+            "release-count": 1,
+            "releases": [{"media": [{"tracks": [{"recording": {"title": "A"}}]}]}],
+        }
+        song_sources.configure_song_source("releases")
+        _artist = artist.Artist("artist_name")
+        _artist.mbid = "mbid_string"
+
+        al.assign_artist_song_list(_artist)
+
+        self.assertEqual([s.title for s in _artist.song_list], ["A"])
+
+    @mock.patch("api_caller.get_releases_from_artist_mbid")
+    def test_shouldPageByReleasesReturned_whenPagesComeBackShort(self, func):
+        func.side_effect = lambda mbid, offset: {
+            "release-count": 30,
+            "releases": [
+                {"media": [{"tracks": [{"recording": {"title": f"{i}"}}]}]}
+                for i in range(offset, min(offset + 10, 30))
+            ],
+        }
+        _artist = artist.Artist("artist_name")
+        _artist.mbid = "mbid_string"
+
+        al.assign_artist_song_list(
+            _artist, song_source=song_sources.SONG_SOURCES["releases"]
+        )
+
+        self.assertEqual(
+            [s.title for s in _artist.song_list], [str(i) for i in range(30)]
+        )
+        self.assertEqual([call.args[1] for call in func.call_args_list], [0, 10, 20])
+
+
+# These go over real http to a local stub so the browse urls and paging are covered
+class TestSongSourcesWithStubServer(TestCase):
+    def setUp(self) -> None:
+        self.stub = StubServer(catalog_size=250, latency=0, jitter=0).start()
+        self.urls = (api_caller.MUSICBRAINZ_API_URL, api_caller.LYRICS_API_URL)
+        api_caller.configure_api_urls(self.stub.url + "/ws/2", self.stub.url + "/v1")
+        self.artist = artist.Artist("Stub Artist")
+        self.artist.mbid = STUB_ARTIST_MBID
+
+    def tearDown(self) -> None:
+        api_caller.configure_api_urls(*self.urls)
+        api_caller.close_session()
+        self.stub.stop()
+
+    def test_shouldListEveryWork_whenFromRecordings(self):
+        al.assign_artist_song_list(
+            self.artist, song_source=song_sources.SONG_SOURCES["recordings"]
+        )
+
+        self.assertEqual(len(self.artist.song_list), 250)
+        self.assertEqual(self.stub.request_counts["recordings"], 4)
+        self.assertEqual(self.artist.song_list[0].language, "eng")
+
+    def test_shouldTakeFewestRequests_whenFromReleases(self):
+        al.assign_artist_song_list(
+            self.artist, song_source=song_sources.SONG_SOURCES["releases"]
+        )
+
+        # Every seventh work isn't on an album
+        self.assertEqual(len(self.artist.song_list), 250 - 250 // 7)
+        self.assertEqual(self.stub.request_counts["releases"], 2)
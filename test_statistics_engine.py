@@ -0,0 +1,69 @@
+from array import array
+from unittest import TestCase, mock, skipIf
+import statistics_engine as se
+
+
+class TestGetStatistics(TestCase):
+    def setUp(self) -> None:
+        self.wordcounts = array("I", [10, 20, 30, 40, 1200])
+
+    def assert_python_statistics(self, wordcounts: array, expected: dict) -> None:
+        with mock.patch("statistics_engine.numpy", None):
+            actual = se.get_statistics(wordcounts)
+        self.assertEqual({key: actual[key] for key in expected}, expected)
+
+    def test_shouldHaveSameKeysAsAccumulator_withDetailsAfter(self):
+        actual = list(se.get_statistics(self.wordcounts))
+        expected = ["Mean", "Max", "Min", "Variance", "Std_dev", "Median"]
+        self.assertEqual(actual[:6], expected)
+        self.assertEqual(actual[-2:], ["Iqr", "Histogram"])
+
+    def test_shouldCalculatePercentiles_whenNumpyMissing(self):
+        self.assert_python_statistics(
+            self.wordcounts,
+            {
+                "Mean": 260,
+                "Max": 1200,
+                "Min": 10,
+                "Variance": 221000,
+                "Median": 30,
+                "P25": 20,
+                "P75": 40,
+                "Iqr": 20,
+            },
+        )
+
+    def test_shouldCountEachBin_whenNumpyMissing(self):
+        wordcounts = array("I", [0, 49, 50, 999, 1000, 5000])
+
+        with mock.patch("statistics_engine.numpy", None):
+            actual = se.get_statistics(wordcounts)["Histogram"]
+
+        self.assertEqual(actual["0-49"], 2)
+        self.assertEqual(actual["50-99"], 1)
+        self.assertEqual(actual["750-999"], 1)
+        self.assertEqual(actual["1000+"], 2)
+        self.assertEqual(sum(actual.values()), 6)
+
+    def test_shouldMatchAccumulatorDefaults_whenEmpty(self):
+        actual = se.get_statistics(array("I"))
+
+        self.assertEqual(actual["Mean"], None)
+        self.assertEqual(actual["Max"], 0)
+        self.assertEqual(actual["Median"], None)
+        self.assertEqual(sum(actual["Histogram"].values()), 0)
+
+    @skipIf(se.numpy == None, "numpy is not installed")
+    def test_shouldMatchPythonStatistics_whenNumpyInstalled(self):
+        wordcounts = array("I", [(index * 7919) % 1500 for index in range(1001)])
+
+        with mock.patch("statistics_engine.numpy", None):
+            expected = se.get_statistics(wordcounts)
+        actual = se.get_statistics(wordcounts)
+
+        self.assertEqual(actual.keys(), expected.keys())
+        for key in expected:
+            if key == "Histogram":
+                self.assertEqual(actual[key], expected[key])
+            else:
+                self.assertAlmostEqual(actual[key], expected[key])
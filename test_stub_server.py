@@ -0,0 +1,43 @@
+from unittest import TestCase, mock
+import api_caller
+import artist
+import artist_logic as al
+from progress_display import ProgressDisplay
+from stub_server import STUB_ARTIST_MBID, StubServer
+
+
+# These go over real http to a local stub so they also cover the session,
+# pagination and response handling together
+class TestStubServer(TestCase):
+    def setUp(self) -> None:
+        self.stub = StubServer(
+            catalog_size=250, latency=0, jitter=0, lyric_miss_rate=0
+        ).start()
+        self.urls = (api_caller.MUSICBRAINZ_API_URL, api_caller.LYRICS_API_URL)
+        api_caller.configure_api_urls(self.stub.url + "/ws/2", self.stub.url + "/v1")
+
+    def tearDown(self) -> None:
+        api_caller.configure_api_urls(*self.urls)
+        api_caller.close_session()
+        self.stub.stop()
+
+    def test_shouldFetchWholeCatalog(self):
+        _artist = artist.Artist("Stub Artist")
+        _artist.mbid = STUB_ARTIST_MBID
+
+        al.assign_artist_song_list(_artist)
+        failed_requests = al.assign_lyrics_to_songs(
+            _artist, progress=ProgressDisplay(stream=None)
+        )
+
+        self.assertEqual(len(_artist.song_list), 250)
+        self.assertEqual(failed_requests, 0)
+        self.assertEqual(self.stub.request_counts["works"], 3)
+        self.assertEqual(self.stub.request_counts["lyrics"], 225)
+
+    @mock.patch("api_caller.time.sleep")
+    def test_shouldRaiseLookupError_whenServerKeepsFailing(self, mock_sleep):
+        self.stub.error_rate = 1
+
+        with self.assertRaises(LookupError):
+            api_caller.get_artist_list_from_name("Stub Artist")
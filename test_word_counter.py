@@ -0,0 +1,91 @@
+from unittest import TestCase, mock
+import word_counter as wc
+
+
+class TestWhitespaceTokenizer(TestCase):
+    def setUp(self) -> None:
+        self.tokenizer = wc.WhitespaceTokenizer()
+
+    def test_shouldMatchSplit(self):
+        text = "  one two\tthree\n\nfour - five  "
+
+        actual = self.tokenizer.count(text)
+        expected = len(text.split())
+        self.assertEqual(actual, expected)
+
+    def test_shouldMatchSplit_whenTextIsLong(self):
+        text = "word " * 5000 + "longword" * 300 + " end\u2003\x1cfin"
+
+        actual = self.tokenizer.count(text)
+        expected = len(text.split())
+        self.assertEqual(actual, expected)
+
+    def test_shouldReturnZero_whenTextEmpty(self):
+        self.assertEqual(self.tokenizer.count(""), 0)
+
+    @mock.patch("word_counter._count_matches")
+    def test_shouldSplit_whenTextIsShort(self, func):
+        self.assertEqual(self.tokenizer.count("one two three"), 3)
+        func.assert_not_called()
+
+
+class TestCountMatches(TestCase):
+    def test_shouldCountEveryMatch(self):
+        text = " ".join(f"word{i}" for i in range(1000))
+
+        actual = wc._count_matches(wc._NON_WHITESPACE_PATTERN, text)
+        expected = 1000
+        self.assertEqual(actual, expected)
+
+
+class TestRegexTokenizer(TestCase):
+    def test_shouldIgnorePunctuation_whenNotInWord(self):
+        actual = wc.RegexTokenizer().count("Don't stop - rock'n'roll, baby!")
+        expected = 4
+        self.assertEqual(actual, expected)
+
+
+class TestLineTokenizer(TestCase):
+    def test_shouldLeaveOutSectionMarkersAndHeader(self):
+        text = (
+            "Paroles de la chanson Song par Artist\r\n"
+            "[Chorus]\n"
+            "one two (three)\n"
+            " (x2) \n"
+            "(four) five (six)\n"
+        )
+
+        actual = wc.LineTokenizer().count(text)
+        expected = 6
+        self.assertEqual(actual, expected)
+
+
+class TestCountWords(TestCase):
+    def tearDown(self) -> None:
+        wc.configure_tokenizer(wc.DEFAULT_TOKENIZER)
+
+    def test_shouldUseConfiguredTokenizer(self):
+        wc.configure_tokenizer("line")
+
+        actual = wc.count_words("[Intro]\none two")
+        expected = 2
+        self.assertEqual(actual, expected)
+
+    def test_shouldCountEachText_whenBatched(self):
+        texts = ["one", "", "one two three", "[Chorus]"]
+
+        actual = list(wc.count_words_batch(texts))
+        expected = [1, 0, 3, 1]
+        self.assertEqual(actual, expected)
+
+    def test_shouldMatchCount_whenBatched(self):
+        texts = ["one", "", "one two three", "[Chorus]", "", "four - five"]
+
+        for tokenizer in wc.TOKENIZERS.values():
+            actual = list(tokenizer.count_batch(texts))
+            expected = [tokenizer.count(text) for text in texts]
+            self.assertEqual(actual, expected)
+
+    def test_shouldRaiseKeyError_whenTokenizerUnknown(self):
+        with self.assertRaises(KeyError):
+            wc.configure_tokenizer("unknown")
@@ -0,0 +1,67 @@
+from unittest import TestCase
+import statistics
+from wordcount_accumulator import WordcountAccumulator
+
+
+class TestAdd(TestCase):
+    def setUp(self) -> None:
+        self.accumulator = WordcountAccumulator()
+        self.wordcounts = [3, 17, 4, 250, 42]
+        for wordcount in self.wordcounts:
+            self.accumulator.add(wordcount)
+
+    def test_shouldMatchPopulationStatistics(self):
+        actual = self.accumulator.get_statistics()
+        expected = {
+            "Mean": statistics.mean(self.wordcounts),
+            "Max": 250,
+            "Min": 3,
+            "Variance": statistics.pvariance(self.wordcounts),
+            "Std_dev": statistics.pstdev(self.wordcounts),
+        }
+        for key, value in expected.items():
+            self.assertAlmostEqual(actual[key], value)
+
+    def test_shouldStayAccurate_whenValuesHaveLargeOffset(self):
+        accumulator = WordcountAccumulator()
+        for wordcount in [10 ** 9 + 4, 10 ** 9 + 7, 10 ** 9 + 13, 10 ** 9 + 16]:
+            accumulator.add(wordcount)
+
+        actual = accumulator.variance
+        expected = 22.5
+        self.assertAlmostEqual(actual, expected)
+
+
+class TestRemove(TestCase):
+    def test_shouldMatchStatistics_whenValueRemoved(self):
+        accumulator = WordcountAccumulator()
+        for wordcount in [3, 17, 4, 250]:
+            accumulator.add(wordcount)
+
+        accumulator.remove(250)
+
+        self.assertEqual(accumulator.count, 3)
+        self.assertAlmostEqual(accumulator.mean, statistics.mean([3, 17, 4]))
+        self.assertAlmostEqual(accumulator.variance, statistics.pvariance([3, 17, 4]))
+
+    def test_shouldReset_whenLastValueRemoved(self):
+        accumulator = WordcountAccumulator()
+        accumulator.add(5)
+
+        accumulator.remove(5)
+
+        actual = accumulator.get_statistics()
+        expected = {"Mean": None, "Max": 0, "Min": 0, "Variance": 0, "Std_dev": 0}
+        self.assertDictEqual(actual, expected)
+
+
+class TestRecalculateExtremes(TestCase):
+    def test_shouldUseRemainingWordcounts(self):
+        accumulator = WordcountAccumulator()
+        for wordcount in [3, 17, 250]:
+            accumulator.add(wordcount)
+        accumulator.remove(250)
+
+        accumulator.recalculate_extremes([3, 17])
+
+        self.assertEqual((accumulator.minimum, accumulator.maximum), (3, 17))
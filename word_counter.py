@@ -0,0 +1,173 @@
+import re
+from array import array
+from collections import deque
+from itertools import count
+
+# Lyrics longer than this many characters are counted without building a
+# list of their words, shorter ones are split as that's much faster
+CHUNK_SIZE = 4096
+DEFAULT_TOKENIZER = "whitespace"
+
+# Words as str.split sees them, runs of anything but whitespace
+_NON_WHITESPACE_PATTERN = re.compile(r"\S+")
+# Runs of letters or digits, apostrophes inside a word (don't, rock'n'roll) keep it whole
+_WORD_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+# Characters str.splitlines ends a line at
+_LINE_BREAKS = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+# Lines that aren't sung: section markers like "[Chorus]" or "(x2)" on a line of their own
+_SECTION_MARKER = (
+    rf"[^\S{_LINE_BREAKS}]*(?:\[[^\]{_LINE_BREAKS}]*\]|\([^){_LINE_BREAKS}]*\))"
+    rf"[^\S{_LINE_BREAKS}]*"
+)
+_SECTION_MARKER_PATTERN = re.compile(_SECTION_MARKER)
+# Every line but the first, starting at the line break before it so the regex
+# only has to be tried at line breaks
+_SECTION_MARKER_LINE_PATTERN = re.compile(
+    rf"[{_LINE_BREAKS}]{_SECTION_MARKER}(?=[{_LINE_BREAKS}]|$)"
+)
+_FIRST_LINE_PATTERN = re.compile(rf"[^{_LINE_BREAKS}]*")
+# lyrics.ovh starts some lyrics with a "Paroles de la chanson ... par ..." line
+_LYRICS_HEADER = "Paroles de la chanson "
+
+
+def _count_matches(pattern: re.Pattern, text: str) -> int:
+    """Counts the matches of a pattern in a text. Each match is dropped as soon
+    as it is counted, so no list of them is built however long the text is
+
+    :re.Pattern pattern: pattern to match
+    :str text: text to match it in
+    :int returns: number of matches
+    """
+    # zip stops at the end of finditer before taking another number from counter
+    counter = count()
+    deque(zip(pattern.finditer(text), counter), maxlen=0)
+    return next(counter)
+
+
+class Tokenizer:
+    """Counts the words in lyrics, subclasses decide what a word is"""
+
+    def count(self, text: str) -> int:
+        """Counts the words in a text
+
+        :str text: text to count the words of
+        :int returns: number of words
+        """
+        raise NotImplementedError
+
+    def count_batch(self, texts) -> array:
+        """Counts the words in many texts
+
+        :iterable texts: texts to count the words of
+        :array returns: number of words in each text, in the same order
+        """
+        return array("I", map(self.count, texts))
+
+
+class RegexTokenizer(Tokenizer):
+    """Words are matches of a regex, by default runs of letters and digits so
+    punctuation on its own (e.g. " - ") isn't counted as a word
+    """
+
+    def __init__(self, pattern: re.Pattern = _WORD_PATTERN):
+        self.pattern = pattern
+
+    def count(self, text: str) -> int:
+        return _count_matches(self.pattern, text)
+
+    def count_batch(self, texts) -> array:
+        # One counter and consumer for every text, the difference between the
+        # counts before and after a text is its number of words
+        finditer = self.pattern.finditer
+        consume = deque(maxlen=0).extend
+        counter = count()
+        counts = array("I")
+        counted_before = 0
+        for text in texts:
+            consume(zip(finditer(text), counter))
+            counted = next(counter)
+            counts.append(counted - counted_before)
+            counted_before = counted + 1
+        return counts
+
+
+class WhitespaceTokenizer(Tokenizer):
+    """Words are separated by whitespace, the same as len(text.split())"""
+
+    def count(self, text: str) -> int:
+        if len(text) <= CHUNK_SIZE:
+            return len(text.split())
+        return _count_matches(_NON_WHITESPACE_PATTERN, text)
+
+
+class LineTokenizer(Tokenizer):
+    """Counts the words of the lines that are sung, section markers like
+    "[Chorus]" and the lyrics.ovh header line are left out.
+
+    The whole text is counted at once and the words of the lines left out are
+    taken away, so the tokenizer's words mustn't span more than one line.
+    """
+
+    def __init__(self, tokenizer: Tokenizer = None):
+        self.tokenizer = tokenizer if tokenizer != None else WhitespaceTokenizer()
+
+    def count(self, text: str) -> int:
+        number_of_words = self.tokenizer.count(text)
+        first_line = _FIRST_LINE_PATTERN.match(text).group()
+        if first_line.strip().startswith(
+            _LYRICS_HEADER
+        ) or _SECTION_MARKER_PATTERN.fullmatch(first_line):
+            number_of_words -= self.tokenizer.count(first_line)
+        for marker_line in _SECTION_MARKER_LINE_PATTERN.finditer(text):
+            number_of_words -= self.tokenizer.count(marker_line.group())
+        return number_of_words
+
+
+TOKENIZERS = {
+    "whitespace": WhitespaceTokenizer(),
+    "word": RegexTokenizer(),
+    "line": LineTokenizer(),
+}
+
+_tokenizer = TOKENIZERS[DEFAULT_TOKENIZER]
+
+
+def configure_tokenizer(tokenizer) -> None:
+    """Sets the tokenizer used to count the words of every song
+
+    :param tokenizer: name of one of the TOKENIZERS, or a Tokenizer
+    :type tokenizer: str or Tokenizer
+    :None returns:
+    :raises KeyError: if there is no tokenizer with the given name
+    """
+    global _tokenizer
+
+    _tokenizer = TOKENIZERS[tokenizer] if isinstance(tokenizer, str) else tokenizer
+
+
+def get_tokenizer() -> Tokenizer:
+    """Gets the tokenizer used to count the words of every song
+
+    :Tokenizer returns: The configured tokenizer
+    """
+    return _tokenizer
+
+
+def count_words(text: str, tokenizer: Tokenizer = None) -> int:
+    """Counts the words in a text without building a list of every word
+
+    :str text: text to count the words of
+    :Tokenizer tokenizer: tokenizer to count with, defaults to the configured one
+    :int returns: number of words
+    """
+    return (tokenizer if tokenizer != None else _tokenizer).count(text)
+
+
+def count_words_batch(texts, tokenizer: Tokenizer = None) -> array:
+    """Counts the words in many texts at once
+
+    :iterable texts: texts to count the words of
+    :Tokenizer tokenizer: tokenizer to count with, defaults to the configured one
+    :array returns: number of words in each text, in the same order
+    """
+    return (tokenizer if tokenizer != None else _tokenizer).count_batch(texts)
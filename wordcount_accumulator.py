@@ -0,0 +1,101 @@
+import threading
+
+
+class WordcountAccumulator:
+    """Keeps running statistics of song wordcounts as they are added.
+
+    The mean and variance use Welford's method so they can be read at any
+    time without going back over the songs, and stay accurate however many
+    songs are added.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self._mean = 0.0
+        self._sum_of_squared_differences = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, wordcount: int) -> None:
+        """Adds the wordcount of a song
+
+        :int wordcount: number of words in the song
+        :None returns:
+        """
+        with self._lock:
+            self.count += 1
+            difference = wordcount - self._mean
+            self._mean += difference / self.count
+            self._sum_of_squared_differences += difference * (wordcount - self._mean)
+            self.minimum = (
+                wordcount if self.minimum == None else min(self.minimum, wordcount)
+            )
+            self.maximum = (
+                wordcount if self.maximum == None else max(self.maximum, wordcount)
+            )
+
+    def remove(self, wordcount: int) -> None:
+        """Removes the wordcount of a song that was previously added.
+            The minimum and maximum can't be undone so are left as they are
+
+        :int wordcount: number of words in the song
+        :None returns:
+        """
+        with self._lock:
+            if self.count <= 1:
+                self._reset()
+                return
+            difference = wordcount - self._mean
+            self._mean = (self._mean * self.count - wordcount) / (self.count - 1)
+            self._sum_of_squared_differences -= difference * (wordcount - self._mean)
+            self._sum_of_squared_differences = max(
+                0.0, self._sum_of_squared_differences
+            )
+            self.count -= 1
+
+    def recalculate_extremes(self, wordcounts) -> None:
+        """Sets the minimum and maximum from every wordcount still added,
+            for use after removing wordcounts
+
+        :iterable wordcounts: wordcounts of the songs still added
+        :None returns:
+        """
+        wordcounts = list(wordcounts)
+        with self._lock:
+            self.minimum = min(wordcounts) if wordcounts != [] else None
+            self.maximum = max(wordcounts) if wordcounts != [] else None
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.count > 0 else None
+
+    @property
+    def variance(self) -> float:
+        return self._sum_of_squared_differences / self.count if self.count > 0 else 0
+
+    @property
+    def standard_deviation(self) -> float:
+        return self.variance ** 0.5
+
+    def get_statistics(self) -> dict:
+        """Returns a dictionary of the mean, max, min, variance,
+        and standard deviation of the wordcounts added so far
+
+        :dict returns: Dictionary of statistics
+        """
+        with self._lock:
+            return {
+                "Mean": self.mean,
+                "Max": self.maximum if self.maximum != None else 0,
+                "Min": self.minimum if self.minimum != None else 0,
+                "Variance": self.variance,
+                "Std_dev": self.standard_deviation,
+            }
+
+    def _reset(self) -> None:
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self._mean = 0.0
+        self._sum_of_squared_differences = 0.0